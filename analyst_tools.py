@@ -0,0 +1,365 @@
+"""
+analyst_tools.py
+----------------
+Local tools for the tool-calling analyst (llm.answer_with_tools).
+
+answer_match_question pre-injects every stat the model might need, so the
+prompt grows with every metric we add. In tool-calling mode the model starts
+from the scoreline and asks for what the question needs:
+
+    window_stats        team totals for any span of minutes
+    player_stats        one player's match figures (plus season per-90 profile)
+    shot_list           shots, filtered by team / minutes / xG / goals
+    possession_chains   possession-chain moments (moments.py), filtered or searched
+
+Every tool reads tables built once per match (AnalystTools, memoised with
+MatchCache.derived). These are per-minute cumulative sums for window_stats,
+a per-player bincount table, the shot list, and the moment index. A call is a
+couple of array lookups, well under a millisecond. Results are compact JSON,
+capped at MAX_ROWS rows, so the prompt stays small however many metrics exist.
+
+ScriptedClient stands in for the OpenAI client. It replays a fixed list of
+tool calls and a final answer, so the whole loop runs offline:
+
+    python analyst_tools.py                  # scripted run on synthetic events
+"""
+
+import copy
+import json
+import types
+
+import numpy as np
+
+from tactical_metrics import FINAL_THIRD_X
+
+MAX_ROWS = 8
+
+TOOL_SPECS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "window_stats",
+            "description": "Team totals (passes, completion, final-third passes, shots, xG, goals, pressures, "
+                           "tackles, pass share) between two match minutes. Omit the minutes for the whole match.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_minute": {"type": "integer", "description": "first minute, inclusive (default 0)"},
+                    "end_minute": {"type": "integer", "description": "last minute, exclusive (default full time)"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "player_stats",
+            "description": "One player's figures in this match (passes, shots, xG, pressures, tackles, touches, "
+                           "xT) and their season per-90 profile if available. Surnames are enough.",
+            "parameters": {
+                "type": "object",
+                "properties": {"player": {"type": "string", "description": "player name or surname"}},
+                "required": ["player"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "shot_list",
+            "description": "Shots with minute, team, player, xG and outcome, highest xG first.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "team": {"type": "string", "description": "only this team's shots"},
+                    "start_minute": {"type": "integer"},
+                    "end_minute": {"type": "integer"},
+                    "min_xg": {"type": "number", "description": "only shots with at least this xG"},
+                    "goals_only": {"type": "boolean"},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "possession_chains",
+            "description": "Summaries of possession chains (clock, team, start, passes, players, box entry, "
+                           "shots, substitutions), filtered and/or ranked by a free-text query.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "team": {"type": "string"},
+                    "start_minute": {"type": "integer"},
+                    "end_minute": {"type": "integer"},
+                    "reached_box": {"type": "boolean"},
+                    "with_shot": {"type": "boolean"},
+                    "pattern": {"type": "string", "description": "e.g. 'counter', 'corner', 'free kick'"},
+                    "query": {"type": "string", "description": "free-text relevance ranking"},
+                },
+            },
+        },
+    },
+]
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class AnalystTools:
+    """The tool implementations over one match's precomputed tables."""
+
+    def __init__(self, cols, home_team: str, away_team: str, moment_index=None,
+                 player_xt: dict | None = None, season_profiles=None):
+        self.home_team, self.away_team = home_team, away_team
+        self.teams = (home_team, away_team)
+        self.moment_index = moment_index
+        self.season_profiles = season_profiles
+        self.calls = []           # (name, arguments, result chars) — shown under the answer
+
+        types_, team, player = cols["type"], cols["team"], cols["player"]
+        minute = np.asarray(cols["minute"], dtype=np.int64)
+        valid_minute = np.where(minute >= 0, minute, 0)
+        self.n_minutes = int(valid_minute.max()) + 1 if len(cols) else 1
+
+        is_pass = types_ == cols.code("type", "Pass")
+        completed = is_pass & (cols["outcome"] == -1)
+        with np.errstate(invalid="ignore"):
+            final_third = is_pass & (cols["end_x"] >= FINAL_THIRD_X)
+        is_shot = types_ == cols.code("type", "Shot")
+        is_goal = is_shot & (cols["outcome"] == cols.code("outcome", "Goal"))
+        tackles = (types_ == cols.code("type", "Duel")) & (cols["subtype"] == cols.code("subtype", "Tackle"))
+        xg = np.nan_to_num(cols["xg"]).astype(np.float64)
+        masks = {
+            "passes": (is_pass, None), "completed_passes": (completed, None),
+            "final_third_passes": (final_third, None), "shots": (is_shot, None), "xg": (is_shot, xg),
+            "goals": (is_goal, None), "pressures": (types_ == cols.code("type", "Pressure"), None),
+            "tackles": (tackles, None),
+        }
+
+        # window_stats: per team, per metric, cumulative totals by minute —
+        # any window is one subtraction
+        self._cumulative = {}
+        for t in self.teams:
+            own = team == cols.code("team", t)
+            self._cumulative[t] = {
+                name: np.concatenate(([0.0], np.cumsum(np.bincount(
+                    valid_minute[mask & own], weights=None if w is None else w[mask & own],
+                    minlength=self.n_minutes))))
+                for name, (mask, w) in masks.items()
+            }
+
+        # player_stats: one bincount table over player codes
+        has_player = player >= 0
+        n_codes = int(player.max()) + 1 if has_player.any() else 0
+        self._player_totals = {
+            name: np.bincount(player[mask & has_player], weights=None if w is None else w[mask & has_player],
+                              minlength=n_codes)
+            for name, (mask, w) in masks.items() if name != "final_third_passes"
+        }
+        self._player_totals["touches"] = np.bincount(player[has_player & ~np.isnan(cols["x"])], minlength=n_codes)
+        present = np.flatnonzero(np.bincount(player[has_player], minlength=n_codes))
+        team_of = np.zeros(n_codes, dtype=np.int64) - 1
+        team_of[player[has_player]] = team[has_player]
+        self._players = {cols.decode("player", int(p)): (int(p), cols.decode("team", int(team_of[p])))
+                         for p in present}
+        self._player_xt = {name: xt for by_player in (player_xt or {}).values() for name, xt in by_player.items()}
+
+        # shot_list: every shot, in match order
+        self._shots = [
+            {"minute": int(minute[i]), "team": cols.decode("team", int(team[i])),
+             "player": cols.decode("player", int(player[i])), "xg": round(float(xg[i]), 2),
+             "outcome": cols.decode("outcome", int(cols["outcome"][i]))}
+            for i in np.flatnonzero(is_shot).tolist()
+        ]
+
+    # -- helpers -------------------------------------------------------------
+    def _team(self, name) -> str | None:
+        """
+        Resolves a loose team name ("barca" → "Barcelona"); None when no team is
+        asked for (both teams). A name matching neither team raises KeyError.
+        """
+        if not name:
+            return None
+        name = str(name).lower()
+        if name in ("home", "away"):
+            return self.home_team if name == "home" else self.away_team
+        for t in self.teams:
+            if name in t.lower() or t.lower() in name:
+                return t
+        raise KeyError(name)
+
+    def _span(self, start, end) -> tuple[int, int]:
+        start = 0 if start is None else int(np.clip(int(start), 0, self.n_minutes))
+        end = self.n_minutes if end is None else int(np.clip(int(end), start, self.n_minutes))
+        return start, end
+
+    # -- tools ---------------------------------------------------------------
+    def window_stats(self, start_minute=None, end_minute=None) -> dict:
+        start, end = self._span(start_minute, end_minute)
+        totals = {t: {m: float(c[end] - c[start]) for m, c in self._cumulative[t].items()} for t in self.teams}
+        all_passes = sum(totals[t]["passes"] for t in self.teams)
+        result = {"window": f"{start}-{end}'", "teams": {}}
+        for t in self.teams:
+            tt = totals[t]
+            result["teams"][t] = {
+                **{m: (round(v, 2) if m == "xg" else int(v)) for m, v in tt.items()},
+                "pass_completion_pct": round(100 * tt["completed_passes"] / tt["passes"], 1) if tt["passes"] else None,
+                "pass_share_pct": round(100 * tt["passes"] / all_passes, 1) if all_passes else None,
+            }
+        return result
+
+    def player_stats(self, player) -> dict:
+        from player_profiles import players_in_question
+
+        matches = players_in_question(str(player), self._players) or [
+            name for name in self._players if str(player).lower() in name.lower()
+        ]
+        if not matches:
+            return {"error": f"no player matching {player!r} in this match"}
+        name = matches[0]
+        code, team = self._players[name]
+        result = {"player": name, "team": team,
+                  **{m: (round(float(v[code]), 2) if m == "xg" else int(v[code]))
+                     for m, v in self._player_totals.items()}}
+        if name in self._player_xt:
+            result["xt"] = self._player_xt[name]
+        if self.season_profiles is not None:
+            profile = self.season_profiles.profile(name)
+            if profile is not None:
+                result["season_per90"] = profile["per90"]
+                result["season_percentile"] = profile["percentile"]
+        if len(matches) > 1:
+            result["other_candidates"] = matches[1:MAX_ROWS]
+        return result
+
+    def shot_list(self, team=None, start_minute=None, end_minute=None, min_xg=None, goals_only=False) -> dict:
+        try:
+            team = self._team(team)
+        except KeyError:
+            return {"error": f"no team matching {team!r} in this match"}
+        start, end = self._span(start_minute, end_minute)
+        shots = [s for s in self._shots
+                 if (team is None or s["team"] == team) and start <= s["minute"] < end
+                 and (min_xg is None or s["xg"] >= float(min_xg))
+                 and (not goals_only or s["outcome"] == "Goal")]
+        shots.sort(key=lambda s: -s["xg"])
+        return {"count": len(shots), "total_xg": round(sum(s["xg"] for s in shots), 2), "shots": shots[:MAX_ROWS]}
+
+    def possession_chains(self, team=None, start_minute=None, end_minute=None, reached_box=None,
+                          with_shot=None, pattern=None, query=None) -> dict:
+        if self.moment_index is None:
+            return {"error": "possession chains are not available for this match"}
+        try:
+            team = self._team(team)
+        except KeyError:
+            return {"error": f"no team matching {team!r} in this match"}
+        start, end = self._span(start_minute, end_minute)
+        moments = self.moment_index.moments
+        keep = [
+            i for i, m in enumerate(moments)
+            if (team is None or m["team"] == team) and start <= m["start_minute"] < end
+            and (reached_box is None or m["reached_box"] == bool(reached_box))
+            and (with_shot is None or (m["shots"] > 0) == bool(with_shot))
+            and (not pattern or str(pattern).lower() in m["pattern"].lower())
+        ]
+        count = len(keep)
+        if query:
+            scores = self.moment_index.scores(str(query))
+            keep = sorted(sorted(keep, key=lambda i: -scores[i])[:MAX_ROWS])
+        return {"count": count, "chains": [moments[i]["text"] for i in keep[:MAX_ROWS]]}
+
+    def execute(self, name: str, arguments) -> str:
+        """Runs one tool call (arguments as a JSON string or dict) and returns its compact JSON result."""
+        args = {}
+        try:
+            args = json.loads(arguments or "{}") if isinstance(arguments, str) else dict(arguments or {})
+            result = getattr(self, name)(**args) if name in TOOL_NAMES else {"error": f"unknown tool {name!r}"}
+        except (TypeError, ValueError) as e:
+            # Reported back to the model, which can retry with corrected arguments
+            result = {"error": f"bad arguments for {name}: {e}"}
+        text = _compact(result)
+        self.calls.append((name, args, len(text)))
+        return text
+
+
+TOOL_NAMES = frozenset(spec["function"]["name"] for spec in TOOL_SPECS)
+
+
+def get_analyst_tools(match_id, home_team: str, away_team: str, player_xt=None, season_profiles=None,
+                      cache=None) -> AnalystTools:
+    """
+    AnalystTools for a cached match. The tables are built once per process;
+    each call gets its own shallow copy so the per-question call log is not
+    shared across sessions.
+    """
+    from moments import get_moment_index
+
+    if cache is None:
+        from match_cache import get_match_cache
+        cache = get_match_cache()
+    tools = cache.derived(
+        match_id, ("analyst_tools", home_team, away_team),
+        lambda m: AnalystTools(cache.columns(match_id), home_team, away_team,
+                               moment_index=get_moment_index(match_id, cache)),
+    )
+    tools = copy.copy(tools)
+    tools.calls = []
+    tools.season_profiles = season_profiles
+    tools._player_xt = {name: xt for by_player in (player_xt or {}).values() for name, xt in by_player.items()}
+    return tools
+
+
+class ScriptedClient:
+    """
+    Offline stand-in for the OpenAI client in answer_with_tools: each
+    chat.completions.create call returns the next scripted step, either a list
+    of (tool name, arguments dict) calls or the final answer string. Requests
+    are kept in .requests for inspection. Steps are replayed as scripted
+    whatever the request's tool_choice.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        self.requests.append(request)
+        step = self.script.pop(0) if self.script else "No further steps scripted."
+        if isinstance(step, str):
+            message = types.SimpleNamespace(content=step, tool_calls=None)
+        else:
+            message = types.SimpleNamespace(content=None, tool_calls=[
+                types.SimpleNamespace(id=f"call_{len(self.requests)}_{i}", type="function",
+                                      function=types.SimpleNamespace(name=name, arguments=json.dumps(args)))
+                for i, (name, args) in enumerate(step)
+            ])
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=None)
+
+
+if __name__ == "__main__":
+    import time
+
+    from benchmarks.synthetic_events import AWAY_TEAM, HOME_TEAM, generate_events
+    from llm import answer_with_tools
+    from moments import MomentIndex, match_moments
+    from season_archive import encode_match
+
+    columns = encode_match(generate_events(3500, seed=7))
+    analyst = AnalystTools(columns, HOME_TEAM, AWAY_TEAM, moment_index=MomentIndex(match_moments(columns)))
+    for tool_name, tool_args in (("window_stats", {"start_minute": 60, "end_minute": 75}),
+                                 ("shot_list", {"team": "home", "min_xg": 0.1}),
+                                 ("possession_chains", {"with_shot": True, "query": "goal"})):
+        start = time.perf_counter()
+        output = analyst.execute(tool_name, tool_args)
+        print(f"{tool_name} ({(time.perf_counter() - start) * 1000:.3f} ms, {len(output)} chars): {output[:160]}")
+
+    client = ScriptedClient([
+        [("window_stats", {"start_minute": 60, "end_minute": 90}), ("shot_list", {"start_minute": 60})],
+        "Scripted answer: the home side created more after the hour.",
+    ])
+    print(answer_with_tools("Who was better after the hour?", analyst, HOME_TEAM, AWAY_TEAM, 1, 1,
+                            retrieved_docs=[], client=client))
+    print(f"{len(client.requests)} model calls; tools used: {[c[0] for c in analyst.calls]}")
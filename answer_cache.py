@@ -0,0 +1,339 @@
+"""
+answer_cache.py
+---------------
+Precomputed answers to the example questions on the Ask the Analyst tab.
+
+Most users start with one of the EXAMPLE_QUESTIONS advertised above the chat
+box. A background AnswerWarmer runs the full question pipeline for them as
+soon as a match page opens (and `python answer_cache.py` does it for a whole
+season as a batch job). The pipeline is scope check, intent, knowledge-base
+retrieval, moment retrieval and answer. The results are stored per match, so
+clicking through an example question later answers with zero LLM latency.
+
+Entries are keyed by answer_version(), a digest of the LLM and embedding
+models, the code of every pipeline stage (prompts, stats block, tactical
+metrics, xT, momentum, moments, player profiles, retrieval), PIPELINE_VERSION
+and the knowledge base. Changing any of them therefore starts a fresh cache
+instead of serving stale answers. Within a version, entries are also keyed by
+their grounding(): whether the season xT grid and player profiles existed
+when the answer was made, so answers from before the season archive was built
+are redone once it is. Entries live in memory and under .cache/answers/
+(or ANSWER_CACHE_DIR), one JSON file per match per version and grounding, so
+replicas on a shared volume and restarted processes reuse them.
+
+Cached answers are first-turn answers: they are served only for the
+pre-injected pipeline, not the tool-calling analyst, and only when the
+question opens the conversation. Live answers run the same answer_question(),
+so the cache and the chat can never drift apart.
+
+    python answer_cache.py                   # warm every match of the season
+    python answer_cache.py --limit 20        # only the 20 most recent
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+
+import tracing
+
+ANSWER_CACHE_DIR = Path(os.environ.get("ANSWER_CACHE_DIR", Path(__file__).parent / ".cache" / "answers"))
+
+EXAMPLE_QUESTIONS = (
+    "Was the result fair based on xG?",
+    "Which team dominated tactically?",
+    "Why did the winning team win?",
+    "Which substitution changed the match?",
+)
+
+RETRIEVED_DOCS = 2
+WARM_WORKERS = 1          # answers cost LLM calls — warm one match at a time
+
+# Bump to drop every cached answer after a change answer_version() cannot see
+# in the code it digests (e.g. a fix to the StatsBomb data it reads)
+PIPELINE_VERSION = 1
+
+# Modules whose code shapes an answer, digested whole so their constants
+# (metric notes, thresholds, MAX_MOMENTS, ...) count too
+PIPELINE_MODULES = ("llm", "retriever", "tactical_metrics", "expected_threat", "momentum", "moments",
+                    "player_profiles")
+
+
+def question_key(question: str) -> str:
+    """Normalised question text, so "was the result fair based on xg" hits too."""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.")
+
+
+_EXAMPLE_KEYS = frozenset(question_key(q) for q in EXAMPLE_QUESTIONS)
+
+
+@functools.cache
+def answer_version() -> str:
+    """
+    Digest of everything an answer depends on besides the match and its
+    grounding: models, pipeline code, PIPELINE_VERSION and knowledge base.
+    """
+    import importlib
+
+    import llm
+    from data_processing import compute_match_stats
+    from retriever import EMBEDDING_MODEL, KNOWLEDGE_BASE_DIR
+
+    digest = hashlib.sha1(f"{PIPELINE_VERSION}\0{llm.ANSWER_MODEL}\0{EMBEDDING_MODEL}".encode())
+    for name in PIPELINE_MODULES:
+        digest.update(inspect.getsource(importlib.import_module(name)).encode())
+    for fn in (compute_match_stats, match_context, answer_question):
+        digest.update(inspect.getsource(fn).encode())
+    for doc in sorted(KNOWLEDGE_BASE_DIR.glob("*.txt")):
+        digest.update(doc.name.encode() + doc.read_bytes())
+    digest.update(str(RETRIEVED_DOCS).encode())
+    return digest.hexdigest()[:16]
+
+
+def grounding(xt_grid=None, season_profiles=None) -> str:
+    """Which season models an answer could use: "xt+profiles", "xt", "profiles" or "match"."""
+    return "+".join(name for name, model in (("xt", xt_grid), ("profiles", season_profiles))
+                    if model is not None) or "match"
+
+
+def match_context(match_id, home_team: str, away_team: str, home_score, away_score,
+                  xt_grid=None, season_profiles=None, cache=None) -> dict:
+    """The per-match inputs of the answer pipeline, built the same way as on the match page."""
+    from expected_threat import get_player_xt, with_expected_threat
+    from moments import get_moment_index, stats_alongside_moments
+    from momentum import get_momentum
+    from tactical_metrics import tactical_metrics, with_tactical_metrics
+
+    if cache is None:
+        from match_cache import get_match_cache
+        cache = get_match_cache()
+    match = cache.get(match_id)
+    match_stats = cache.match_stats(match_id, home_team, away_team)
+    tactical = cache.derived(match_id, ("tactical_metrics", home_team, away_team),
+                             lambda m: tactical_metrics(cache.columns(match_id), home_team, away_team))
+    prompt_stats = with_tactical_metrics(match_stats, tactical)
+    if xt_grid is not None:
+        prompt_stats = with_expected_threat(prompt_stats,
+                                            get_player_xt(match_id, xt_grid, home_team, away_team, cache))
+    return {
+        "home_team": home_team, "away_team": away_team,
+        "home_score": home_score, "away_score": away_score,
+        "match_stats": match_stats,
+        "match_stats_json": json.dumps(prompt_stats, indent=2),
+        "moment_stats_json": json.dumps(stats_alongside_moments(prompt_stats), indent=2),
+        "turning_points": get_momentum(match_id, home_team, away_team, cache)["turning_points"],
+        "moment_index": get_moment_index(match_id, cache),
+        "squad": [p.get("player_name") for team in match.lineups for p in team.get("lineup", [])],
+        "season_profiles": season_profiles,
+        "grounding": grounding(xt_grid, season_profiles),
+    }
+
+
+def answer_question(question: str, context: dict, conversation_context: str = "") -> dict:
+    """
+    Runs the whole question pipeline and returns a cache entry:
+    {"question", "in_scope", "intent", "retrieved_docs", "moments", "answer", "version", "grounding"}.
+    MatchService.ask answers live questions with it too, passing the
+    conversation for follow-ups; only first-turn entries are ever cached.
+    """
+    from llm import answer_match_question, classify_question_intent, classify_question_scope
+    from player_profiles import question_profiles
+    from retriever import retrieve
+
+    entry = {"question": question, "version": answer_version(), "grounding": context["grounding"],
+             "intent": None, "retrieved_docs": [], "moments": []}
+    in_scope, refusal = classify_question_scope(question)
+    entry["in_scope"] = in_scope
+    if not in_scope:
+        entry["answer"] = refusal
+        return entry
+
+    entry["intent"] = classify_question_intent(question)
+    entry["retrieved_docs"] = retrieve(question, top_k=RETRIEVED_DOCS)
+    with tracing.span("moments.search"):
+        entry["moments"] = context["moment_index"].search(question)
+    grounding = None
+    if entry["intent"] == "player_impact" and context["season_profiles"] is not None:
+        grounding = question_profiles(context["season_profiles"], question, context["squad"],
+                                      context["match_stats"], context["home_team"], context["away_team"])
+    entry["answer"] = answer_match_question(
+        question=question,
+        match_stats_json=context["moment_stats_json" if entry["moments"] else "match_stats_json"],
+        retrieved_docs=entry["retrieved_docs"],
+        home_team=context["home_team"],
+        away_team=context["away_team"],
+        home_score=context["home_score"],
+        away_score=context["away_score"],
+        conversation_context=conversation_context,
+        turning_points=context["turning_points"],
+        player_profiles=grounding,
+        moments=[m["text"] for m in entry["moments"]],
+    )
+    return entry
+
+
+class AnswerCache:
+    """
+    Versioned example-question answers per match and grounding (grounding()),
+    in memory and on disk.
+    """
+
+    def __init__(self, cache_dir: Path = ANSWER_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._entries: dict = {}          # (match_id, grounding) -> {question_key: entry}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, match_id, grounding: str) -> Path:
+        return self.cache_dir / answer_version() / grounding / f"{int(match_id)}.json"
+
+    def _load(self, match_id, grounding: str) -> dict:
+        # A complete match is served from memory; an incomplete one re-reads
+        # its file, which another process may have filled in since
+        key = (int(match_id), grounding)
+        with self._lock:
+            entries = self._entries.get(key)
+        if entries is not None and _EXAMPLE_KEYS <= entries.keys():
+            return entries
+        path = self._path(match_id, grounding)
+        on_disk = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        with self._lock:
+            entries = self._entries[key] = {**on_disk, **self._entries.get(key, {})}
+            return entries
+
+    def missing(self, match_id, grounding: str) -> list[str]:
+        """The example questions with no cached answer for this match and grounding."""
+        cached = self._load(match_id, grounding)
+        return [q for q in EXAMPLE_QUESTIONS if question_key(q) not in cached]
+
+    def get(self, match_id, question: str, grounding: str) -> dict | None:
+        """The cached entry for an example question, or None (also for any non-example question)."""
+        key = question_key(question)
+        if key not in _EXAMPLE_KEYS:
+            return None
+        entry = self._load(match_id, grounding).get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        tracing.record_cache("answer", entry is not None)
+        return entry
+
+    def put(self, match_id, entry: dict):
+        """Stores one entry under its grounding and rewrites the match's file (atomically)."""
+        key = (int(match_id), entry["grounding"])
+        entries = self._load(*key)
+        with self._lock:
+            entries = self._entries[key] = {**entries, question_key(entry["question"]): entry}
+        path = self._path(*key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"matches": len({match_id for match_id, _ in self._entries}), "hits": self.hits, "misses": self.misses,
+                    "version": answer_version()}
+
+
+class AnswerWarmer:
+    """Answers the example questions for queued matches in the background."""
+
+    def __init__(self, answer_cache: AnswerCache, max_workers: int = WARM_WORKERS):
+        self.answer_cache = answer_cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="answer-warm")
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self.warmed = 0
+        self.failed = 0
+
+    def warm(self, match_id, home_team: str, away_team: str, home_score, away_score,
+             xt_grid=None, season_profiles=None):
+        """Queues a match unless its answers are already cached or being computed."""
+        with self._lock:
+            if match_id in self._inflight:
+                return
+            self._inflight.add(match_id)
+        if not self.answer_cache.missing(match_id, grounding(xt_grid, season_profiles)):
+            with self._lock:
+                self._inflight.discard(match_id)
+            return
+        self._executor.submit(self._warm, match_id, home_team, away_team, home_score, away_score,
+                              xt_grid, season_profiles)
+
+    def _warm(self, match_id, home_team, away_team, home_score, away_score, xt_grid, season_profiles):
+        try:
+            self.warm_now(match_id, home_team, away_team, home_score, away_score, xt_grid, season_profiles)
+            self.warmed += 1
+        except Exception:
+            self.failed += 1   # background work — a failure here must never surface to the user
+        finally:
+            with self._lock:
+                self._inflight.discard(match_id)
+
+    def warm_now(self, match_id, home_team, away_team, home_score, away_score,
+                 xt_grid=None, season_profiles=None) -> int:
+        """Answers every missing example question for one match, in this thread. Returns how many."""
+        missing = self.answer_cache.missing(match_id, grounding(xt_grid, season_profiles))
+        if not missing:
+            return 0
+        context = match_context(match_id, home_team, away_team, home_score, away_score,
+                                xt_grid, season_profiles)
+        for question in missing:
+            entry = answer_question(question, context)
+            # A failed LLM call comes back as an error string — don't cache it
+            from llm import is_error_answer
+            if not is_error_answer(entry["answer"]):
+                self.answer_cache.put(match_id, entry)
+        return len(missing)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"inflight": len(self._inflight), "warmed": self.warmed, "failed": self.failed}
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    """One answer cache per server process, shared across sessions."""
+    return AnswerCache()
+
+
+@st.cache_resource
+def get_answer_warmer() -> AnswerWarmer:
+    """One background warm-up pool per server process."""
+    return AnswerWarmer(get_answer_cache())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from data_processing import get_laliga_1819_info, load_match_list
+    from expected_threat import get_xt_grid
+    from player_profiles import get_player_profiles
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--limit", type=int, default=None, help="only the N most recent matches")
+    args = parser.parse_args()
+
+    comp, season = get_laliga_1819_info()
+    matches = load_match_list(comp, season)
+    if args.limit is not None:
+        matches = matches.head(args.limit)
+    warmer = AnswerWarmer(AnswerCache())
+    grid, profiles = get_xt_grid(comp, season), get_player_profiles(comp, season)
+    print(f"Warming {len(EXAMPLE_QUESTIONS)} example answers for {len(matches)} matches "
+          f"(version {answer_version()})...")
+    for row in matches.itertuples(index=False):
+        answered = warmer.warm_now(row.match_id, row.home_team_name, row.away_team_name,
+                                   row.home_score, row.away_score, grid, profiles)
+        print(f"  {row.match_id}  {row.home_team_name} – {row.away_team_name}: {answered} answered")
@@ -1,9 +1,47 @@
-import streamlit as st
 import pandas as pd
-from data_processing import get_laliga_1819_info, load_matches, load_events, get_team_logo_url
+import streamlit as st
+from flags import flag_emoji
+from service import get_match_service
+from service_client import get_service_client
+import tracing
+import profiling
 
 st.set_page_config(page_title="AI Tactical Breakdown", layout="wide")
 
+# All data, charts and answers come from the analytics tier: the headless
+# service at $ANALYTICS_SERVICE_URL (service.py) if set, else the same
+# MatchService running in this process
+service_client = get_service_client()
+analytics = service_client or get_match_service()
+
+@st.cache_data(show_spinner=False)
+def load_match_frame(team=None):
+    """The season's match list (or one team's fixtures) as a DataFrame, fetched once."""
+    return pd.DataFrame(analytics.matches(team))
+
+# Every rerun is traced; the waterfall is shown in the sidebar once the page has rendered
+page_trace = tracing.begin("page")
+
+# ?profile=rerun / ?profile=question (with $APP_PROFILE_URL, or $APP_PROFILE)
+# captures cProfile + tracemalloc
+profile_mode = profiling.requested_mode(st.query_params)
+# A capture left running by a rerun that died on an exception — tracemalloc is
+# process-wide, so switch it off now
+abandoned_profile = st.session_state.pop("rerun_profile", None)
+if abandoned_profile is not None:
+    abandoned_profile.stop()
+rerun_profile = None
+if profile_mode == "rerun":
+    profiling.clear_request(st.query_params)
+    rerun_profile = st.session_state["rerun_profile"] = profiling.ProfileSession("list").start()
+
+def stop_rerun_profile():
+    """Ends this rerun's capture. Must run before st.stop(): cProfile and tracemalloc would stay on."""
+    if rerun_profile is not None:
+        st.session_state.pop("rerun_profile", None)
+        rerun_profile.stop()
+        st.sidebar.caption(rerun_profile.summary())
+
 header_html = """
 <div style="display: flex; align-items: center; gap: 15px; margin-bottom: 5px;">
     <span style="font-size: 1.25em; font-weight: 900; color: #00A3E0; letter-spacing: 0.5px;">SofaScore</span>
@@ -18,46 +56,25 @@ header_html = """
 st.markdown(header_html, unsafe_allow_html=True)
 st.markdown("A feature enhancement to the existing SofaScore setup, providing structured post-match tactical analysis using open event-level football data.")
 
-@st.cache_data
-def get_flag_emoji(country_name):
-    if not country_name: return "🏳️"
-    
-    overrides = {
-        "England": "🏴󠁧󠁢󠁥󠁮󠁧󠁿", 
-        "Wales": "🏴󠁧󠁢󠁷󠁬󠁳󠁿", 
-        "Scotland": "🏴󠁧󠁢󠁳󠁣󠁴󠁿",
-        "Northern Ireland": "🇬🇧",
-        "Korea Republic": "KR",
-        "Côte d'Ivoire": "CI",
-        "Bosnia and Herzegovina": "BA",
-        "Republic of Ireland": "IE",
-        "USA": "US",
-        "Russia": "RU",
-        "Turkey": "TR",
-        "Iran, Islamic Republic of": "IR",
-        "Venezuela": "VE",
-        "Syria": "SY",
-        "Democratic Republic of the Congo": "CD",
-        "Serbia": "RS",
-        "Croatia": "HR"
-    }
-    
-    val = overrides.get(country_name)
-    if not val:
-        import pycountry
-        try:
-            c = pycountry.countries.get(name=country_name)
-            if c:
-                val = c.alpha_2
-            else:
-                c = pycountry.countries.search_fuzzy(country_name)[0]
-                val = c.alpha_2
-        except:
-            return "🏳️"
-            
-    if len(val) == 2:
-        return chr(ord(val[0]) + 127397) + chr(ord(val[1]) + 127397)
-    return val
+def render_trace_waterfall(trace):
+    """Draws a finished trace (tracing.Trace.to_dict()) as an HTML waterfall, one row per span."""
+    total = max(trace["duration_ms"], 1e-6)
+    st.caption(f"{trace['name']} · {trace['duration_ms']:.0f} ms · {len(trace['spans'])} spans")
+    rows = []
+    for s in trace["spans"]:
+        left = 100 * s["start_ms"] / total
+        width = max(100 * s["duration_ms"] / total, 0.5)
+        details = " ".join(f"{k}={v}" for k, v in s["attrs"].items() if k != "path")
+        rows.append(f"""
+        <div style="display: flex; align-items: center; gap: 8px; font-size: 0.75em; margin-bottom: 2px;">
+            <span style="width: 38%; padding-left: {s['depth'] * 10}px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;" title="{details}">{s['name']}</span>
+            <div style="flex: 1; position: relative; background-color: #222438; height: 8px; border-radius: 4px;">
+                <div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; background-color: #00b04a; height: 100%; border-radius: 4px;"></div>
+            </div>
+            <span style="width: 17%; text-align: right;">{s['duration_ms']:.1f} ms</span>
+        </div>""")
+    if rows:
+        st.markdown("".join(rows), unsafe_allow_html=True)
 
 # ---------------------------------------------------------
 # Sidebar Setup: Pick the team and see their matches
@@ -65,26 +82,18 @@ def get_flag_emoji(country_name):
 st.sidebar.header("Configuration")
 
 try:
-    with st.spinner("Loading competition data..."):
-        comp_id, season_id = get_laliga_1819_info()
-    
     with st.spinner("Loading matches..."):
-        df_matches = load_matches(comp_id, season_id)
+        # Flattened once per season (json_normalize) and cached
+        df_matches = load_match_frame()
     
     if df_matches.empty:
         st.error("Failed to load matches.")
+        stop_rerun_profile()
         st.stop()
 
-    # Quick helper to safely grab the names out of the nested dict
-    def extract_home_team(row): return row.get("home_team", {}).get("home_team_name", "Unknown")
-    def extract_away_team(row): return row.get("away_team", {}).get("away_team_name", "Unknown")
-    
-    df_matches["home_team_name"] = df_matches.apply(extract_home_team, axis=1)
-    df_matches["away_team_name"] = df_matches.apply(extract_away_team, axis=1)
-
     # Let the user pick a team from the dropdown. We default to Barcelona since 
     # the free StatsBomb La Liga dataset revolves around Messi's matches.
-    all_teams = sorted(list(set(df_matches["home_team_name"].tolist() + df_matches["away_team_name"].tolist())))
+    all_teams = sorted(set(df_matches["home_team_name"]) | set(df_matches["away_team_name"]))
     
     try:
         default_idx = all_teams.index("Barcelona")
@@ -93,18 +102,27 @@ try:
         
     selected_team = st.sidebar.selectbox("Select Team", all_teams, index=default_idx)
 
-    # Filter down to just the matches involving the team they picked
-    team_matches = df_matches[
-        (df_matches["home_team_name"] == selected_team) | 
-        (df_matches["away_team_name"] == selected_team)
-    ].copy()
+    # Browser-rendered charts ship a few KB of Vega-Lite JSON instead of a
+    # server-side raster, and add hover tooltips and zoom
+    interactive_charts = st.sidebar.toggle(
+        "Interactive charts", value=False,
+        help="Render the insight charts in the browser (Vega-Lite) instead of as images.",
+    )
+
+    # The analyst queries the match data through tools instead of receiving
+    # every stat up front — the prompt stays small as metrics are added
+    tool_calling = st.sidebar.toggle(
+        "Tool-calling analyst", value=False,
+        help="Let the model fetch window, player, shot and possession-chain data on demand.",
+    )
 
-    # Show the newest matches at the top of the list
-    if "match_date" in team_matches.columns:
-        team_matches = team_matches.sort_values(by="match_date", ascending=False)
+    # Just the matches involving the team they picked, newest first, with the
+    # W/L/D badge precomputed (cached per team)
+    team_matches = load_match_frame(selected_team)
 
 except Exception as e:
     st.sidebar.error(f"Error loading initial data: {e}")
+    stop_rerun_profile()
     st.stop()
 
 
@@ -114,10 +132,14 @@ if "selected_match_id" not in st.session_state:
 if "selected_team" not in st.session_state:
     st.session_state["selected_team"] = selected_team
 
-# Reset match selection if team changes
+if "match_page" not in st.session_state:
+    st.session_state["match_page"] = 0
+
+# Reset match selection (and list page) if team changes
 if st.session_state["selected_team"] != selected_team:
     st.session_state["selected_match_id"] = None
     st.session_state["selected_team"] = selected_team
+    st.session_state["match_page"] = 0
 
 def select_match(match_id):
     st.session_state["selected_match_id"] = match_id
@@ -125,52 +147,53 @@ def select_match(match_id):
 def go_back():
     st.session_state["selected_match_id"] = None
 
+# Navigation runs in button callbacks, before the next rerun, rather than
+# through st.rerun() — which would end this run before the profiler stops
+def set_match_page(page):
+    st.session_state["match_page"] = page
+
 # --- Main Area Display Logic ---
 if st.session_state["selected_match_id"] is None:
     # State 1: Show Vertical List of Matches for the Selected Team
     st.header(f"Matches for {selected_team}")
     st.markdown("Select a match to view tactical breakdown and advanced stats.")
     
-    for i, match in team_matches.iterrows():
-        home = match.get("home_team_name", "Unknown")
-        away = match.get("away_team_name", "Unknown")
-        h_score = match.get("home_score", "-")
-        a_score = match.get("away_score", "-")
-        date = match.get("match_date", "Unknown Date")
-        m_id = match["match_id"]
-        
-        # Determine W/L/D for the selected team
-        result_char = "D"
-        result_color = "#6c757d" # grey
-        
-        if h_score != "-" and a_score != "-":
-            h_s = int(h_score)
-            a_s = int(a_score)
-            if home == selected_team:
-                if h_s > a_s:
-                    result_char, result_color = "W", "#1ea64b" # green
-                elif h_s < a_s:
-                    result_char, result_color = "L", "#e62e2e" # red
-            else:
-                if a_s > h_s:
-                    result_char, result_color = "W", "#1ea64b"
-                elif a_s < h_s:
-                    result_char, result_color = "L", "#e62e2e"
-                    
-        badge_html = f'<span style="background-color: {result_color}; color: white; padding: 4px 10px; border-radius: 4px; font-weight: bold; margin-right: 12px; font-size: 0.9em;">{result_char}</span>'
+    # Only the visible page is built on each rerun, so the widget count stays
+    # flat however many matches the competition has
+    MATCHES_PER_PAGE = 10
+    n_pages = max(1, -(-len(team_matches) // MATCHES_PER_PAGE))
+    page = min(st.session_state["match_page"], n_pages - 1)
+    page_matches = team_matches.iloc[page * MATCHES_PER_PAGE:(page + 1) * MATCHES_PER_PAGE]
+
+    for match in page_matches.itertuples(index=False):
+        badge_html = f'<span style="background-color: {match.result_colour}; color: white; padding: 4px 10px; border-radius: 4px; font-weight: bold; margin-right: 12px; font-size: 0.9em;">{match.result}</span>'
         
         with st.container(border=True):
             col1, col2, col3 = st.columns([2, 5, 2], vertical_alignment="center")
             
             with col1:
-                st.markdown(f"**{date}**")
+                st.markdown(f"**{match.match_date}**")
             with col2:
                 # Safely render HTML explicitly
-                st.markdown(f"{badge_html} <span style='font-size: 1.2Mrem; font-weight: 600;'>{home} {h_score} - {a_score} {away}</span>", unsafe_allow_html=True)
+                st.markdown(f"{badge_html} <span style='font-size: 1.2Mrem; font-weight: 600;'>{match.scoreline}</span>", unsafe_allow_html=True)
             with col3:
-                if st.button("View Details", key=f"btn_{m_id}", use_container_width=True):
-                    select_match(m_id)
-                    st.rerun()
+                st.button("View Details", key=f"btn_{match.match_id}", use_container_width=True,
+                          on_click=select_match, args=(match.match_id,))
+
+    # Warm the top of the visible page in the background — the likeliest clicks
+    from prefetch import prefetch_candidates
+    analytics.prefetch([m[0] for m in prefetch_candidates(page_matches)], render_charts=not interactive_charts)
+
+    if n_pages > 1:
+        nav_prev, nav_label, nav_next = st.columns([2, 5, 2], vertical_alignment="center")
+        with nav_prev:
+            st.button("← Newer", disabled=page == 0, use_container_width=True,
+                      on_click=set_match_page, args=(page - 1,))
+        with nav_label:
+            st.markdown(f"<p style='text-align: center; color: #888; margin: 0;'>Page {page + 1} of {n_pages}</p>", unsafe_allow_html=True)
+        with nav_next:
+            st.button("Older →", disabled=page >= n_pages - 1, use_container_width=True,
+                      on_click=set_match_page, args=(page + 1,))
 
 else:
     # State 2: Deep dive into a single match
@@ -192,7 +215,7 @@ else:
     """, unsafe_allow_html=True)
 
     selected_match_row = df_matches[df_matches["match_id"] == st.session_state["selected_match_id"]].iloc[0]
-    match_id = selected_match_row["match_id"]
+    match_id = int(selected_match_row["match_id"])
     
     st.header("Match Overview")
 
@@ -228,14 +251,17 @@ else:
     st.subheader("Match Events Data")
     # Grab all the raw event actions and starting lineups for this specific game
     with st.spinner(f"Loading event data and lineups for match {match_id}..."):
-        events_data = load_events(match_id)
-        from data_processing import load_lineups, plot_average_positions
-        lineups = load_lineups(match_id)
-
-    if not events_data:
+        # Stats, tactical metrics, xT, 360 shape and similar matches in one
+        # call; opening the match also starts its chart renders, the
+        # neighbouring fixtures' prefetch and its example answers
+        with tracing.span("match.page", match_id=match_id):
+            match_page = analytics.match(match_id, team=selected_team, render_charts=not interactive_charts)
+        lineups = match_page["lineups"]
+
+    if not match_page["events"]:
         st.warning("No event data found for this match.")
     else:
-        st.success(f"Successfully loaded {len(events_data)} events!")
+        st.success(f"Successfully loaded {match_page['events']} events!")
         
         # Build a quick dictionary mapping player names to their country flag emojis
         player_flags = {}
@@ -243,11 +269,17 @@ else:
             for team in lineups:
                 for p in team.get("lineup", []):
                     c_name = p.get("country", {}).get("name", "")
-                    player_flags[p.get("player_name")] = get_flag_emoji(c_name)
+                    player_flags[p.get("player_name")] = flag_emoji(c_name)
         
-        with st.spinner("Computing match statistics..."):
-            from data_processing import compute_match_stats
-            match_stats = compute_match_stats(events_data, home_team, away_team)
+        # Shared with every other session — treat as read-only
+        match_stats = match_page["match_stats"]
+        tactical = match_page["tactical"]
+
+        if rerun_profile is not None and service_client is None:
+            # The caches and render workers would hide the hot paths from the
+            # profiler — run stats and chart data extraction once, inline
+            rerun_profile.label = f"match-{match_id}"
+            analytics.profile_match(match_id)
             
         st.subheader("Team Comparison")
         
@@ -296,6 +328,23 @@ else:
         render_stat_comparison("Passes", match_stats[home_team]["passes"], match_stats[away_team]["passes"], "#00b04a", "#5263ff")
         render_stat_comparison("Pressures", match_stats[home_team]["pressures"], match_stats[away_team]["pressures"], "#00b04a", "#5263ff")
         render_stat_comparison("Tackles", match_stats[home_team]["tackles"], match_stats[away_team]["tackles"], "#00b04a", "#5263ff")
+
+        # Pressing and territory, on the scales the knowledge base uses
+        for label, key in (("PPDA (lower = more aggressive press)", "ppda"),
+                           ("Field Tilt %", "field_tilt_pct"),
+                           ("Defensive Action Height", "defensive_action_height"),
+                           ("High Turnovers", "high_turnovers"),
+                           ("Pressure Regains", "pressure_regains")):
+            home_value, away_value = tactical["teams"][home_team][key], tactical["teams"][away_team][key]
+            if home_value is not None and away_value is not None:
+                render_stat_comparison(label, home_value, away_value, "#00b04a", "#5263ff")
+
+        # StatsBomb 360 matches also get the out-of-possession shape from the freeze frames
+        defensive_shape = match_page["defensive_shape"]
+        if defensive_shape is not None:
+            if defensive_shape[home_team]["frames"] and defensive_shape[away_team]["frames"]:
+                render_stat_comparison("Defensive Line Height (360)", defensive_shape[home_team]["line_height"], defensive_shape[away_team]["line_height"], "#00b04a", "#5263ff")
+                render_stat_comparison("Compactness (360, lower = tighter)", defensive_shape[home_team]["compactness"], defensive_shape[away_team]["compactness"], "#00b04a", "#5263ff")
         
         st.subheader("Top Involved Players")
         col_p1, col_p2 = st.columns(2)
@@ -310,11 +359,37 @@ else:
                 flag = player_flags.get(player, "🏳️")
                 st.markdown(f"- {flag} {player}")
 
+        # Nearest neighbours over the season's match feature vectors — needs
+        # the season archive, so the panel is left out until one is built
+        similar = match_page["similar"]
+        perspective = match_page["perspective"]
+        if similar:
+            st.subheader("Similar Matches")
+            st.caption(f"The season's games most like {perspective}'s here, by goals, xG, shots, passes, "
+                       "pressing and momentum")
+            for sim in similar:
+                sim_row = sim["fixture"]
+                sim_stats = sim["stats"]
+                with st.container(border=True):
+                    col1, col2, col3 = st.columns([2, 5, 2], vertical_alignment="center")
+                    with col1:
+                        st.markdown(f"**{sim_row['match_date']}**")
+                    with col2:
+                        st.markdown(f"{sim_row['home_team_name']} {sim_row['home_score']} - "
+                                    f"{sim_row['away_score']} {sim_row['away_team_name']}")
+                        st.caption(f"{sim['team']}: xG {sim_stats['xg']:.2f} – {sim_stats['xg_against']:.2f}, "
+                                   f"shots {sim_stats['shots']:.0f} – {sim_stats['shots_against']:.0f}, "
+                                   f"PPDA {sim_stats['ppda'] if sim_stats['ppda'] is not None else '–'}")
+                    with col3:
+                        st.button("View", key=f"similar_{sim['match_id']}", on_click=select_match,
+                                  args=(sim["match_id"],), use_container_width=True)
+
         st.divider()
         st.subheader("Average Player Positions")
         
         with st.spinner("Generating pitch maps and lineups..."):
             if lineups:
+                import pandas as pd
                 home_lineup_df, away_lineup_df = None, None
                 
                 # Parse through the nested JSON to pull out the starting 11 for both teams
@@ -343,18 +418,18 @@ else:
                         
                 st.markdown("---")
                 
-                # Plot the touch maps using mplsoccer
-                from visualizations import COLOURS
-                fig_home = plot_average_positions(events_data, lineups, home_team, color=COLOURS["home"])
-                fig_away = plot_average_positions(events_data, lineups, away_team, color=COLOURS["away"])
+                # Touch maps are pre-rendered in the background and cached as
+                # images, so reruns don't redraw both pitches
+                img_home = analytics.chart(match_id, "avg_positions_home")
+                img_away = analytics.chart(match_id, "avg_positions_away")
                 
                 pitch_col1, pitch_col2 = st.columns(2)
                 with pitch_col1:
-                    if fig_home:
-                        st.pyplot(fig_home, use_container_width=True)
+                    if img_home:
+                        st.image(img_home, use_container_width=True)
                 with pitch_col2:
-                    if fig_away:
-                        st.pyplot(fig_away, use_container_width=True)
+                    if img_away:
+                        st.image(img_away, use_container_width=True)
             else:
                 st.info("Lineup data unavailable for position maps.")
 
@@ -363,31 +438,27 @@ else:
     # ------------------------------------------------------------------
     # AI INSIGHTS — setup shared state and imports before tabs
     # ------------------------------------------------------------------
-    import json
-    match_stats_json = json.dumps(match_stats, indent=2)
+    from contextlib import nullcontext
 
     # Per-match chat history — resets automatically when switching matches
     chat_key = f"chat_history_{match_id}"
     if chat_key not in st.session_state:
         st.session_state[chat_key] = []
 
-    from llm import classify_question_scope, classify_question_intent, answer_match_question, VISUAL_MAP
-    from visualizations import plot_shot_map, plot_xg_timeline, plot_event_timeline, plot_player_involvement
-    from retriever import retrieve
+    # The conversation as the analytics tier returned it with the last answer.
+    # It keeps follow-ups in context; the service bounds and summarises it
+    memory_key = f"chat_memory_{match_id}"
 
     def _render_intent_chart(visual_type: str):
         """Renders the chart that corresponds to a classified intent."""
-        if visual_type == "xg_chart":
-            fig = plot_xg_timeline(events_data, home_team, away_team, match_stats)
-        elif visual_type == "shot_map":
-            fig = plot_shot_map(events_data, home_team, away_team)
-        elif visual_type == "event_timeline":
-            fig = plot_event_timeline(match_stats, home_team, away_team)
-        elif visual_type == "player_chart":
-            fig = plot_player_involvement(events_data, home_team, away_team)
-        else:
+        if interactive_charts:
+            spec = analytics.chart(match_id, visual_type, "vega-lite")
+            if spec is not None:
+                st.vega_lite_chart(spec, use_container_width=True, theme=None)
             return
-        st.pyplot(fig, use_container_width=True)
+        image = analytics.chart(match_id, visual_type)
+        if image is not None:
+            st.image(image, use_container_width=True)
 
     # Chat input lives OUTSIDE the tabs so Streamlit pins it to the
     # viewport bottom rather than rendering it inline within the tab.
@@ -417,27 +488,24 @@ else:
 - Anything unrelated to this specific match
             """)
 
-        st.markdown(
-            "**Example questions:** Was the result fair based on xG? &nbsp;·&nbsp; "
-            "Which team dominated tactically? &nbsp;·&nbsp; "
-            "Why did the winning team win? &nbsp;·&nbsp; "
-            "Which substitution changed the match?"
-        )
+        from answer_cache import EXAMPLE_QUESTIONS
+        st.markdown("**Example questions:** " + " &nbsp;·&nbsp; ".join(EXAMPLE_QUESTIONS))
 
         st.caption("Use the chat bar at the bottom of the page to ask your question.")
 
         # Render existing conversation (with chart replay)
         for msg in st.session_state[chat_key]:
             with st.chat_message(msg["role"]):
-                if msg["role"] == "assistant":
-                    visual_type = VISUAL_MAP.get(msg.get("intent") or "")
-                    if visual_type:
-                        _render_intent_chart(visual_type)
+                if msg["role"] == "assistant" and msg.get("visual"):
+                    _render_intent_chart(msg["visual"])
                 st.markdown(msg["content"])
                 if msg["role"] == "assistant" and msg.get("sources"):
                     with st.expander("📚 Tactical concepts used in this answer"):
                         for doc in msg["sources"]:
                             st.markdown(f"> {doc[:300]}…")
+                if msg.get("trace"):
+                    with st.expander("⏱ Timing"):
+                        render_trace_waterfall(msg["trace"])
 
         # Process a new question submitted via the sticky bottom input
         if question:
@@ -446,44 +514,50 @@ else:
             st.session_state[chat_key].append({"role": "user", "content": question})
 
             with st.chat_message("assistant"):
-                in_scope, refusal = classify_question_scope(question)
-
-                if not in_scope:
-                    answer = refusal
-                    retrieved_docs = []
-                    intent = None
-                    st.markdown(answer)
-                else:
-                    intent = classify_question_intent(question)
-                    visual_type = VISUAL_MAP.get(intent)
+                question_profile = (profiling.ProfileSession(f"question-{match_id}")
+                                    if profile_mode == "question" else nullcontext())
+                with question_profile, tracing.trace("question", match_id=int(match_id)) as question_trace:
+                    # Scope check, intent, retrieval and answer in one call. Example
+                    # questions are usually answered already (answer_cache)
+                    with st.spinner("Retrieving tactical context and generating answer..."):
+                        response = analytics.ask(match_id, question, history=st.session_state.get(memory_key),
+                                                 tool_calling=tool_calling)
+                    answer = response["answer"]
+                    retrieved_docs = response["retrieved_docs"]
+                    st.session_state[memory_key] = response["history"]
 
                     # Chart first — contextualises the text answer below it
-                    if visual_type:
+                    if response["visual"]:
                         with st.spinner("Generating visualisation..."):
-                            _render_intent_chart(visual_type)
-
-                    with st.spinner("Retrieving tactical context and generating answer..."):
-                        retrieved_docs = retrieve(question, top_k=2)
-                        answer = answer_match_question(
-                            question=question,
-                            match_stats_json=match_stats_json,
-                            retrieved_docs=retrieved_docs,
-                            home_team=home_team,
-                            away_team=away_team,
-                            home_score=home_score,
-                            away_score=away_score,
-                        )
+                            _render_intent_chart(response["visual"])
                     st.markdown(answer)
+                    if response["cached"]:
+                        st.caption("⚡ Precomputed answer")
                     if retrieved_docs:
                         with st.expander("📚 Tactical concepts used in this answer"):
                             for doc in retrieved_docs:
                                 st.markdown(f"> {doc[:300]}…")
+                    if response["moments"]:
+                        with st.expander("🎞 Match moments used in this answer"):
+                            for moment in response["moments"]:
+                                st.markdown(f"- {moment['text']}")
+                    if response["tool_calls"]:
+                        with st.expander("🔧 Data fetched by the analyst"):
+                            for tool_name, tool_args, result_chars in response["tool_calls"]:
+                                args_text = ", ".join(f"{k}={v!r}" for k, v in tool_args.items())
+                                st.markdown(f"- `{tool_name}({args_text})` → {result_chars} chars")
+                with st.expander("⏱ Timing"):
+                    render_trace_waterfall(question_trace.to_dict())
+                if profile_mode == "question":
+                    profiling.clear_request(st.query_params)
+                    st.caption(question_profile.summary())
 
             st.session_state[chat_key].append({
                 "role": "assistant",
                 "content": answer,
                 "sources": retrieved_docs,
-                "intent": intent,
+                "visual": response["visual"],
+                "trace": question_trace.to_dict(),
             })
 
     # ------------------------------------------------------------------
@@ -492,8 +566,6 @@ else:
     with tab2:
         st.markdown("Select a chart to generate. Each is computed directly from the match event data.")
 
-        from visualizations import plot_shot_map, plot_xg_timeline, plot_event_timeline
-
         # --- Shot Map ---
         st.markdown("#### Shot Map")
         st.markdown(
@@ -503,7 +575,7 @@ else:
             st.session_state[f"viz_{match_id}_shot"] = True
         if st.session_state.get(f"viz_{match_id}_shot"):
             with st.spinner("Rendering..."):
-                st.pyplot(plot_shot_map(events_data, home_team, away_team), use_container_width=True)
+                _render_intent_chart("shot_map")
 
         st.markdown("---")
 
@@ -516,7 +588,7 @@ else:
             st.session_state[f"viz_{match_id}_xg"] = True
         if st.session_state.get(f"viz_{match_id}_xg"):
             with st.spinner("Rendering..."):
-                st.pyplot(plot_xg_timeline(events_data, home_team, away_team, match_stats), use_container_width=True)
+                _render_intent_chart("xg_chart")
 
         st.markdown("---")
 
@@ -529,4 +601,14 @@ else:
             st.session_state[f"viz_{match_id}_events"] = True
         if st.session_state.get(f"viz_{match_id}_events"):
             with st.spinner("Rendering..."):
-                st.pyplot(plot_event_timeline(match_stats, home_team, away_team), use_container_width=True)
+                _render_intent_chart("event_timeline")
+
+# ---------------------------------------------------------
+# Performance panel — where this rerun spent its time
+# ---------------------------------------------------------
+stop_rerun_profile()
+tracing.finish(page_trace)
+with st.sidebar.expander("⏱ Performance", expanded=False):
+    render_trace_waterfall(page_trace.to_dict())
+    st.download_button("Prometheus metrics", tracing.prometheus_text(),
+                       file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,196 @@
+"""
+run.py
+------
+Scaling benchmarks for the event-processing code, on synthetic events.
+
+Times and measures memory for compute_match_stats, the average-positions data
+prep, the data extraction behind every visualizations.py chart, columnar event
+encoding, the tactical metrics, momentum and the moment index, from 1k up to
+1M events. No network access is needed — events come from
+benchmarks/synthetic_events.py with a fixed seed.
+
+    python -m benchmarks.run                         # 1k, 10k, 100k, 1M events
+    python -m benchmarks.run --sizes 1000 10000      # a quicker subset
+    python -m benchmarks.run --compare OLD.json NEW.json
+
+Each run writes one JSON document (to benchmarks/results/ unless --output is
+given) with the commit, interpreter and library versions and, per benchmark
+and size: best / median wall time over several repeats, events per second and
+the peak traced allocation. --compare prints the per-benchmark time and memory
+ratios between two such files, so regressions can be tracked across commits.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+from benchmarks.synthetic_events import HOME_TEAM, AWAY_TEAM, generate_match  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# Roughly constant total time per benchmark: more repeats for small inputs
+TARGET_SECONDS_PER_BENCHMARK = 2.0
+MAX_REPEATS = 20
+
+
+def _benchmarks(events: list, lineups: list) -> dict:
+    """{name: zero-arg callable} for every code path under test."""
+    from chart_data import event_timeline_data, player_involvement_data, shot_map_data, xg_timeline_data
+    from data_processing import average_positions_data, compute_match_stats
+    from moments import MomentIndex, match_moments
+    from momentum import match_momentum
+    from season_archive import encode_match
+    from tactical_metrics import tactical_metrics
+
+    match_stats = compute_match_stats(events, HOME_TEAM, AWAY_TEAM)
+    columns = encode_match(events)
+    return {
+        "compute_match_stats":     lambda: compute_match_stats(events, HOME_TEAM, AWAY_TEAM),
+        "average_positions_data":  lambda: average_positions_data(events, lineups, HOME_TEAM),
+        "shot_map_data":           lambda: shot_map_data(events, HOME_TEAM, AWAY_TEAM),
+        "xg_timeline_data":        lambda: xg_timeline_data(events, HOME_TEAM, AWAY_TEAM, match_stats),
+        "event_timeline_data":     lambda: event_timeline_data(match_stats, HOME_TEAM, AWAY_TEAM),
+        "player_involvement_data": lambda: player_involvement_data(events, HOME_TEAM, AWAY_TEAM),
+        "encode_match":            lambda: encode_match(events),
+        "tactical_metrics":        lambda: tactical_metrics(columns, HOME_TEAM, AWAY_TEAM),
+        "match_momentum":          lambda: match_momentum(columns, HOME_TEAM, AWAY_TEAM),
+        "moment_index":            lambda: MomentIndex(match_moments(columns)),
+    }
+
+
+def _time(fn) -> list[float]:
+    """Wall times of repeated calls: one warm-up call, then enough to fill the time budget."""
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    repeats = max(1, min(MAX_REPEATS, int(TARGET_SECONDS_PER_BENCHMARK / max(first, 1e-6))))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _peak_memory(fn) -> int:
+    """Peak bytes allocated during one call (tracemalloc slows code down, so timed separately)."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metadata(seed: int) -> dict:
+    import numpy
+    import pandas
+    return {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "seed": seed,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, seed: int = 0, only: list[str] | None = None, log=print) -> dict:
+    """Runs every benchmark at every size and returns the results document."""
+    results = []
+    for n_events in sizes:
+        start = time.perf_counter()
+        events, lineups = generate_match(n_events, seed=seed)
+        log(f"{n_events:>9,} events (generated in {time.perf_counter() - start:.1f}s)")
+
+        for name, fn in _benchmarks(events, lineups).items():
+            if only and name not in only:
+                continue
+            times = _time(fn)
+            best = min(times)
+            row = {
+                "benchmark": name,
+                "n_events": n_events,
+                "repeats": len(times),
+                "best_s": best,
+                "median_s": statistics.median(times),
+                "events_per_s": n_events / best if best > 0 else None,
+                "peak_bytes": _peak_memory(fn),
+            }
+            results.append(row)
+            log(f"  {name:<25} {best * 1000:10.2f} ms  {row['peak_bytes'] / 1024 / 1024:8.2f} MiB peak")
+        del events, lineups
+    return {"meta": _metadata(seed), "results": results}
+
+
+def compare(old_path: Path, new_path: Path, log=print) -> list[dict]:
+    """Per-benchmark ratios new/old for best time and peak memory (>1 means slower / bigger)."""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    baseline = {(r["benchmark"], r["n_events"]): r for r in old["results"]}
+    log(f"{old['meta'].get('commit')} → {new['meta'].get('commit')}")
+    rows = []
+    for r in new["results"]:
+        base = baseline.get((r["benchmark"], r["n_events"]))
+        if base is None:
+            continue
+        row = {
+            "benchmark": r["benchmark"],
+            "n_events": r["n_events"],
+            "time_ratio": r["best_s"] / base["best_s"] if base["best_s"] else None,
+            "memory_ratio": r["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else None,
+        }
+        rows.append(row)
+        shown = {k: "n/a" if row[k] is None else f"×{row[k]:.2f}" for k in ("time_ratio", "memory_ratio")}
+        log(f"  {row['benchmark']:<25} {row['n_events']:>9,}  "
+            f"time {shown['time_ratio']}  memory {shown['memory_ratio']}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks on synthetic StatsBomb events.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"),
+                        help="compare two results files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    doc = run(args.sizes, seed=args.seed, only=args.only)
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{doc['meta']['commit'] or 'nocommit'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.write_text(json.dumps(doc, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+synthetic_events.py
+-------------------
+Deterministic StatsBomb-schema event generator for offline benchmarks.
+
+Real La Liga matches have ~3–4k events; generate_events(n) produces any number
+of events (1k … 1M+) with the fields and type mix the app's parsers read:
+type / team / player / possession / location, shot xG and outcome, pass and
+carry end locations, duel types and substitutions. Event-type frequencies and
+shot locations follow a typical StatsBomb match, and the match clock is spread
+over 95 minutes however many events are generated, so per-minute code paths
+see realistic densities.
+
+    from benchmarks.synthetic_events import generate_match
+    events, lineups = generate_match(100_000, seed=0)
+"""
+
+import numpy as np
+
+HOME_TEAM = "Synthetic Home"
+AWAY_TEAM = "Synthetic Away"
+
+# (StatsBomb type id, name, relative frequency per match, on-ball?)
+EVENT_TYPES = [
+    (30, "Pass",            1000, True),
+    (42, "Ball Receipt*",    950, True),
+    (43, "Carry",            800, True),
+    (17, "Pressure",         250, False),
+    (2,  "Ball Recovery",    100, False),
+    (4,  "Duel",              50, False),
+    (9,  "Clearance",         40, False),
+    (6,  "Block",             30, False),
+    (14, "Dribble",           30, True),
+    (38, "Miscontrol",        30, True),
+    (16, "Shot",              26, True),
+    (10, "Interception",      25, False),
+    (22, "Foul Committed",    25, False),
+    (3,  "Dispossessed",      20, True),
+    (19, "Substitution",       6, True),
+]
+
+SHOT_OUTCOMES = ["Goal", "Saved", "Off T", "Blocked", "Post", "Wayward"]
+SHOT_OUTCOME_P = [0.11, 0.27, 0.30, 0.25, 0.02, 0.05]
+DUEL_TYPES = ["Tackle", "Aerial Lost"]
+
+_FIRST = ["Alex", "Bruno", "Carlos", "Dani", "Eric", "Fede", "Gerard", "Hugo",
+          "Iker", "Jordi", "Koke", "Luis", "Marc", "Nico", "Oscar", "Pablo"]
+_LAST = ["Alba", "Busquets", "Costa", "Diaz", "Espinosa", "Fernandez", "Garcia", "Herrera",
+         "Iglesias", "Jimenez", "Lopez", "Martinez", "Navarro", "Ortega", "Perez", "Ruiz"]
+
+PLAYERS_PER_TEAM = 16   # 11 starters + 5 substitutes
+
+
+def _squad(team: str, offset: int) -> list[str]:
+    return [f"{_FIRST[(i + offset) % 16]} {_LAST[(i * 3 + offset) % 16]} {team.split()[-1][0]}"
+            for i in range(PLAYERS_PER_TEAM)]
+
+
+def generate_lineups(home_team: str = HOME_TEAM, away_team: str = AWAY_TEAM) -> list[dict]:
+    """StatsBomb lineups JSON for the two synthetic squads (starters have jersey numbers 1–11)."""
+    return [
+        {
+            "team_id": team_id,
+            "team_name": team,
+            "lineup": [
+                {"player_id": team_id * 100 + i, "player_name": name, "jersey_number": i + 1,
+                 "country": {"id": 214, "name": "Spain"}}
+                for i, name in enumerate(_squad(team, offset))
+            ],
+        }
+        for team_id, team, offset in ((1, home_team, 0), (2, away_team, 5))
+    ]
+
+
+def generate_events(n_events: int, home_team: str = HOME_TEAM, away_team: str = AWAY_TEAM,
+                    seed: int = 0) -> list[dict]:
+    """n_events StatsBomb-schema event dicts, deterministic for a given seed."""
+    rng = np.random.default_rng(seed)
+    teams = [home_team, away_team]
+    squads = [_squad(home_team, 0), _squad(away_team, 5)]
+
+    weights = np.array([t[2] for t in EVENT_TYPES], dtype=float)
+    type_idx = rng.choice(len(EVENT_TYPES), size=n_events, p=weights / weights.sum())
+
+    # Possessions last ~8 events; the home side has the ball a little more often
+    possession = np.cumsum(rng.random(n_events) < 1 / 8) + 1
+    possession_side = (rng.random(possession[-1] + 1) < 0.45).astype(int)[possession]
+    on_ball = np.array([t[3] for t in EVENT_TYPES])[type_idx]
+    side = np.where(on_ball, possession_side, 1 - possession_side)
+
+    # Starters take most touches; substitutes appear later in the match
+    player_idx = np.where(rng.random(n_events) < 0.9,
+                          rng.integers(0, 11, n_events), rng.integers(11, PLAYERS_PER_TEAM, n_events))
+
+    # Spread the 95-minute clock evenly over however many events there are
+    clock = np.arange(n_events) * (95 * 60 / max(n_events, 1))
+    minute = (clock // 60).astype(int)
+    second = (clock % 60).astype(int)
+
+    x = rng.uniform(0, 120, n_events)
+    y = rng.uniform(0, 80, n_events)
+    end_x = np.clip(x + rng.normal(8, 15, n_events), 0, 120)
+    end_y = np.clip(y + rng.normal(0, 12, n_events), 0, 80)
+    # Shots come from the final third, mostly central
+    shot_x = 120 - rng.exponential(12, n_events).clip(1, 40)
+    shot_y = np.clip(rng.normal(40, 9, n_events), 0, 80)
+    xg = np.clip(rng.gamma(1.2, 0.08, n_events), 0.01, 0.95)
+    shot_outcome = rng.choice(len(SHOT_OUTCOMES), size=n_events, p=SHOT_OUTCOME_P)
+    duel_type = rng.integers(0, len(DUEL_TYPES), n_events)
+    sub_in = rng.integers(11, PLAYERS_PER_TEAM, n_events)
+
+    events = []
+    for i in range(n_events):
+        type_id, type_name, _, _ = EVENT_TYPES[type_idx[i]]
+        s = side[i]
+        team = teams[s]
+        player = squads[s][player_idx[i]]
+        m, sec = int(minute[i]), int(second[i])
+        ev = {
+            "id": f"{seed:04x}-{i:08x}",
+            "index": i + 1,
+            "period": 1 if m < 45 else 2,
+            "timestamp": f"00:{m if m < 45 else m - 45:02d}:{sec:02d}.000",
+            "minute": m,
+            "second": sec,
+            "type": {"id": type_id, "name": type_name},
+            "possession": int(possession[i]),
+            "possession_team": {"id": int(possession_side[i]) + 1, "name": teams[possession_side[i]]},
+            "team": {"id": s + 1, "name": team},
+            "player": {"id": (s + 1) * 100 + int(player_idx[i]), "name": player},
+        }
+        if type_name == "Shot":
+            ev["location"] = [round(float(shot_x[i]), 1), round(float(shot_y[i]), 1)]
+            ev["shot"] = {
+                "statsbomb_xg": round(float(xg[i]), 4),
+                "end_location": [120.0, 40.0],
+                "outcome": {"name": SHOT_OUTCOMES[shot_outcome[i]]},
+                "body_part": {"name": "Right Foot"},
+            }
+        elif type_name == "Substitution":
+            ev["substitution"] = {"replacement": {"name": squads[s][sub_in[i]]},
+                                  "outcome": {"name": "Tactical"}}
+        else:
+            ev["location"] = [round(float(x[i]), 1), round(float(y[i]), 1)]
+            if type_name in ("Pass", "Carry"):
+                ev[type_name.lower()] = {"end_location": [round(float(end_x[i]), 1), round(float(end_y[i]), 1)]}
+            elif type_name == "Duel":
+                ev["duel"] = {"type": {"name": DUEL_TYPES[duel_type[i]]}}
+        events.append(ev)
+    return events
+
+
+def generate_match(n_events: int, seed: int = 0,
+                   home_team: str = HOME_TEAM, away_team: str = AWAY_TEAM) -> tuple[list, list]:
+    """(events, lineups) for one synthetic fixture."""
+    return generate_events(n_events, home_team, away_team, seed), generate_lineups(home_team, away_team)
@@ -0,0 +1,153 @@
+"""
+chart_cache.py
+--------------
+Process-wide cache of rendered chart images.
+
+Every Streamlit rerun replays the chat history and re-runs any chart whose
+viz_{match_id}_{chart} flag is set. Without a cache each of those is a full
+matplotlib / mplsoccer redraw, and the figures are never closed. Here a chart
+is rendered once, rasterised to PNG (or SVG) bytes, its figure is closed, and
+later reruns just blit the stored bytes.
+
+Entries are keyed by (match_id, chart, CHART_SCHEMA_VERSION, theme, grounding)
+and evicted least-recently-used once the total stored bytes exceed the budget.
+The grounding (chart_grounding()) records which optional data the chart was
+drawn with, so an image drawn before the season archive existed is redrawn
+with xT once it does.
+"""
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+# Bump whenever a chart function's output changes, so stale images are not served
+CHART_SCHEMA_VERSION = 4
+
+# ~64 MB of encoded images — a PNG chart at dpi 130 is typically 60–150 KB
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# pyplot keeps a global figure registry that is not thread-safe. Anything that
+# draws a figure in the server process (render_cached, or render_service.py
+# when its process pool is unusable) holds this.
+PYPLOT_LOCK = threading.RLock()
+
+
+def current_theme() -> str:
+    """
+    Short fingerprint of the shared COLOURS palette and figure dpi. Any palette
+    edit produces a new key, so cached images never outlive the theme.
+    """
+    import matplotlib.pyplot as plt
+    from chart_data import COLOURS
+
+    payload = json.dumps([COLOURS, plt.rcParams["figure.dpi"]], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:10]
+
+
+def figure_to_bytes(fig, fmt: str = "png") -> bytes:
+    """
+    Rasterises a matplotlib figure and closes it so pyplot releases the memory.
+    Uses the same tight bounding box st.pyplot applies.
+    """
+    import matplotlib.pyplot as plt
+
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=fmt, bbox_inches="tight", facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
+
+
+class ChartCache:
+    """Thread-safe, byte-budgeted LRU of rendered chart images."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: tuple):
+        """Returns the stored bytes (marking them recently used), or None."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: tuple, data: bytes):
+        """Stores bytes under key, evicting the oldest entries to stay in budget."""
+        if len(data) > self.max_bytes:
+            return  # never worth evicting the whole cache for one image
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_chart_cache() -> ChartCache:
+    """One cache per server process, shared by every session."""
+    return ChartCache()
+
+
+def chart_grounding(player_xt=None, momentum=None) -> str:
+    """Which optional chart inputs were available: "xt+momentum", "xt", "momentum" or "match"."""
+    return "+".join(name for name, data in (("xt", player_xt), ("momentum", momentum))
+                    if data is not None) or "match"
+
+
+def chart_key(match_id, chart: str, fmt: str = "png", grounding: str = "match") -> tuple:
+    """Cache key for a chart of a match under the current schema, theme and grounding."""
+    return (match_id, chart, fmt, CHART_SCHEMA_VERSION, current_theme(), grounding)
+
+
+def render_cached(match_id, chart: str, render_fn, fmt: str = "png", grounding: str = "match") -> bytes:
+    """
+    Returns the image bytes for (match_id, chart), calling render_fn() — which
+    returns a matplotlib Figure — only on a cache miss. Returns None (and
+    caches nothing) if render_fn has nothing to draw.
+    """
+    cache = get_chart_cache()
+    key = chart_key(match_id, chart, fmt, grounding)
+    data = cache.get(key)
+    if data is None:
+        with PYPLOT_LOCK:
+            fig = render_fn()
+            if fig is None:
+                return None
+            data = figure_to_bytes(fig, fmt)
+        cache.put(key, data)
+    return data
@@ -0,0 +1,217 @@
+"""
+chart_data.py
+-------------
+Backend-neutral data models for the four Visual Insights charts.
+
+Each builder reduces the raw events (or match stats) to a small dict of plain
+lists and numbers — everything a chart needs and nothing else. The same model
+can then be drawn by matplotlib (visualizations.draw_*) or emitted as a
+Vega-Lite spec for the browser (chart_specs.py). No plotting library is
+imported here.
+"""
+
+from collections import defaultdict
+
+# ---------------------------------------------------------------------------
+# Shared colour palette — SofaScore-inspired dark-navy / green / indigo
+# Used by both the matplotlib and the Vega-Lite backend; it lives here so the
+# browser backend never imports matplotlib.
+# ---------------------------------------------------------------------------
+COLOURS = {
+    "bg":          "#1a1c2e",   # deep navy (figures, axes, pitch fill)
+    "bg_card":     "#222438",   # slightly lighter navy (legends, cards)
+    "bg_band":     "#1e2035",   # subtle alternate band for timelines
+    "spine":       "#3a3f62",   # axis spines and grid lines
+    "pitch_line":  "#3d5065",   # pitch markings
+    "home":        "#00b04a",   # SofaScore signature green
+    "away":        "#5263ff",   # SofaScore indigo blue
+    "goal":        "#FFD700",   # gold goal markers
+    "text":        "#ffffff",   # primary labels and titles
+    "text_muted":  "#8a9bb5",   # secondary / placeholder text
+    "passes":      "#5263ff",   # player chart: passes segment
+    "shots":       "#ffa040",   # player chart: shots segment (warm amber)
+    "pressures":   "#ff4e8c",   # player chart: pressures segment (coral pink)
+    "tackles":     "#00b04a",   # player chart: tackles segment
+    "halftime":    "#4a5080",   # half-time divider line
+}
+
+XG_TIMELINE_MINUTES = 96    # minutes 0–95 inclusive
+TOP_PLAYERS_PER_TEAM = 7
+PLAYER_SEGMENTS = ("passes", "shots", "pressures", "tackles")
+
+
+def _abbrev(name: str) -> str:
+    """'Lionel Messi' → 'L. Messi'"""
+    parts = name.split()
+    if len(parts) >= 2:
+        return f"{parts[0][0]}. {' '.join(parts[1:])}"
+    return name
+
+
+def _short_name(full_name: str) -> str:
+    """Surname only — used for timeline labels."""
+    parts = full_name.split() if full_name else ["?"]
+    return parts[-1]
+
+
+# ---------------------------------------------------------------------------
+# 1. Shot Map
+# ---------------------------------------------------------------------------
+def shot_map_data(events_data: list, home_team: str, away_team: str) -> dict:
+    """
+    Shots per team: location, xG and whether it was a goal.
+
+    Returns {"teams": [{"team", "side", "shots": [{x, y, xg, goal, player,
+    minute}], "shot_count", "goal_count", "xg_total"}, ...]}.
+    """
+    teams = []
+    for team, side in ((home_team, "home"), (away_team, "away")):
+        shots = []
+        for ev in events_data:
+            if ev.get("type", {}).get("name") != "Shot" or ev.get("team", {}).get("name") != team:
+                continue
+            shot = ev.get("shot", {})
+            loc = ev.get("location", [0, 0])
+            shots.append({
+                "x": float(loc[0]),
+                "y": float(loc[1]),
+                "xg": float(shot.get("statsbomb_xg", 0.05)),
+                "goal": shot.get("outcome", {}).get("name") == "Goal",
+                "player": ev.get("player", {}).get("name", ""),
+                "minute": ev.get("minute", 0),
+            })
+        teams.append({
+            "team": team,
+            "side": side,
+            "shots": shots,
+            "shot_count": len(shots),
+            "goal_count": sum(s["goal"] for s in shots),
+            "xg_total": round(sum(s["xg"] for s in shots), 4),
+        })
+    return {"teams": teams}
+
+
+# ---------------------------------------------------------------------------
+# 2. Cumulative xG Timeline
+# ---------------------------------------------------------------------------
+def xg_timeline_data(events_data: list, home_team: str, away_team: str,
+                     match_stats: dict) -> dict:
+    """
+    Cumulative xG per team at every minute 0–95, plus goal minutes.
+
+    Returns {"has_shots", "minutes", "teams": [{"team", "side", "cumulative",
+    "goals"}, ...]}.
+    """
+    xg_by_min = {home_team: defaultdict(float), away_team: defaultdict(float)}
+    has_shots = False
+    for ev in events_data:
+        if ev.get("type", {}).get("name") != "Shot":
+            continue
+        has_shots = True
+        team = ev.get("team", {}).get("name")
+        if team in xg_by_min:
+            xg_by_min[team][ev.get("minute", 0)] += ev.get("shot", {}).get("statsbomb_xg", 0.0)
+
+    minutes = list(range(XG_TIMELINE_MINUTES))
+    teams = []
+    for team, side in ((home_team, "home"), (away_team, "away")):
+        running, cumulative = 0.0, []
+        for m in minutes:
+            running += xg_by_min[team].get(m, 0.0)
+            cumulative.append(round(running, 4))
+        teams.append({
+            "team": team,
+            "side": side,
+            "cumulative": cumulative,
+            "goals": [g.get("minute", 0) for g in match_stats.get(team, {}).get("goals", [])],
+        })
+    return {"has_shots": has_shots, "minutes": minutes, "teams": teams}
+
+
+# ---------------------------------------------------------------------------
+# 3. Event Timeline (goals + substitutions)
+# ---------------------------------------------------------------------------
+def event_timeline_data(match_stats: dict, home_team: str, away_team: str,
+                        momentum: dict | None = None) -> dict:
+    """
+    Goal and substitution minutes per team, with short player labels. With
+    momentum (momentum.match_momentum) the model also carries the per-minute
+    net momentum and the ranked turning-point windows for the overlay.
+
+    Returns {"teams": [{"team", "side", "goals": [{minute, player}],
+    "subs": [{minute, in, out}]}, ...], "momentum": {"minutes", "net"} | None,
+    "turning_points": [{rank, start_minute, end_minute, side}]}.
+    """
+    teams = []
+    for team, side in ((home_team, "home"), (away_team, "away")):
+        team_stats = match_stats.get(team, {})
+        teams.append({
+            "team": team,
+            "side": side,
+            "goals": [
+                {"minute": g.get("minute", 0), "player": _short_name(g.get("player", ""))}
+                for g in team_stats.get("goals", [])
+            ],
+            "subs": [
+                {"minute": s.get("minute", 0), "in": s.get("in"), "out": s.get("out")}
+                for s in team_stats.get("subs", [])
+            ],
+        })
+    if not momentum or not momentum["minutes"]:
+        return {"teams": teams, "momentum": None, "turning_points": []}
+    return {
+        "teams": teams,
+        "momentum": {"minutes": momentum["minutes"], "net": momentum["net"]},
+        "turning_points": [
+            {"rank": tp["rank"], "start_minute": tp["start_minute"], "end_minute": tp["end_minute"],
+             "side": "home" if tp["team"] == home_team else "away"}
+            for tp in momentum["turning_points"]
+        ],
+    }
+
+
+# ---------------------------------------------------------------------------
+# 4. Player Involvement
+# ---------------------------------------------------------------------------
+def player_involvement_data(events_data: list, home_team: str, away_team: str,
+                            player_xt: dict | None = None) -> dict:
+    """
+    Top 7 players per team by total involvement, broken down by passes,
+    shots, pressures and tackles. With player_xt ({team: {player: xT}}, see
+    expected_threat.py) each player also carries the xT their passes and
+    carries added.
+
+    Returns {"has_events", "segments", "has_xt", "teams": [{"team", "side",
+    "players": [{name, label, passes, shots, pressures, tackles, total, xt}]}, ...]}.
+    """
+    type_map = {"Pass": "passes", "Shot": "shots", "Pressure": "pressures"}
+    counts = {
+        home_team: defaultdict(lambda: dict.fromkeys(PLAYER_SEGMENTS, 0)),
+        away_team: defaultdict(lambda: dict.fromkeys(PLAYER_SEGMENTS, 0)),
+    }
+    for ev in events_data:
+        team = ev.get("team", {}).get("name")
+        player = ev.get("player", {}).get("name")
+        if team not in counts or not player:
+            continue
+        ev_type = ev.get("type", {}).get("name", "")
+        if ev_type in type_map:
+            counts[team][player][type_map[ev_type]] += 1
+        elif ev_type == "Duel" and ev.get("duel", {}).get("type", {}).get("name") == "Tackle":
+            counts[team][player]["tackles"] += 1
+
+    teams = []
+    for team, side in ((home_team, "home"), (away_team, "away")):
+        ranked = sorted(counts[team].items(), key=lambda x: sum(x[1].values()), reverse=True)
+        team_xt = (player_xt or {}).get(team, {})
+        teams.append({
+            "team": team,
+            "side": side,
+            "players": [
+                {"name": name, "label": _abbrev(name), **c, "total": sum(c.values()),
+                 "xt": team_xt.get(name) if player_xt else None}
+                for name, c in ranked[:TOP_PLAYERS_PER_TEAM]
+            ],
+        })
+    return {"has_events": bool(events_data), "segments": list(PLAYER_SEGMENTS),
+            "has_xt": bool(player_xt), "teams": teams}
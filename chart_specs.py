@@ -0,0 +1,279 @@
+"""
+chart_specs.py
+--------------
+Vega-Lite backend for the Visual Insights charts.
+
+Turns the backend-neutral models from chart_data.py into compact Vega-Lite
+specs that the browser renders via st.vega_lite_chart. Building a spec is a
+few KB of JSON instead of a server-side matplotlib raster, and the charts get
+tooltips plus pan/zoom on the time axes for free.
+
+Use to_vega_lite(chart, model) with the VISUAL_MAP chart names.
+"""
+
+from chart_data import COLOURS
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+
+# Five-pointed star as an SVG path in the unit square — Vega-Lite has no
+# built-in star shape, and goals are drawn as stars in every backend
+_STAR_PATH = (
+    "M0,-1L0.224,-0.309L0.951,-0.309L0.363,0.118L0.588,0.809"
+    "L0,0.382L-0.588,0.809L-0.363,0.118L-0.951,-0.309L-0.224,-0.309Z"
+)
+
+# StatsBomb pitch markings (120 x 80, y grows downwards) as rectangles
+_PITCH_RECTS = [
+    {"x": 0, "x2": 120, "y": 0, "y2": 80},      # touchlines / goal lines
+    {"x": 60, "x2": 60, "y": 0, "y2": 80},      # halfway line
+    {"x": 0, "x2": 18, "y": 18, "y2": 62},      # penalty areas
+    {"x": 102, "x2": 120, "y": 18, "y2": 62},
+    {"x": 0, "x2": 6, "y": 30, "y2": 50},       # six-yard boxes
+    {"x": 114, "x2": 120, "y": 30, "y2": 50},
+]
+
+_TEAM_SCALE_RANGE = [COLOURS["home"], COLOURS["away"]]
+
+
+def _config() -> dict:
+    """Dark SofaScore-style config mirroring the matplotlib styling."""
+    return {
+        "background": COLOURS["bg"],
+        "view": {"stroke": None, "fill": COLOURS["bg"]},
+        "font": "DejaVu Sans",
+        "title": {"color": COLOURS["text"], "fontSize": 14, "fontWeight": "bold"},
+        "axis": {
+            "domainColor": COLOURS["spine"], "gridColor": COLOURS["spine"],
+            "gridOpacity": 0.4, "gridDash": [3, 3], "tickColor": COLOURS["spine"],
+            "labelColor": COLOURS["text_muted"], "titleColor": COLOURS["text"],
+        },
+        "legend": {
+            "labelColor": COLOURS["text"], "titleColor": COLOURS["text"],
+            "fillColor": COLOURS["bg_card"], "strokeColor": COLOURS["spine"],
+            "padding": 6,
+        },
+        "header": {"labelColor": COLOURS["text"], "titleColor": COLOURS["text"]},
+    }
+
+
+def _spec(**body) -> dict:
+    return {"$schema": VEGA_LITE_SCHEMA, "config": _config(), **body}
+
+
+def _team_domain(model: dict) -> list:
+    return [t["team"] for t in model["teams"]]
+
+
+# ---------------------------------------------------------------------------
+# 1. Shot Map
+# ---------------------------------------------------------------------------
+def shot_map_spec(model: dict) -> dict:
+    """Two pitches side by side; circle size = xG, gold stars = goals."""
+    panels = []
+    for team_data in model["teams"]:
+        base_color = COLOURS[team_data["side"]]
+        x = {"field": "x", "type": "quantitative", "scale": {"domain": [0, 120]}, "axis": None}
+        y = {"field": "y", "type": "quantitative", "scale": {"domain": [80, 0]}, "axis": None}
+        panels.append({
+            "title": f"{team_data['team']} — xG {team_data['xg_total']:.2f} "
+                     f"({team_data['shot_count']} shots, {team_data['goal_count']} goals)",
+            "width": 360, "height": 240,
+            "layer": [
+                {
+                    "data": {"values": _PITCH_RECTS},
+                    "mark": {"type": "rect", "fill": None, "stroke": COLOURS["pitch_line"]},
+                    "encoding": {"x": x, "x2": {"field": "x2"}, "y": y, "y2": {"field": "y2"}},
+                },
+                {
+                    "data": {"values": team_data["shots"]},
+                    "mark": {"type": "point", "filled": True, "opacity": 0.8},
+                    "encoding": {
+                        "x": x, "y": y,
+                        "size": {"field": "xg", "type": "quantitative",
+                                 "scale": {"domain": [0, 1], "range": [30, 900]}, "legend": None},
+                        "shape": {"field": "goal", "type": "nominal",
+                                  "scale": {"domain": [False, True], "range": ["circle", _STAR_PATH]},
+                                  "legend": None},
+                        "color": {"field": "goal", "type": "nominal",
+                                  "scale": {"domain": [False, True], "range": [base_color, COLOURS["goal"]]},
+                                  "legend": None},
+                        "tooltip": [
+                            {"field": "player"}, {"field": "minute", "title": "Minute"},
+                            {"field": "xg", "title": "xG", "format": ".2f"}, {"field": "goal", "title": "Goal"},
+                        ],
+                    },
+                },
+            ],
+        })
+    return _spec(title="Shot Map", hconcat=panels)
+
+
+# ---------------------------------------------------------------------------
+# 2. Cumulative xG Timeline
+# ---------------------------------------------------------------------------
+def xg_timeline_spec(model: dict) -> dict:
+    """Cumulative xG step curves with area fill and goal rules; x-axis zoomable."""
+    # Step curves only need the minutes where the total changes (plus the ends)
+    rows, last = [], len(model["minutes"]) - 1
+    for t in model["teams"]:
+        prev = None
+        for i, (m, xg) in enumerate(zip(model["minutes"], t["cumulative"])):
+            if xg != prev or i == last:
+                rows.append({"minute": m, "team": t["team"], "xg": xg})
+            prev = xg
+    goals = [{"minute": m, "team": t["team"]} for t in model["teams"] for m in t["goals"]]
+    color = {"field": "team", "type": "nominal",
+             "scale": {"domain": _team_domain(model), "range": _TEAM_SCALE_RANGE},
+             "legend": {"title": None, "orient": "top-left"}}
+    x = {"field": "minute", "type": "quantitative", "title": "Minute", "scale": {"domain": [0, 95]}}
+    return _spec(
+        title="Cumulative xG Timeline",
+        width="container", height=320,
+        layer=[
+            {
+                "data": {"values": rows},
+                "mark": {"type": "area", "interpolate": "step-after", "opacity": 0.12},
+                "encoding": {"x": x, "y": {"field": "xg", "type": "quantitative", "stack": None},
+                             "color": color},
+            },
+            {
+                "data": {"values": rows},
+                "mark": {"type": "line", "interpolate": "step-after", "strokeWidth": 2.5},
+                "params": [{"name": "zoom", "select": "interval", "bind": "scales"}],
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "xg", "type": "quantitative", "title": "Cumulative xG"},
+                    "color": color,
+                    "tooltip": [{"field": "team"}, {"field": "minute"},
+                                {"field": "xg", "title": "xG", "format": ".2f"}],
+                },
+            },
+            {
+                "data": {"values": goals},
+                "mark": {"type": "rule", "strokeDash": [4, 3], "opacity": 0.6},
+                "encoding": {"x": {"field": "minute", "type": "quantitative"}, "color": color,
+                             "tooltip": [{"field": "team"}, {"field": "minute", "title": "Goal"}]},
+            },
+        ],
+    )
+
+
+# ---------------------------------------------------------------------------
+# 3. Event Timeline (goals + substitutions)
+# ---------------------------------------------------------------------------
+def event_timeline_spec(model: dict) -> dict:
+    """Goals (stars) and subs (triangles); home above the axis, away below."""
+    rows = []
+    for t in model["teams"]:
+        sign = 1 if t["side"] == "home" else -1
+        rows += [{"minute": g["minute"], "lane": 0.7 * sign, "team": t["team"], "kind": "Goal",
+                  "label": f"⚽ {g['player']} {g['minute']}'"} for g in t["goals"]]
+        rows += [{"minute": s["minute"], "lane": 0.28 * sign, "team": t["team"], "kind": "Substitution",
+                  "label": f"↕ {s['in']} for {s['out']}"} for s in t["subs"]]
+    color = {"field": "team", "type": "nominal",
+             "scale": {"domain": _team_domain(model), "range": _TEAM_SCALE_RANGE},
+             "legend": {"title": None, "orient": "top-left"}}
+    x = {"field": "minute", "type": "quantitative", "title": "Minute", "scale": {"domain": [0, 97]}}
+    y = {"field": "lane", "type": "quantitative", "scale": {"domain": [-1.2, 1.2]}, "axis": None}
+
+    # Momentum band and turning-point windows, behind the markers
+    momentum_layers = []
+    momentum = model.get("momentum")
+    if momentum:
+        peak = max((abs(v) for v in momentum["net"]), default=0) or 1
+        # One band per side, so each is filled in its team colour
+        for clip, fill in ((max, COLOURS["home"]), (min, COLOURS["away"])):
+            momentum_layers.append({
+                "data": {"values": [{"minute": m + 0.5, "lane": clip(v, 0) / peak * 0.9}
+                                    for m, v in zip(momentum["minutes"], momentum["net"])]},
+                "mark": {"type": "area", "opacity": 0.22, "color": fill, "interpolate": "monotone"},
+                "encoding": {"x": x, "y": y},
+            })
+    if model.get("turning_points"):
+        sides = {t["side"]: t["team"] for t in model["teams"]}
+        momentum_layers += [
+            {
+                "data": {"values": [{"start": tp["start_minute"], "end": tp["end_minute"],
+                                     "team": sides[tp["side"]], "label": f"TP{tp['rank']}"}
+                                    for tp in model["turning_points"]]},
+                "mark": {"type": "rect", "opacity": 0.12},
+                "encoding": {"x": {"field": "start", "type": "quantitative"}, "x2": {"field": "end"},
+                             "color": color, "tooltip": [{"field": "label", "title": "Turning point"},
+                                                         {"field": "team", "title": "Momentum to"}]},
+            },
+        ]
+    return _spec(
+        title="Match Event Timeline",
+        width="container", height=220,
+        data={"values": rows},
+        layer=[
+            *momentum_layers,
+            {"mark": {"type": "rule", "color": COLOURS["spine"]}, "encoding": {"y": {"datum": 0}}},
+            {"mark": {"type": "rule", "color": COLOURS["halftime"], "strokeDash": [2, 2]},
+             "encoding": {"x": {"datum": 45}}},
+            {
+                "mark": {"type": "point", "filled": True, "size": 220},
+                "params": [{"name": "zoom", "select": {"type": "interval", "encodings": ["x"]},
+                            "bind": "scales"}],
+                "encoding": {
+                    "x": x, "y": y, "color": color,
+                    "shape": {"field": "kind", "type": "nominal",
+                              "scale": {"domain": ["Goal", "Substitution"], "range": [_STAR_PATH, "triangle"]},
+                              "legend": None},
+                    "tooltip": [{"field": "team"}, {"field": "kind"}, {"field": "label"}],
+                },
+            },
+            {
+                "transform": [{"filter": "datum.kind == 'Goal'"}],
+                "mark": {"type": "text", "dy": -16, "fontSize": 10},
+                "encoding": {"x": x, "y": y, "color": color, "text": {"field": "label"}},
+            },
+        ],
+    )
+
+
+# ---------------------------------------------------------------------------
+# 4. Player Involvement
+# ---------------------------------------------------------------------------
+def player_involvement_spec(model: dict) -> dict:
+    """Stacked horizontal bars per team, one colour per involvement type."""
+    segments = model["segments"]
+    panels = []
+    for t in model["teams"]:
+        rows = [
+            {"player": p["label"], "type": seg.capitalize(), "count": p[seg], "total": p["total"],
+             "xt": p.get("xt")}
+            for p in t["players"] for seg in segments
+        ]
+        tooltip = [{"field": "player"}, {"field": "type"}, {"field": "count"}]
+        if model.get("has_xt"):
+            tooltip.append({"field": "xt", "title": "xT (passes + carries)", "format": "+.3f"})
+        panels.append({
+            "title": t["team"],
+            "width": 300, "height": 220,
+            "data": {"values": rows},
+            "mark": {"type": "bar", "height": {"band": 0.6}},
+            "encoding": {
+                "y": {"field": "player", "type": "nominal", "title": None,
+                      "sort": {"field": "total", "order": "descending"}},
+                "x": {"field": "count", "type": "quantitative", "title": "Event count"},
+                "color": {"field": "type", "type": "nominal", "title": None,
+                          "scale": {"domain": [s.capitalize() for s in segments],
+                                    "range": [COLOURS[s] for s in segments]}},
+                "tooltip": tooltip,
+            },
+        })
+    return _spec(title="Player Involvement", hconcat=panels)
+
+
+SPEC_BUILDERS = {
+    "shot_map":       shot_map_spec,
+    "xg_chart":       xg_timeline_spec,
+    "event_timeline": event_timeline_spec,
+    "player_chart":   player_involvement_spec,
+}
+
+
+def to_vega_lite(chart: str, model: dict) -> dict:
+    """Vega-Lite spec for a chart_data model, by VISUAL_MAP chart name."""
+    return SPEC_BUILDERS[chart](model)
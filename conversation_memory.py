@@ -0,0 +1,216 @@
+"""
+conversation_memory.py
+----------------------
+Bounded rolling memory for the multi-turn Ask the Analyst chat.
+
+The last few question/answer turns are kept verbatim. Anything older is folded
+into a running summary, which a cheap gpt-4o-mini call compacts one turn at a
+time. render() always returns a context block under a hard token cap, so the
+prompt sent to answer_match_question stays the same size however long the
+conversation runs.
+
+Compaction never runs on the user's critical path. add_turn() hands the
+evicted turns to a small background pool, where they are folded while the
+user reads the answer and types the next question. render() never waits for
+that fold: until it has finished, the evicted turns are shown verbatim. Folds are memoised process-wide by (summary, evicted turns), so a
+memory rebuilt from to_dict() in a later request picks up the fold its
+predecessor started instead of repeating the LLM call. MatchService.ask
+works this way: the state travels with each question and answer, and only
+the service ever summarises.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# ---------------------------------------------------------------------------
+# Budget defaults — small enough to keep per-turn cost flat, large enough to
+# resolve follow-ups like "and after the second sub?"
+# ---------------------------------------------------------------------------
+MAX_VERBATIM_TURNS = 3
+MAX_CONTEXT_TOKENS = 900
+MAX_SUMMARY_TOKENS = 200
+
+COMPACT_WORKERS = 2
+COMPACT_WAIT_SECONDS = 2.0
+MAX_MEMOISED_FOLDS = 256
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text down to roughly max_tokens, marking the cut with an ellipsis."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max(0, max_tokens * 4 - 1)].rstrip() + "…"
+
+
+def _fallback_summariser(summary: str, question: str, answer: str) -> str:
+    """
+    Offline compaction used when no LLM summariser is available — keeps the
+    question and the first sentence of the answer.
+    """
+    first_sentence = answer.split(". ")[0].strip()
+    line = f"- Q: {question} → {first_sentence}"
+    return f"{summary}\n{line}".strip() if summary else line
+
+
+_executor = None
+_folds: OrderedDict = OrderedDict()      # (summary, evicted turns, summariser, cap) -> Future
+_folds_lock = threading.Lock()
+
+
+def _fold_turn(previous, summary: str, turn: tuple, summariser, max_summary_tokens: int) -> str:
+    """Folds one evicted turn into the summary (or into the previous fold's result)."""
+    if previous is not None:
+        # Submitted before this fold, so it is already running or done
+        summary = previous.result()
+    if summariser is None:
+        from llm import summarise_conversation
+        summariser = summarise_conversation
+    question, answer = turn
+    try:
+        summary = summariser(summary, question, answer)
+    except Exception:
+        summary = _fallback_summariser(summary, question, answer)
+    return _truncate_to_tokens(summary.strip(), max_summary_tokens)
+
+
+def fold_async(summary: str, turns: tuple, summariser=None, max_summary_tokens: int = MAX_SUMMARY_TOKENS):
+    """
+    The background fold of turns into summary, as a Future. Memoised, and
+    built on the fold of turns[:-1], so each turn is summarised only once
+    however often the pending list grows.
+    """
+    global _executor
+    key = (summary, turns, summariser, max_summary_tokens)
+    with _folds_lock:
+        future = _folds.get(key)
+        if future is not None:
+            _folds.move_to_end(key)
+            return future
+    previous = fold_async(summary, turns[:-1], summariser, max_summary_tokens) if len(turns) > 1 else None
+    with _folds_lock:
+        future = _folds.get(key)
+        if future is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=COMPACT_WORKERS, thread_name_prefix="memory-compact")
+            future = _folds[key] = _executor.submit(_fold_turn, previous, summary, turns[-1],
+                                                    summariser, max_summary_tokens)
+            while len(_folds) > MAX_MEMOISED_FOLDS:
+                _folds.popitem(last=False)
+        return future
+
+
+class ConversationMemory:
+    """
+    Rolling window of the last `max_turns` turns plus a running summary.
+
+    The summariser is any callable (summary, question, answer) -> new_summary.
+    It is called once per evicted turn, so the compaction cost is incremental
+    rather than proportional to the conversation length.
+    """
+
+    def __init__(self, max_turns: int = MAX_VERBATIM_TURNS,
+                 max_tokens: int = MAX_CONTEXT_TOKENS,
+                 max_summary_tokens: int = MAX_SUMMARY_TOKENS,
+                 summariser=None):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.summariser = summariser
+        self.turns: list[tuple[str, str]] = []
+        self.summary = ""
+        self.pending: list[tuple[str, str]] = []     # evicted, not yet folded into the summary
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def add_turn(self, question: str, answer: str):
+        """Records a completed turn and starts folding anything beyond the window in the background."""
+        self.turns.append((question, answer))
+        if len(self.turns) > self.max_turns:
+            self.pending += self.turns[:-self.max_turns]
+            self.turns = self.turns[-self.max_turns:]
+        self._fold_pending()
+
+    def _fold_pending(self):
+        if self.pending:
+            return fold_async(self.summary, tuple(self.pending), self.summariser, self.max_summary_tokens)
+        return None
+
+    def collect(self, timeout: float | None = None) -> bool:
+        """
+        Adopts the background fold's summary once it has finished, waiting
+        up to timeout seconds (default COMPACT_WAIT_SECONDS). Returns False
+        if turns are still pending.
+        """
+        if timeout is None:
+            timeout = COMPACT_WAIT_SECONDS
+        future = self._fold_pending()
+        if future is None:
+            return True
+        try:
+            self.summary = future.result(timeout=timeout)
+        except FutureTimeout:
+            return False
+        self.pending = []
+        return True
+
+    def to_dict(self, wait: float | None = None) -> dict:
+        """
+        JSON-ready state, e.g. to keep the memory with the client between
+        requests. Waits up to wait seconds (default COMPACT_WAIT_SECONDS) for
+        a running fold; turns still unfolded are kept as pending.
+        """
+        self.collect(timeout=wait)
+        return {"summary": self.summary, "turns": [list(t) for t in self.turns],
+                "pending": [list(t) for t in self.pending]}
+
+    @classmethod
+    def from_dict(cls, state: dict | None, **kwargs) -> "ConversationMemory":
+        """A memory restored from to_dict() output (empty for None), resuming any pending fold."""
+        memory = cls(**kwargs)
+        if state:
+            memory.summary = str(state.get("summary") or "")
+            memory.turns = [(str(q), str(a)) for q, a in state.get("turns") or []]
+            memory.pending = [(str(q), str(a)) for q, a in state.get("pending") or []]
+            memory._fold_pending()
+        return memory
+
+    def render(self) -> str:
+        """
+        Returns the conversation context block for the prompt, or '' if the
+        conversation has not started. Turns whose fold has not finished are
+        shown verbatim. Oldest verbatim turns are dropped first when the cap
+        is hit; the newest turn is truncated as a last resort.
+        """
+        self.collect(timeout=0)
+        if not self.turns and not self.pending and not self.summary:
+            return ""
+
+        summary_block = f"Earlier in the conversation (summary):\n{self.summary}" if self.summary else ""
+        turn_blocks = [f"Q: {q}\nA: {a}" for q, a in self.pending + self.turns]
+
+        def _join(blocks):
+            parts = [summary_block] if summary_block else []
+            if blocks:
+                parts.append("Recent turns:\n" + "\n\n".join(blocks))
+            return "\n\n".join(parts)
+
+        text = _join(turn_blocks)
+        while turn_blocks and estimate_tokens(text) > self.max_tokens:
+            if len(turn_blocks) == 1:
+                budget = self.max_tokens - estimate_tokens(_join([]))
+                turn_blocks[0] = _truncate_to_tokens(turn_blocks[0], max(budget - 8, 0))
+                text = _join(turn_blocks)
+                break
+            turn_blocks.pop(0)
+            text = _join(turn_blocks)
+
+        return _truncate_to_tokens(text, self.max_tokens)
@@ -2,6 +2,8 @@ import requests
 import pandas as pd
 import streamlit as st
 
+import tracing
+
 BASE_URL = "https://raw.githubusercontent.com/statsbomb/open-data/master/data"
 
 def get_team_logo_url(team_name):
@@ -40,20 +42,98 @@ def get_laliga_1819_info():
 def load_matches(comp_id, season_id):
     """Load matches for a specific competition and season."""
     url = f"{BASE_URL}/matches/{comp_id}/{season_id}.json"
-    response = requests.get(url)
+    with tracing.span("fetch", path=f"matches/{comp_id}/{season_id}.json") as span:
+        response = requests.get(url)
+        span.set(status=response.status_code, bytes=len(response.content))
     if response.status_code != 200:
         return pd.DataFrame()
     return pd.DataFrame(response.json())
 
+def fetch_json(path):
+    """
+    Uncached fetch of one StatsBomb open-data file (path relative to BASE_URL).
+    Returns (payload, size_in_bytes), or (None, 0) if the file isn't available.
+    Used by match_cache.py, which does its own process-wide caching.
+    """
+    with tracing.span("fetch", path=path) as span:
+        response = requests.get(f"{BASE_URL}/{path}")
+        span.set(status=response.status_code, bytes=len(response.content))
+    if response.status_code != 200:
+        return None, 0
+    with tracing.span("parse_json", path=path):
+        return response.json(), len(response.content)
+
+# Badge colours for the selected team's result in the match list
+RESULT_COLOURS = {"W": "#1ea64b", "L": "#e62e2e", "D": "#6c757d"}
+
+@st.cache_data
+def load_match_list(comp_id, season_id):
+    """
+    Season fixture list with the nested team dicts flattened in one
+    json_normalize pass (instead of a row-by-row apply), newest first.
+    Built once per season and cached.
+    """
+    df = load_matches(comp_id, season_id)
+    if df.empty:
+        return df
+
+    flat = pd.json_normalize(df.to_dict("records"), max_level=1)
+    flat = flat.rename(columns={
+        "home_team.home_team_name": "home_team_name",
+        "away_team.away_team_name": "away_team_name",
+    })
+    for col in ("home_team_name", "away_team_name"):
+        if col not in flat.columns:
+            flat[col] = "Unknown"
+    flat[["home_team_name", "away_team_name"]] = flat[["home_team_name", "away_team_name"]].fillna("Unknown")
+
+    if "match_date" in flat.columns:
+        flat = flat.sort_values(by="match_date", ascending=False, ignore_index=True)
+    return flat
+
+@st.cache_data
+def team_fixtures(comp_id, season_id, team):
+    """
+    The selected team's matches with W/L/D, badge colour and a display
+    scoreline, all computed with vectorized column operations.
+    """
+    import numpy as np
+
+    df = load_match_list(comp_id, season_id)
+    if df.empty:
+        return df
+
+    is_home = df["home_team_name"] == team
+    fixtures = df.loc[is_home | (df["away_team_name"] == team)].copy()
+    is_home = is_home.loc[fixtures.index].to_numpy()
+
+    home_score = pd.to_numeric(fixtures.get("home_score"), errors="coerce").to_numpy(dtype=float)
+    away_score = pd.to_numeric(fixtures.get("away_score"), errors="coerce").to_numpy(dtype=float)
+    goals_for = np.where(is_home, home_score, away_score)
+    goals_against = np.where(is_home, away_score, home_score)
+
+    # NaN compares False both ways, so unplayed matches fall through to "D"
+    fixtures["result"] = np.select([goals_for > goals_against, goals_for < goals_against], ["W", "L"], default="D")
+    fixtures["result_colour"] = fixtures["result"].map(RESULT_COLOURS)
+
+    def _score_text(scores):
+        return pd.Series(scores, index=fixtures.index).astype("Int64").astype(str).replace("<NA>", "-")
+
+    fixtures["scoreline"] = (
+        fixtures["home_team_name"] + " " + _score_text(home_score) + " - "
+        + _score_text(away_score) + " " + fixtures["away_team_name"]
+    )
+    if "match_date" not in fixtures.columns:
+        fixtures["match_date"] = "Unknown Date"
+    return fixtures.reset_index(drop=True)
+
 @st.cache_data
 def load_events(match_id):
     """Load all events for a specific match."""
-    url = f"{BASE_URL}/events/{match_id}.json"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return []
-    return response.json()
+    events, _ = fetch_json(f"events/{match_id}.json")
+    return events or []
 
+@tracing.traced()
 def compute_match_stats(events, home_team, away_team):
     """
     Parses the raw StatsBomb event data and builds out structured match statistics.
@@ -125,20 +205,69 @@ def compute_match_stats(events, home_team, away_team):
 @st.cache_data
 def load_lineups(match_id):
     """Load lineups for a specific match to get jersey numbers."""
-    url = f"{BASE_URL}/lineups/{match_id}.json"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return []
-    return response.json()
+    lineups, _ = fetch_json(f"lineups/{match_id}.json")
+    return lineups or []
 
 
-def plot_average_positions(events, lineups, target_team, color="#1D428A"):
+@st.cache_resource
+def load_freeze_frames(match_id):
     """
-    Plots the average position of the starting XI for a target team.
-    Returns a matplotlib figure.
+    StatsBomb 360 freeze frames for a match as a memory-mapped
+    freeze_frames.FreezeFrames, or None if the match has no 360 data.
+    The JSON is converted to .npy arrays on first load; later loads (in any
+    process) just map those files.
+    """
+    from freeze_frames import FREEZE_FRAME_DIR, FreezeFrames, convert_three_sixty
+
+    match_dir = FREEZE_FRAME_DIR / str(match_id)
+    if not FreezeFrames.exists(match_dir):
+        frames, _ = fetch_json(f"three-sixty/{match_id}.json")
+        if not frames:
+            return None
+        convert_three_sixty(frames, match_dir)
+    return FreezeFrames.open(match_dir)
+
+
+@st.cache_resource
+def _season_model(comp_id, season_id, name, _build):
+    # Raises rather than returning None: cache_resource would keep the None
+    # for the life of the process, hiding an archive built later
+    from season_archive import SeasonArchiveUnavailable, open_season_archive
+    archive = open_season_archive(comp_id, season_id) if _build is None else load_season_archive(comp_id, season_id)
+    if archive is None or not len(archive):
+        raise SeasonArchiveUnavailable(f"No season archive for {comp_id}/{season_id}")
+    return archive if _build is None else _build(archive, comp_id, season_id)
+
+
+def season_model(comp_id, season_id, build=None):
+    """
+    build(archive, comp_id, season_id) over the season's archive (or, without
+    build, the archive itself), made once per process — or None while the
+    archive has not been built (`python season_archive.py` — a one-off fetch
+    of every match, too slow for the request path). Until it exists every
+    call checks for it again.
+    """
+    from season_archive import SeasonArchiveUnavailable
+    name = "archive" if build is None else f"{build.__module__}.{build.__qualname__}"
+    try:
+        return _season_model(comp_id, season_id, name, build)
+    except SeasonArchiveUnavailable:
+        return None
+
+
+def load_season_archive(comp_id, season_id):
+    """The season's memory-mapped season_archive.SeasonArchive, or None if it has not been built yet."""
+    return season_model(comp_id, season_id)
+
+
+@tracing.traced()
+def average_positions_data(events, lineups, target_team, color="#1D428A"):
+    """
+    Computes the average position of the starting XI for a target team.
+    Returns a compact model for visualizations.draw_average_positions —
+    {"team", "color", "players": [{player, jersey, x, y}]} — or None if the
+    team has no lineup.
     """
-    from mplsoccer import Pitch
-    import matplotlib.pyplot as plt
     import numpy as np
 
     # 1. Grab their jersey numbers
@@ -184,27 +313,24 @@ def plot_average_positions(events, lineups, target_team, color="#1D428A"):
     avg_locs = []
     for player, locs in player_locs.items():
         if len(locs["x"]) > 5: # Make sure they had a decent number of touches before plotting
-            avg_x = np.mean(locs["x"])
-            avg_y = np.mean(locs["y"])
             avg_locs.append({
                 "player": player,
                 "jersey": jersey_nums[player],
-                "x": avg_x,
-                "y": avg_y
+                "x": float(np.mean(locs["x"])),
+                "y": float(np.mean(locs["y"])),
             })
 
-    # 4. Draw the actual pitch
-    from visualizations import COLOURS
-    pitch = Pitch(pitch_type='statsbomb', pitch_color=COLOURS["bg"], line_color=COLOURS["pitch_line"])
-    fig, ax = pitch.draw(figsize=(6, 4))
-    fig.patch.set_facecolor(COLOURS["bg"])
+    return {"team": target_team, "color": color, "players": avg_locs}
 
-    # 5. Plot the player nodes on the pitch
-    for p in avg_locs:
-        pitch.scatter(p["x"], p["y"], ax=ax, color=color, edgecolors=COLOURS["text"], s=500, zorder=2)
-        pitch.annotate(p["jersey"], xy=(p["x"], p["y"]), ax=ax, color=COLOURS["text"],
-                       va='center', ha='center', fontsize=12, fontweight='bold', zorder=3)
 
-    ax.set_title(f"{target_team}", color=COLOURS["text"], fontsize=14, loc="center")
-    
-    return fig
+def plot_average_positions(events, lineups, target_team, color="#1D428A"):
+    """
+    Plots the average position of the starting XI for a target team.
+    Returns a matplotlib figure.
+    """
+    model = average_positions_data(events, lineups, target_team, color)
+    if model is None:
+        return None
+
+    from visualizations import draw_average_positions
+    return draw_average_positions(model)
@@ -0,0 +1,204 @@
+"""
+expected_threat.py
+------------------
+Expected threat (xT): credit for the passes and carries that move the ball
+into dangerous areas, not just for the shot at the end.
+
+The pitch is split into an XT_COLUMNS × XT_ROWS grid. From a season of events
+(season_archive.SeasonArchive) each zone gets:
+
+    shoot_prob   share of its actions that are shots
+    goal_prob    share of its shots that are scored
+    move_prob    share of its actions that are passes / carries
+    transitions  where its successful moves end up (row-normalised over all
+                 moves, so failed moves lose the ball)
+
+and the value of holding the ball in each zone solves
+
+    xT = shoot_prob · goal_prob + move_prob · (transitions @ xT)
+
+by value iteration — a handful of matrix-vector products over the whole grid.
+A successful pass or carry from zone a to zone b is worth xT[b] − xT[a].
+Every move in a match is scored in one array operation (score_moves).
+
+Fitting needs the season archive (`python season_archive.py`); the fitted
+grid is cached on disk under .cache/xt/ and refitted only when the archive is
+rebuilt. Without an archive the app simply leaves xT out.
+
+    python expected_threat.py                # fit (or load) and print the grid
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+XT_DIR = Path(os.environ.get("XT_DIR", Path(__file__).parent / ".cache" / "xt"))
+
+PITCH_LENGTH, PITCH_WIDTH = 120.0, 80.0
+XT_COLUMNS, XT_ROWS = 16, 12
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# Dead-ball situations are not part of the open-play model
+SET_PIECE_PASS_TYPES = ("Corner", "Free Kick", "Throw-in", "Goal Kick", "Kick Off")
+EXCLUDED_SHOT_TYPES = ("Penalty",)
+
+TOP_XT_PLAYERS = 5
+
+
+def zones(x, y) -> np.ndarray:
+    """Flat zone index (column-major along the pitch) for StatsBomb coordinates; -1 where missing."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    missing = np.isnan(x) | np.isnan(y)
+    x, y = np.where(missing, 0.0, x), np.where(missing, 0.0, y)
+    col = np.clip((x * (XT_COLUMNS / PITCH_LENGTH)).astype(np.int64), 0, XT_COLUMNS - 1)
+    row = np.clip((y * (XT_ROWS / PITCH_WIDTH)).astype(np.int64), 0, XT_ROWS - 1)
+    return np.where(missing, -1, col * XT_ROWS + row)
+
+
+def _open_play_masks(cols) -> tuple:
+    """(moves, successful moves, shots, goals) row masks for a set of EventColumns."""
+    types, subtype, outcome = cols["type"], cols["subtype"], cols["outcome"]
+    is_pass = (types == cols.code("type", "Pass")) & ~np.isin(subtype, cols.codes("subtype", SET_PIECE_PASS_TYPES))
+    is_carry = types == cols.code("type", "Carry")
+    moves = (is_pass | is_carry) & ~np.isnan(cols["x"]) & ~np.isnan(cols["end_x"])
+    # StatsBomb leaves pass.outcome empty for a completed pass; carries always arrive
+    successful = moves & (is_carry | (outcome == -1))
+    shots = ((types == cols.code("type", "Shot"))
+             & ~np.isin(subtype, cols.codes("subtype", EXCLUDED_SHOT_TYPES))
+             & ~np.isnan(cols["x"]))
+    goals = shots & (outcome == cols.code("outcome", "Goal"))
+    return moves, successful, shots, goals
+
+
+def fit_xt(cols) -> np.ndarray:
+    """Fits the xT grid from EventColumns (a season archive). Returns (XT_COLUMNS, XT_ROWS)."""
+    n_zones = XT_COLUMNS * XT_ROWS
+    moves, successful, shots, goals = _open_play_masks(cols)
+    start = zones(cols["x"], cols["y"])
+    end = zones(cols["end_x"], cols["end_y"])
+
+    move_counts = np.bincount(start[moves], minlength=n_zones).astype(np.float64)
+    shot_counts = np.bincount(start[shots], minlength=n_zones).astype(np.float64)
+    goal_counts = np.bincount(start[goals], minlength=n_zones).astype(np.float64)
+    actions = move_counts + shot_counts
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shoot_prob = np.nan_to_num(shot_counts / actions)
+        move_prob = np.nan_to_num(move_counts / actions)
+        goal_prob = np.nan_to_num(goal_counts / shot_counts)
+        pairs = np.bincount(start[successful] * n_zones + end[successful],
+                            minlength=n_zones * n_zones).reshape(n_zones, n_zones)
+        transitions = np.nan_to_num(pairs / move_counts[:, None])
+
+    shot_value = shoot_prob * goal_prob
+    xt = np.zeros(n_zones)
+    for _ in range(MAX_ITERATIONS):
+        updated = shot_value + move_prob * (transitions @ xt)
+        converged = np.abs(updated - xt).max() < TOLERANCE
+        xt = updated
+        if converged:
+            break
+    return xt.reshape(XT_COLUMNS, XT_ROWS)
+
+
+def score_moves(grid: np.ndarray, cols) -> np.ndarray:
+    """xT added by every row of EventColumns: end − start value for successful moves, 0 elsewhere."""
+    _, successful, _, _ = _open_play_masks(cols)
+    flat = grid.ravel()
+    start = zones(cols["x"], cols["y"])
+    end = zones(cols["end_x"], cols["end_y"])
+    return np.where(successful, flat[end] - flat[start], 0.0)
+
+
+def player_xt(grid: np.ndarray, cols, home_team: str, away_team: str) -> dict:
+    """{team: {player: xT from passes and carries}}, rounded, highest first."""
+    added = score_moves(grid, cols)
+    player, team = cols["player"], cols["team"]
+    result = {}
+    for t in (home_team, away_team):
+        rows = (team == cols.code("team", t)) & (player >= 0)
+        totals = np.bincount(player[rows], weights=added[rows])
+        ranked = np.flatnonzero(np.bincount(player[rows]))
+        ranked = ranked[np.argsort(-totals[ranked], kind="stable")]
+        result[t] = {cols.decode("player", int(p)): round(float(totals[p]), 3) for p in ranked}
+    return result
+
+
+def _cache_path(archive) -> Path:
+    fingerprint = json.dumps([str(archive.dir.resolve()), archive.manifest.get("built_at"),
+                              archive.manifest.get("n_events"), XT_COLUMNS, XT_ROWS])
+    return XT_DIR / f"xt-{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}.npy"
+
+
+def load_or_fit_xt(archive) -> np.ndarray:
+    """The archive's xT grid from the on-disk cache, fitting (and caching) it on a miss."""
+    path = _cache_path(archive)
+    if path.exists():
+        return np.load(path)
+    grid = fit_xt(archive)
+    XT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, grid)
+    os.replace(tmp, path)
+    return grid
+
+
+def _fit_season_xt(archive, comp_id, season_id):
+    return load_or_fit_xt(archive)
+
+
+def get_xt_grid(comp_id, season_id):
+    """The season's fitted xT grid, or None until its season archive is built (data_processing.season_model)."""
+    from data_processing import season_model
+    return season_model(comp_id, season_id, _fit_season_xt)
+
+
+def get_player_xt(match_id, grid, home_team: str, away_team: str, cache=None) -> dict:
+    """player_xt for a cached match, computed once per process (read-only)."""
+    if cache is None:
+        from match_cache import get_match_cache
+        cache = get_match_cache()
+    return cache.derived(
+        match_id, ("player_xt", home_team, away_team),
+        lambda m: player_xt(grid, cache.columns(match_id), home_team, away_team),
+    )
+
+
+def with_expected_threat(stats: dict, players_xt: dict) -> dict:
+    """
+    A new prompt-stats dict with each team's total xT from passes and carries
+    and its top TOP_XT_PLAYERS players by xT. stats is not modified.
+    """
+    combined = dict(stats)
+    for team, by_player in players_xt.items():
+        if team in combined:
+            combined[team] = {
+                **combined[team],
+                "xt_from_moves": round(sum(by_player.values()), 2),
+                "top_xt_players": [{"player": p, "xt": v} for p, v in list(by_player.items())[:TOP_XT_PLAYERS]],
+            }
+    notes = combined.get("metric_notes")
+    combined["metric_notes"] = {
+        **(notes or {}),
+        "xt": "expected threat added by completed passes and carries (goal-probability gain of moving the ball)",
+    }
+    return combined
+
+
+if __name__ == "__main__":
+    from data_processing import get_laliga_1819_info
+    from season_archive import open_season_archive
+
+    comp, season = get_laliga_1819_info()
+    season_archive = open_season_archive(comp, season)
+    if season_archive is None:
+        raise SystemExit("No season archive — build it first with `python season_archive.py`.")
+    xt_grid = load_or_fit_xt(season_archive)
+    print(f"xT grid ({XT_COLUMNS}×{XT_ROWS}), own goal on the left:")
+    for row in xt_grid.T:
+        print("  " + " ".join(f"{v:.3f}" for v in row))
@@ -0,0 +1,158 @@
+"""
+flags.py
+--------
+Country name → flag emoji, as a static lookup table.
+
+Lineup rendering resolves a flag for every player on every match open. Doing
+that with pycountry (an exact lookup, then search_fuzzy for anything else) is
+slow and pulls pycountry into the request path. Instead the full table — every
+pycountry country name, official and common name, the StatsBomb spellings and
+the home-nation overrides — is generated once into flags.json and shipped with
+the app. flag_emoji() is then a normalised dict hit and never imports pycountry.
+
+Regenerate the table after a pycountry upgrade or when adding a variant:
+
+    python flags.py
+"""
+
+import json
+import unicodedata
+from pathlib import Path
+
+FLAG_TABLE_PATH = Path(__file__).parent / "flags.json"
+
+UNKNOWN_FLAG = "🏳️"
+
+# Names that are not ISO countries, or that StatsBomb spells differently from
+# pycountry. Values are ISO alpha-2 codes or ready-made emoji.
+FLAG_OVERRIDES = {
+    "England": "🏴󠁧󠁢󠁥󠁮󠁧󠁿",
+    "Wales": "🏴󠁧󠁢󠁷󠁬󠁳󠁿",
+    "Scotland": "🏴󠁧󠁢󠁳󠁣󠁴󠁿",
+    "Northern Ireland": "🇬🇧",
+    "Korea Republic": "KR",
+    "South Korea": "KR",
+    "Korea DPR": "KP",
+    "North Korea": "KP",
+    "Côte d'Ivoire": "CI",
+    "Ivory Coast": "CI",
+    "Bosnia and Herzegovina": "BA",
+    "Bosnia-Herzegovina": "BA",
+    "Republic of Ireland": "IE",
+    "Ireland": "IE",
+    "USA": "US",
+    "United States of America": "US",
+    "Russia": "RU",
+    "Turkey": "TR",
+    "Iran": "IR",
+    "Iran, Islamic Republic of": "IR",
+    "Venezuela": "VE",
+    "Syria": "SY",
+    "Democratic Republic of the Congo": "CD",
+    "Congo DR": "CD",
+    "DR Congo": "CD",
+    "Congo": "CG",
+    "Serbia": "RS",
+    "Croatia": "HR",
+    "Cape Verde": "CV",
+    "Cape Verde Islands": "CV",
+    "China PR": "CN",
+    "Chinese Taipei": "TW",
+    "Czech Republic": "CZ",
+    "Holland": "NL",
+    "Great Britain": "GB",
+    "Macedonia": "MK",
+    "FYR Macedonia": "MK",
+    "Kosovo": "XK",
+    "Swaziland": "SZ",
+    "East Timor": "TL",
+    "The Gambia": "GM",
+    "Palestine": "PS",
+    "St. Kitts and Nevis": "KN",
+    "St. Lucia": "LC",
+    "St. Vincent and the Grenadines": "VC",
+    "Vietnam": "VN",
+    "Laos": "LA",
+    "Moldova": "MD",
+    "Tanzania": "TZ",
+    "Bolivia": "BO",
+    "Brunei": "BN",
+    "Macau": "MO",
+}
+
+
+def _normalise(name: str) -> str:
+    """Case-, accent- and whitespace-insensitive key: 'Côte  d’Ivoire' → "cote d'ivoire"."""
+    name = unicodedata.normalize("NFKD", name.replace("’", "'"))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return " ".join(name.casefold().split())
+
+
+def _emoji(code_or_emoji: str) -> str:
+    """ISO alpha-2 → regional-indicator pair; anything else is already an emoji."""
+    if len(code_or_emoji) == 2 and code_or_emoji.isascii() and code_or_emoji.isalpha():
+        return "".join(chr(ord(ch) + 127397) for ch in code_or_emoji.upper())
+    return code_or_emoji
+
+
+def build_flag_table() -> dict:
+    """
+    Normalised name → emoji for every pycountry country (name, official and
+    common name, the short form before a comma, alpha-2 / alpha-3 codes) plus
+    FLAG_OVERRIDES, which win over anything derived from pycountry.
+    """
+    import pycountry
+
+    table = {}
+    ambiguous = set()
+
+    def add(name, code, weak=False):
+        if not name:
+            return
+        key = _normalise(name)
+        emoji = _emoji(code)
+        # "Korea, Republic of" and "Korea, Democratic People's ..." both shorten
+        # to "Korea" — such derived names are dropped rather than guessed
+        if weak and key in table and table[key] != emoji:
+            ambiguous.add(key)
+            return
+        table.setdefault(key, emoji)
+
+    for country in pycountry.countries:
+        code = country.alpha_2
+        for attr in ("name", "official_name", "common_name"):
+            add(getattr(country, attr, None), code)
+        add(country.alpha_2, code)
+        add(country.alpha_3, code)
+    for country in pycountry.countries:
+        if "," in country.name:
+            add(country.name.split(",")[0], country.alpha_2, weak=True)
+    for key in ambiguous:
+        table.pop(key, None)
+
+    for name, value in FLAG_OVERRIDES.items():
+        table[_normalise(name)] = _emoji(value)
+    return dict(sorted(table.items()))
+
+
+_TABLE = None
+
+
+def _table() -> dict:
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = json.loads(FLAG_TABLE_PATH.read_text(encoding="utf-8"))
+    return _TABLE
+
+
+def flag_emoji(country_name) -> str:
+    """Flag emoji for a StatsBomb country name, or a white flag if unknown."""
+    if not country_name:
+        return UNKNOWN_FLAG
+    return _table().get(_normalise(country_name), UNKNOWN_FLAG)
+
+
+if __name__ == "__main__":
+    flag_table = build_flag_table()
+    FLAG_TABLE_PATH.write_text(json.dumps(flag_table, ensure_ascii=False, indent=0) + "\n", encoding="utf-8")
+    print(f"Wrote {len(flag_table)} names to {FLAG_TABLE_PATH}")
@@ -0,0 +1,193 @@
+"""
+freeze_frames.py
+----------------
+StatsBomb 360 freeze frames as memory-mapped NumPy arrays.
+
+A three-sixty/{match_id}.json file holds, for most events, the visible area
+and the position of every visible player — several times the size of the
+events file. Parsing it into Python dicts for every use is slow and memory
+hungry, so it is converted once into flat columnar arrays on disk:
+
+    event_ids.npy   (n_frames,)       S36   event uuid of each frame
+    offsets.npy     (n_frames + 1,)   int64 frame i's players are rows
+                                            offsets[i]:offsets[i+1]
+    positions.npy   (n_players, 2)    float32 x, y (StatsBomb pitch units)
+    flags.npy       (n_players,)      uint8 TEAMMATE | ACTOR | KEEPER bits
+
+FreezeFrames maps these read-only (np.load(mmap_mode="r")), so looking up one
+event is a zero-copy slice and whole-match aggregates — defensive line
+height, compactness — are vectorised over all frames at once. Pages are
+shared through the OS page cache by every process that opens the same match.
+
+Coordinates follow StatsBomb: the actor's team attacks left → right, so the
+defending side's goal is at x = 120.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+FREEZE_FRAME_DIR = Path(os.environ.get("FREEZE_FRAME_DIR", Path(__file__).parent / ".cache" / "three-sixty"))
+
+TEAMMATE, ACTOR, KEEPER = 1, 2, 4
+
+PITCH_LENGTH = 120.0
+
+# Frames need at least this many visible outfield defenders to say anything
+# about the shape of the back line
+MIN_DEFENDERS = 4
+BACK_LINE_SIZE = 4
+
+_FILES = ("event_ids", "offsets", "positions", "flags")
+
+
+def convert_three_sixty(frames: list, out_dir: Path) -> Path:
+    """
+    Writes parsed three-sixty JSON as the columnar arrays described above.
+    Written to a temporary directory and renamed into place, so a reader never
+    sees a half-written match.
+    """
+    out_dir = Path(out_dir)
+    counts = np.fromiter((len(f.get("freeze_frame") or []) for f in frames), dtype=np.int64, count=len(frames))
+    offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    positions = np.empty((offsets[-1], 2), dtype=np.float32)
+    flags = np.empty(offsets[-1], dtype=np.uint8)
+    row = 0
+    for frame in frames:
+        for player in frame.get("freeze_frame") or []:
+            positions[row] = player.get("location", (np.nan, np.nan))[:2]
+            flags[row] = (TEAMMATE * bool(player.get("teammate"))
+                          | ACTOR * bool(player.get("actor"))
+                          | KEEPER * bool(player.get("keeper")))
+            row += 1
+    event_ids = np.array([f.get("event_uuid", "") for f in frames], dtype="S36")
+
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name, array in zip(_FILES, (event_ids, offsets, positions, flags)):
+        np.save(tmp_dir / f"{name}.npy", array)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+class FreezeFrames:
+    """Read-only, memory-mapped 360 freeze frames for one match."""
+
+    def __init__(self, event_ids, offsets, positions, flags):
+        self.event_ids = event_ids
+        self.offsets = offsets
+        self.positions = positions
+        self.flags = flags
+        self._index = None
+
+    @staticmethod
+    def exists(match_dir: Path) -> bool:
+        return all((Path(match_dir) / f"{name}.npy").exists() for name in _FILES)
+
+    @classmethod
+    def open(cls, match_dir: Path) -> "FreezeFrames":
+        match_dir = Path(match_dir)
+        return cls(*(np.load(match_dir / f"{name}.npy", mmap_mode="r") for name in _FILES))
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+    def __contains__(self, event_id) -> bool:
+        return self._frame_index(event_id) is not None
+
+    def _frame_index(self, event_id):
+        if self._index is None:
+            self._index = {eid.decode(): i for i, eid in enumerate(self.event_ids)}
+        return self._index.get(event_id)
+
+    def frame(self, event_id):
+        """(positions, flags) views for one event — zero-copy — or None if it has no frame."""
+        i = self._frame_index(event_id)
+        if i is None:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.positions[start:end], self.flags[start:end]
+
+    def frame_ids(self) -> np.ndarray:
+        """Frame number of every player row (row → frame), for grouped reductions."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+
+    def defensive_shape(self) -> dict:
+        """
+        Per-frame shape of the team NOT on the ball (the actor's opponents):
+
+            line_height   distance of its back line (the BACK_LINE_SIZE deepest
+                          visible outfielders) from its own goal
+            compactness   mean distance of its visible outfielders to their centroid
+            defenders     visible outfield defenders in the frame
+
+        Arrays of length len(self); NaN where fewer than MIN_DEFENDERS are visible.
+        """
+        n_frames = len(self)
+        flags = np.asarray(self.flags)
+        positions = np.asarray(self.positions, dtype=np.float64)
+        frame_of = self.frame_ids()
+
+        defending = (flags & (TEAMMATE | KEEPER)) == 0
+        frame_of, x, y = frame_of[defending], positions[defending, 0], positions[defending, 1]
+        counts = np.bincount(frame_of, minlength=n_frames)
+
+        # Centroid and mean distance to it, per frame
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cx = np.bincount(frame_of, weights=x, minlength=n_frames) / counts
+            cy = np.bincount(frame_of, weights=y, minlength=n_frames) / counts
+            dist = np.hypot(x - cx[frame_of], y - cy[frame_of])
+            compactness = np.bincount(frame_of, weights=dist, minlength=n_frames) / counts
+
+        # Deepest defenders = largest x (their goal is at x = 120): sort rows by
+        # (frame, -x) and keep each frame's first BACK_LINE_SIZE
+        order = np.lexsort((-x, frame_of))
+        sorted_frames = frame_of[order]
+        group_start = np.searchsorted(sorted_frames, sorted_frames, side="left")
+        in_line = (np.arange(len(order)) - group_start) < BACK_LINE_SIZE
+        line_frames = sorted_frames[in_line]
+        line_x = x[order][in_line]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            line_x_mean = (np.bincount(line_frames, weights=line_x, minlength=n_frames)
+                           / np.bincount(line_frames, minlength=n_frames))
+
+        enough = counts >= MIN_DEFENDERS
+        return {
+            "line_height": np.where(enough, PITCH_LENGTH - line_x_mean, np.nan),
+            "compactness": np.where(enough, compactness, np.nan),
+            "defenders": counts,
+        }
+
+
+def team_defensive_shape(frames: FreezeFrames, events, home_team: str, away_team: str) -> dict:
+    """
+    Match-level defensive shape per team: the mean line height and compactness
+    over every frame in which that team was defending (the other team had the
+    ball). Returns {team: {"line_height", "compactness", "frames"}}.
+
+    Only frames whose actor is on the team in possession count. A Pressure,
+    Duel or Block by the defending side makes the attackers the actor's
+    opponents, so defensive_shape() would measure the wrong team.
+    """
+    on_ball = {ev.get("id"): ev.get("team", {}).get("name") for ev in events
+               if ev.get("team", {}).get("name") == (ev.get("possession_team") or {}).get("name")}
+    actor_team = np.array([on_ball.get(eid.decode()) for eid in frames.event_ids], dtype=object)
+    shape = frames.defensive_shape()
+    valid = ~np.isnan(shape["line_height"])
+
+    result = {}
+    for team, opponent in ((home_team, away_team), (away_team, home_team)):
+        defending = valid & (actor_team == opponent)
+        n = int(defending.sum())
+        result[team] = {
+            "line_height": round(float(shape["line_height"][defending].mean()), 1) if n else None,
+            "compactness": round(float(shape["compactness"][defending].mean()), 1) if n else None,
+            "frames": n,
+        }
+    return result
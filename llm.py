@@ -1,8 +1,21 @@
 import json
 import os
-from openai import OpenAI
 import streamlit as st
 
+import tracing
+
+# Model behind the question pipeline (scope, intent, answer). Part of the
+# answer_cache version, so changing it invalidates cached answers.
+ANSWER_MODEL = "gpt-4o-mini"
+
+# Start of the answer text returned when an answer call fails
+ANSWER_ERROR_PREFIX = "Error generating answer"
+
+
+def is_error_answer(answer: str) -> bool:
+    """True for the error text answer_match_question / answer_with_tools return on failure."""
+    return answer.startswith(ANSWER_ERROR_PREFIX)
+
 # ---------------------------------------------------------------------------
 # Scope definition — shared by the classifier prompt and the UI info box
 # ---------------------------------------------------------------------------
@@ -19,6 +32,7 @@ SCOPE_DESCRIPTION = (
 
 
 def _get_client():
+    from openai import OpenAI  # deferred — importing openai costs ~1s on a cold start
     try:
         api_key = st.secrets.get("OPENAI_API_KEY") or os.environ.get("OPENAI_API_KEY")
     except Exception:
@@ -45,12 +59,14 @@ Is this question within the assistant's scope?
 Reply with exactly one word: YES or NO."""
 
     try:
-        response = _get_client().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_tokens=5,
-        )
+        with tracing.span("llm.scope"):
+            response = _get_client().chat.completions.create(
+                model=ANSWER_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                max_tokens=5,
+            )
+            tracing.record_usage(response)
         verdict = response.choices[0].message.content.strip().upper()
     except Exception:
         return True, ""  # fail open — let the main LLM handle edge cases
@@ -107,12 +123,14 @@ User question: "{question}"
 Return only the category name, nothing else."""
 
     try:
-        response = _get_client().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_tokens=10,
-        )
+        with tracing.span("llm.intent"):
+            response = _get_client().chat.completions.create(
+                model=ANSWER_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                max_tokens=10,
+            )
+            tracing.record_usage(response)
         category = response.choices[0].message.content.strip().lower()
         if category in INTENT_CATEGORIES:
             return category
@@ -156,20 +174,55 @@ def generate_tactical_breakdown(match_stats_json, home_team, away_team, home_sco
     """
 
     try:
-        response = _get_client().chat.completions.create(
-            model="gpt-4o-mini",  # Keeping it on mini for speed and cost efficiency
-            messages=[
-                {"role": "system", "content": "You are an elite football tactical analyst covering La Liga."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3, # We want the analysis to be factual and consistent, so lower temp is better
-            max_tokens=1500
-        )
+        with tracing.span("llm.breakdown"):
+            response = _get_client().chat.completions.create(
+                model="gpt-4o-mini",  # Keeping it on mini for speed and cost efficiency
+                messages=[
+                    {"role": "system", "content": "You are an elite football tactical analyst covering La Liga."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3, # We want the analysis to be factual and consistent, so lower temp is better
+                max_tokens=1500
+            )
+            tracing.record_usage(response)
         return response.choices[0].message.content
     except Exception as e:
         return f"Error generating tactical breakdown: {e}"
 
 
+def summarise_conversation(summary: str, question: str, answer: str) -> str:
+    """
+    Folds one evicted chat turn into the running conversation summary.
+    Used by conversation_memory.ConversationMemory to keep the prompt bounded.
+
+    A cheap gpt-4o-mini call capped at a short output; raises on API errors so
+    the caller can fall back to its offline compaction.
+    """
+    prompt = f"""\
+Update the running summary of a football match analysis conversation.
+Keep every concrete fact (players, minutes, scores, stats) needed to resolve follow-up questions.
+Write at most 4 short bullet points.
+
+Current summary:
+{summary or "(empty)"}
+
+New turn to fold in:
+Q: {question}
+A: {answer}
+
+Updated summary:"""
+
+    with tracing.span("llm.summarise"):
+        response = _get_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            max_tokens=150,
+        )
+        tracing.record_usage(response)
+    return response.choices[0].message.content.strip()
+
+
 def answer_match_question(
     question: str,
     match_stats_json: str,
@@ -178,6 +231,10 @@ def answer_match_question(
     away_team: str,
     home_score: int,
     away_score: int,
+    conversation_context: str = "",
+    turning_points: list | None = None,
+    player_profiles: list | None = None,
+    moments: list[str] | None = None,
 ) -> str:
     """
     Answers a user's natural language question about a specific match.
@@ -202,6 +259,14 @@ def answer_match_question(
         away_team        – away team name
         home_score       – final home score
         away_score       – final away score
+        conversation_context – bounded summary of earlier turns
+                           (from ConversationMemory.render), '' on the first turn
+        turning_points   – ranked momentum turning-point windows
+                           (momentum.match_momentum), if available
+        player_profiles  – season per-90 profiles of the players asked about
+                           (player_profiles.profiles_for_prompt), if available
+        moments          – summaries of the match's possession chains most
+                           relevant to the question (moments.MomentIndex.search)
 
     Returns:
         A concise, data-grounded tactical answer as a string.
@@ -213,6 +278,43 @@ def answer_match_question(
     else:
         retrieved_text = "No specific tactical concepts retrieved for this question."
 
+    # Earlier turns let follow-ups ("and after the second sub?") resolve correctly
+    if conversation_context:
+        conversation_text = f"""
+Conversation so far (use it to resolve follow-up questions):
+{conversation_context}
+"""
+    else:
+        conversation_text = ""
+
+    # Computed shifts in momentum, so "when did the match turn?" is answered
+    # from the data rather than guessed from the goal times
+    if turning_points:
+        turning_points_text = f"""
+Momentum Turning Points (computed from xG, box entries and pressures; ranked by size of the swing, "team" is the side momentum swung towards):
+{json.dumps(turning_points, indent=2)}
+"""
+    else:
+        turning_points_text = ""
+
+    # Season baselines, so "was that a good game for him?" compares the match
+    # with what the player usually does
+    if player_profiles:
+        player_profiles_text = f"""
+Season Player Profiles (per 90 minutes across the season; percentile is among all La Liga players with enough minutes, 100 = highest):
+{json.dumps(player_profiles, indent=2, ensure_ascii=False)}
+"""
+    else:
+        player_profiles_text = ""
+
+    # Only the passages of play that match the question, not the whole match
+    if moments:
+        moments_text = "\nRelevant Match Moments (possession chains from the event data):\n" + "\n".join(
+            f"- {m}" for m in moments
+        ) + "\n"
+    else:
+        moments_text = ""
+
     prompt = f"""
 You are a professional football tactical analyst with deep knowledge of La Liga.
 
@@ -220,38 +322,135 @@ Match: {home_team} {home_score} – {away_score} {away_team}
 
 Structured Match Statistics (JSON):
 {match_stats_json}
-
+{turning_points_text}{player_profiles_text}{moments_text}
 Relevant Football Tactical Concepts (retrieved from knowledge base):
 {retrieved_text}
-
+{conversation_text}
 User Question:
 {question}
 
 Instructions:
 - Ground your answer firmly in the match statistics provided. Reference specific numbers (shots, xG, passes, pressures) where relevant.
 - Use the tactical concepts above to frame your explanation — do not ignore them.
+- For questions about when or why the match changed, use the momentum turning points (minutes, shots, xG, goals and substitutions in each window).
+- Cite the relevant match moments (minute, players, outcome) when they answer the question.
+- For questions about a player, compare their match figures with their season profile and name similar players only if it helps.
 - Keep your answer focused and analytical: 3–5 sentences maximum.
 - Do not speculate about events not supported by the data.
 - Write in a clear, professional tone suitable for a football analytics platform.
 """
 
     try:
-        response = _get_client().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an elite football tactical analyst. "
-                        "Always ground your answers in the match data and tactical concepts provided. "
-                        "Never fabricate statistics or events."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,  # Low temp keeps the analysis factual and consistent
-            max_tokens=400,
-        )
+        with tracing.span("llm.answer", prompt_chars=len(prompt)):
+            response = _get_client().chat.completions.create(
+                model=ANSWER_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You are an elite football tactical analyst. "
+                            "Always ground your answers in the match data and tactical concepts provided. "
+                            "Never fabricate statistics or events."
+                        ),
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.3,  # Low temp keeps the analysis factual and consistent
+                max_tokens=400,
+            )
+            tracing.record_usage(response)
         return response.choices[0].message.content
     except Exception as e:
-        return f"Error generating answer: {e}"
+        return f"{ANSWER_ERROR_PREFIX}: {e}"
+
+
+MAX_TOOL_ROUNDS = 4
+
+
+def answer_with_tools(
+    question: str,
+    tools,
+    home_team: str,
+    away_team: str,
+    home_score: int,
+    away_score: int,
+    retrieved_docs: list[str],
+    conversation_context: str = "",
+    client=None,
+) -> str:
+    """
+    Answers a match question in tool-calling mode.
+
+    Instead of the full stats JSON, the model gets the scoreline, the
+    retrieved tactical concepts and the analyst_tools.TOOL_SPECS. It then
+    fetches only the figures the question needs (window stats, player stats,
+    shots, possession chains), for up to MAX_TOOL_ROUNDS rounds. The round
+    after that is sent with tool_choice="none", so the model has to answer
+    from what it fetched. tools is an analyst_tools.AnalystTools. Its .calls
+    log records what was fetched.
+
+    client defaults to the OpenAI client. Pass analyst_tools.ScriptedClient
+    to run the loop offline.
+    """
+    from analyst_tools import TOOL_SPECS
+
+    client = client or _get_client()
+    retrieved_text = "\n\n---\n\n".join(retrieved_docs) if retrieved_docs else "None retrieved."
+    conversation_text = (f"\nConversation so far (use it to resolve follow-up questions):\n{conversation_context}\n"
+                         if conversation_context else "")
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are an elite football tactical analyst. You have tools that query this match's event data. "
+                "Call them for every figure you use, never fabricate statistics, and answer in 3–5 sentences "
+                "once you have what you need."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"""
+Match: {home_team} {home_score} – {away_score} {away_team} (La Liga 2018/19)
+
+Relevant Football Tactical Concepts (retrieved from knowledge base):
+{retrieved_text}
+{conversation_text}
+User Question:
+{question}
+""",
+        },
+    ]
+
+    try:
+        for round_no in range(MAX_TOOL_ROUNDS + 1):
+            with tracing.span("llm.tool_round", messages=len(messages)):
+                response = client.chat.completions.create(
+                    model=ANSWER_MODEL,
+                    messages=messages,
+                    tools=TOOL_SPECS,
+                    # Out of rounds: answer with what has been fetched
+                    tool_choice="auto" if round_no < MAX_TOOL_ROUNDS else "none",
+                    temperature=0.3,
+                    max_tokens=400,
+                )
+                if response.usage is not None:
+                    tracing.record_usage(response)
+            message = response.choices[0].message
+            if not message.tool_calls:
+                return message.content
+            if round_no == MAX_TOOL_ROUNDS:
+                break
+            messages.append({
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": [{"id": c.id, "type": "function",
+                                "function": {"name": c.function.name, "arguments": c.function.arguments}}
+                               for c in message.tool_calls],
+            })
+            for call in message.tool_calls:
+                with tracing.span("analyst.tool", tool=call.function.name):
+                    result = tools.execute(call.function.name, call.function.arguments)
+                messages.append({"role": "tool", "tool_call_id": call.id, "content": result})
+        return f"{ANSWER_ERROR_PREFIX}: too many tool calls without an answer."
+    except Exception as e:
+        return f"{ANSWER_ERROR_PREFIX}: {e}"
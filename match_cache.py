@@ -0,0 +1,209 @@
+"""
+match_cache.py
+--------------
+Process-wide, read-only cache of parsed matches.
+
+load_events / load_lineups use st.cache_data, which pickles the return value
+and hands every caller a fresh deserialised copy of the multi-thousand-event
+list on every rerun in every session. Here each match is parsed once into an
+immutable Match (events and lineups deep-frozen into read-only mappings and
+tuples) and the same object is shared by every session.
+
+The cache is an LRU bounded by an estimated memory budget, concurrent loads of
+the same match_id are coalesced into a single fetch (single-flight), and
+hit / miss / eviction counters are exposed via stats(). Values derived from a
+match (e.g. its compute_match_stats output) can be memoised alongside it with
+derived(); they are dropped when the match is evicted.
+
+A match that comes back without events (a failed fetch, or no data published
+yet) is remembered for EMPTY_MATCH_TTL_SECONDS only, so reruns don't refetch
+it every time but a later attempt can still succeed.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import streamlit as st
+
+import tracing
+
+# Parsed JSON costs several times its wire size as Python objects
+PY_OBJECT_OVERHEAD = 6
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+EMPTY_MATCH_TTL_SECONDS = 60.0
+
+
+def freeze(obj):
+    """Deep-freezes parsed JSON: dicts → read-only mappings, lists → tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+@dataclass(frozen=True)
+class Match:
+    """One match's events and lineups, immutable and safe to share across sessions."""
+    match_id: int
+    events: tuple
+    lineups: tuple
+    nbytes: int   # estimated in-memory size, used for the cache budget
+
+
+def load_match(match_id) -> Match:
+    """Fetches and freezes one match's events and lineups (no caching)."""
+    from data_processing import fetch_json
+
+    events, events_size = fetch_json(f"events/{match_id}.json")
+    lineups, lineups_size = fetch_json(f"lineups/{match_id}.json")
+    return Match(
+        match_id=match_id,
+        events=freeze(events or []),
+        lineups=freeze(lineups or []),
+        nbytes=(events_size + lineups_size) * PY_OBJECT_OVERHEAD,
+    )
+
+
+class MatchCache:
+    """Memory-budgeted LRU of Match objects with single-flight loading."""
+
+    def __init__(self, loader=load_match, max_bytes: int = MAX_CACHE_BYTES,
+                 empty_ttl: float = EMPTY_MATCH_TTL_SECONDS):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.empty_ttl = empty_ttl
+        self._matches: dict = {}          # insertion order doubles as LRU order
+        self._empty: dict = {}            # match_id -> (Match without events, expiry)
+        self._inflight: dict = {}         # match_id -> threading.Event
+        self._derived: dict = {}          # (match_id, key) -> value
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __contains__(self, match_id) -> bool:
+        with self._lock:
+            return match_id in self._matches
+
+    def get(self, match_id) -> Match:
+        """Returns the cached Match, loading it (once, however many callers) on a miss."""
+        while True:
+            with self._lock:
+                match = self._matches.pop(match_id, None)
+                if match is not None:
+                    self._matches[match_id] = match   # move to most-recent
+                    self.hits += 1
+                    tracing.record_cache("match", True)
+                    return match
+                empty = self._empty.get(match_id)
+                if empty is not None:
+                    if empty[1] > time.monotonic():
+                        self.hits += 1
+                        tracing.record_cache("match", True)
+                        return empty[0]
+                    del self._empty[match_id]
+                waiter = self._inflight.get(match_id)
+                if waiter is None:
+                    waiter = self._inflight[match_id] = threading.Event()
+                    self.misses += 1
+                    tracing.record_cache("match", False)
+                    break
+                self.coalesced += 1
+            # Another caller is already fetching this match — wait for it, then
+            # re-check (if its load failed we take over and try ourselves)
+            waiter.wait()
+
+        try:
+            match = self.loader(match_id)
+            self._store(match)
+            return match
+        finally:
+            with self._lock:
+                self._inflight.pop(match_id, None)
+            waiter.set()
+
+    def _store(self, match: Match):
+        with self._lock:
+            if not match.events:
+                # Possibly a failed fetch — keep it briefly, then retry
+                self._empty[match.match_id] = (match, time.monotonic() + self.empty_ttl)
+                return
+            if match.nbytes > self.max_bytes:
+                return  # too big to keep
+            self._matches[match.match_id] = match
+            self._bytes += match.nbytes
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._matches))
+                self._bytes -= self._matches.pop(oldest).nbytes
+                self._derived = {k: v for k, v in self._derived.items() if k[0] != oldest}
+                self.evictions += 1
+
+    def derived(self, match_id, key, compute):
+        """
+        Memoises compute(match) for a cached match — e.g. its match stats —
+        so it is computed once per process rather than on every rerun. The
+        result is shared across sessions and must be treated as read-only.
+        """
+        match = self.get(match_id)
+        with self._lock:
+            if (match_id, key) in self._derived:
+                tracing.record_cache("derived", True)
+                return self._derived[(match_id, key)]
+        tracing.record_cache("derived", False)
+        value = compute(match)
+        with self._lock:
+            if match_id in self._matches:
+                self._derived[(match_id, key)] = value
+        return value
+
+    def match_stats(self, match_id, home_team, away_team) -> dict:
+        """compute_match_stats for a cached match, computed once per process."""
+        from data_processing import compute_match_stats
+        return self.derived(
+            match_id, ("match_stats", home_team, away_team),
+            lambda m: compute_match_stats(m.events, home_team, away_team),
+        )
+
+    def columns(self, match_id):
+        """The match's events as season_archive.EventColumns, encoded once per process."""
+        from season_archive import encode_match
+        return self.derived(match_id, ("columns",), lambda m: encode_match(m.events))
+
+    def headroom(self) -> int:
+        """Bytes left before the next insert starts evicting."""
+        with self._lock:
+            return self.max_bytes - self._bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "matches": len(self._matches),
+                "empty": len(self._empty),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_match_cache() -> MatchCache:
+    """One cache per server process, shared (not copied) across every session."""
+    return MatchCache()
+
+
+def get_match(match_id) -> Match:
+    """Shortcut for get_match_cache().get(match_id)."""
+    return get_match_cache().get(match_id)
+
+
+def get_match_stats(match_id, home_team, away_team) -> dict:
+    """Shortcut for get_match_cache().match_stats(...)."""
+    return get_match_cache().match_stats(match_id, home_team, away_team)
@@ -0,0 +1,245 @@
+"""
+match_similarity.py
+-------------------
+"Games like this one": nearest-neighbour search over per-match feature
+vectors for the whole season.
+
+Every match in the season archive (season_archive.SeasonArchive) gets two
+rows, one from each team's perspective, holding the FEATURES below — the
+team's figures and its opponent's, its pressing metrics
+(tactical_metrics.py) and its share of the match's momentum (momentum.py).
+Counts come from one season-wide bincount per event type; the per-match
+models run once per match over zero-copy archive slices.
+
+Features are z-scored so that no single scale (passes in the hundreds, xG
+around 1) dominates the distance, and the normalised rows go into a flat L2
+FAISS index built with retriever.build_index — the same machinery as the
+knowledge base. A query is one exact search over ~760 rows, well under a
+millisecond.
+
+The raw feature table is cached on disk under .cache/similarity/ and rebuilt
+only when the archive (or the fixture list) changes. Without an archive the
+match page simply leaves the panel out.
+
+    python match_similarity.py               # build (or load) and print a sample query
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+SIMILARITY_DIR = Path(os.environ.get("SIMILARITY_DIR", Path(__file__).parent / ".cache" / "similarity"))
+
+SIMILAR_MATCHES = 5
+
+FEATURES = (
+    "goals", "goals_against",
+    "xg", "xg_against",
+    "shots", "shots_against",
+    "passes", "passes_against",
+    "pressures", "pressures_against",
+    "tackles", "tackles_against",
+    "ppda", "ppda_against",
+    "field_tilt_pct",
+    "momentum_share",
+)
+
+
+def _team_counts(archive, mask, weights=None) -> np.ndarray:
+    """(n_matches, n_teams) per-match, per-team totals of the masked rows."""
+    n_teams = len(archive.dictionaries["team"])
+    team = archive["team"]
+    mask = mask & (team >= 0)
+    slot = archive.match_index()[mask] * n_teams + team[mask]
+    totals = np.bincount(slot, weights=None if weights is None else weights[mask],
+                         minlength=len(archive.match_ids) * n_teams)
+    return totals.reshape(len(archive.match_ids), n_teams)
+
+
+def match_features(archive, fixtures: dict) -> dict:
+    """
+    Raw feature table for every archived match in fixtures
+    ({match_id: (home_team, away_team)}), two rows per match:
+
+        {"match_ids": (n,), "teams": (n,), "opponents": (n,), "features": (n, len(FEATURES))}
+
+    Metrics that are undefined for a match (e.g. PPDA with no defensive
+    actions) are NaN.
+    """
+    from momentum import match_momentum
+    from tactical_metrics import tactical_metrics
+
+    types, outcome = archive["type"], archive["outcome"]
+    shots = types == archive.code("type", "Shot")
+    tackles = (types == archive.code("type", "Duel")) & (archive["subtype"] == archive.code("subtype", "Tackle"))
+    own_goals = np.isin(types, archive.codes("type", ("Own Goal For",)))
+    goals = (shots & (outcome == archive.code("outcome", "Goal"))) | own_goals
+    counts = {
+        "goals": _team_counts(archive, goals),
+        "xg": _team_counts(archive, shots, np.nan_to_num(archive["xg"]).astype(np.float64)),
+        "shots": _team_counts(archive, shots),
+        "passes": _team_counts(archive, types == archive.code("type", "Pass")),
+        "pressures": _team_counts(archive, types == archive.code("type", "Pressure")),
+        "tackles": _team_counts(archive, tackles),
+    }
+
+    match_ids, teams, opponents, rows = [], [], [], []
+    for i, match_id in enumerate(archive.match_ids.tolist()):
+        if match_id not in fixtures:
+            continue
+        home, away = fixtures[match_id]
+        cols = archive.match(match_id)
+        tactical = tactical_metrics(cols, home, away)["teams"]
+        momentum = match_momentum(cols, home, away)
+        threat = {home: float(np.sum(momentum["home"])), away: float(np.sum(momentum["away"]))}
+
+        for team, opponent in ((home, away), (away, home)):
+            t, o = archive.code("team", team), archive.code("team", opponent)
+            row = {}
+            for name, by_team in counts.items():
+                row[name] = by_team[i, t] if t >= 0 else 0
+                row[f"{name}_against"] = by_team[i, o] if o >= 0 else 0
+            row["ppda"] = tactical[team]["ppda"]
+            row["ppda_against"] = tactical[opponent]["ppda"]
+            row["field_tilt_pct"] = tactical[team]["field_tilt_pct"]
+            total_threat = threat[team] + threat[opponent]
+            row["momentum_share"] = 100 * threat[team] / total_threat if total_threat else None
+            match_ids.append(match_id)
+            teams.append(team)
+            opponents.append(opponent)
+            rows.append([np.nan if row[f] is None else row[f] for f in FEATURES])
+
+    return {
+        "match_ids": np.array(match_ids, dtype=np.int64),
+        "teams": np.array(teams, dtype=str),
+        "opponents": np.array(opponents, dtype=str),
+        "features": np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES)),
+    }
+
+
+class MatchSimilarityIndex:
+    """z-scored match feature vectors in a flat L2 FAISS index, queried by (match_id, team)."""
+
+    def __init__(self, match_ids, teams, opponents, features):
+        from retriever import build_index
+
+        self.match_ids = np.asarray(match_ids)
+        self.teams = [str(t) for t in teams]
+        self.opponents = [str(o) for o in opponents]
+        self.features = np.asarray(features, dtype=np.float64)
+
+        # Undefined metrics count as average, so they neither attract nor repel
+        with np.errstate(invalid="ignore"):
+            self.mean = np.nan_to_num(np.nanmean(self.features, axis=0)) if len(self.features) else np.zeros(len(FEATURES))
+            std = np.nan_to_num(np.nanstd(self.features, axis=0)) if len(self.features) else np.ones(len(FEATURES))
+        self.std = np.where(std > 0, std, 1.0)
+        filled = np.where(np.isnan(self.features), self.mean, self.features)
+        self.vectors = ((filled - self.mean) / self.std).astype(np.float32)
+        self.index = build_index(self.vectors) if len(self.vectors) else None
+        self._rows = {(int(m), t): i for i, (m, t) in enumerate(zip(self.match_ids.tolist(), self.teams))}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key) -> bool:
+        return key in self._rows
+
+    def similar(self, match_id, team: str, k: int = SIMILAR_MATCHES) -> list[dict]:
+        """
+        The k matches closest to match_id as played by team, nearest first:
+
+            [{"match_id", "team", "opponent", "distance", "stats": {feature: value}}, ...]
+
+        team is the perspective of each result too — the side whose game was
+        most like team's. Each match appears at most once; empty if the match
+        is not in the index.
+        """
+        from retriever import search_index
+
+        row = self._rows.get((int(match_id), team))
+        if row is None:
+            return []
+        # Skipped hits (the query match, the second side of a match already
+        # taken) are at most k + 2 — over-fetch by that many
+        distances, indices = search_index(self.index, self.vectors[row], 2 * k + 2)
+        results, seen = [], {int(match_id)}
+        for distance, i in zip(distances[0].tolist(), indices[0].tolist()):
+            if i < 0 or int(self.match_ids[i]) in seen:
+                continue
+            seen.add(int(self.match_ids[i]))
+            results.append({
+                "match_id": int(self.match_ids[i]),
+                "team": self.teams[i],
+                "opponent": self.opponents[i],
+                "distance": round(float(distance), 3),
+                "stats": {f: (None if np.isnan(v) else round(float(v), 2))
+                          for f, v in zip(FEATURES, self.features[i].tolist())},
+            })
+            if len(results) == k:
+                break
+        return results
+
+
+def _cache_path(archive, fixtures: dict) -> Path:
+    fingerprint = json.dumps([str(archive.dir.resolve()), archive.manifest.get("built_at"),
+                              archive.manifest.get("n_events"), FEATURES,
+                              sorted([int(m), *teams] for m, teams in fixtures.items())])
+    return SIMILARITY_DIR / f"features-{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}.npz"
+
+
+def load_or_build_features(archive, fixtures: dict) -> dict:
+    """match_features from the on-disk cache, building (and caching) it on a miss."""
+    path = _cache_path(archive, fixtures)
+    if path.exists():
+        with np.load(path) as cached:
+            return {name: cached[name] for name in cached.files}
+    table = match_features(archive, fixtures)
+    SIMILARITY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, **table)
+    os.replace(tmp, path)
+    return table
+
+
+def season_fixtures(matches) -> dict:
+    """{match_id: (home_team, away_team)} from a load_match_list frame."""
+    if matches.empty:
+        return {}
+    return {int(m): (h, a) for m, h, a in zip(matches["match_id"], matches["home_team_name"],
+                                               matches["away_team_name"])}
+
+
+def _build_similarity_index(archive, comp_id, season_id):
+    from data_processing import load_match_list
+    fixtures = season_fixtures(load_match_list(comp_id, season_id))
+    return MatchSimilarityIndex(**load_or_build_features(archive, fixtures))
+
+
+def get_similarity_index(comp_id, season_id):
+    """The season's MatchSimilarityIndex, or None until its season archive is built (data_processing.season_model)."""
+    from data_processing import season_model
+    return season_model(comp_id, season_id, _build_similarity_index)
+
+
+if __name__ == "__main__":
+    import time
+
+    from data_processing import get_laliga_1819_info, load_match_list
+    from season_archive import open_season_archive
+
+    comp, season = get_laliga_1819_info()
+    season_archive = open_season_archive(comp, season)
+    if season_archive is None:
+        raise SystemExit("No season archive — build it first with `python season_archive.py`.")
+    similarity = MatchSimilarityIndex(**load_or_build_features(
+        season_archive, season_fixtures(load_match_list(comp, season))))
+    query_id, query_team = int(similarity.match_ids[0]), similarity.teams[0]
+    start = time.perf_counter()
+    neighbours = similarity.similar(query_id, query_team)
+    print(f"{len(similarity)} rows; matches like {query_team} in {query_id} "
+          f"({(time.perf_counter() - start) * 1000:.2f} ms):")
+    for n in neighbours:
+        print(f"  {n['match_id']}  {n['team']} vs {n['opponent']}  d={n['distance']}")
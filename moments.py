@@ -0,0 +1,262 @@
+"""
+moments.py
+----------
+Per-match index of "moments" — possession chains with short text and numeric
+summaries — retrieved into the answer prompt by relevance to the question.
+
+The knowledge base only holds generic tactical essays, and the match stats are
+the same whatever was asked. Here each possession chain in the match's
+season_archive.EventColumns becomes one moment, for example:
+
+    67:12–67:40 2nd half · Barcelona possession from a counter attack ·
+    6 passes · Messi, Alba, Suárez · reached the box ·
+    shot by Messi (xG 0.31) – Goal
+
+Chains with fewer than MIN_PASSES passes are skipped unless they contain a
+shot or a substitution. Per-chain counts come from np.add.reduceat over the
+chain boundaries. Only the text is assembled per chain.
+
+Moments are indexed lexically with BM25 (a few hundred short documents, so an
+inverted index in plain dicts, with plurals folded so "shots" finds "shot").
+There are no embedding calls on match load, and a query costs microseconds.
+Questions that name a minute ("after the 60th minute", "75'") also boost the
+moments around it, most for those closest to it. The index is built once per
+match per process (MatchCache.derived), and answer_match_question gets only
+the top MAX_MOMENTS hits. Those already give the minutes and players of what
+was asked about, so the stats block sent with them leaves out the
+15-minute breakdown and per-player lists (stats_alongside_moments).
+"""
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from momentum import BOX_X, BOX_Y_MAX, BOX_Y_MIN
+from tactical_metrics import FINAL_THIRD_X
+
+MIN_PASSES = 3
+MAX_MOMENTS = 4
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Prompt-stats entries the retrieved moments make redundant
+MOMENT_REDUNDANT_STATS = ("by_15_minutes",)
+MOMENT_REDUNDANT_TEAM_STATS = ("subs", "top_xt_players")
+
+MINUTE_BOOST = 2.0        # added to moments spanning a minute named in the question, tapering to
+MINUTE_WINDOW = 5         # 0 this many minutes away
+
+PATTERN_PHRASES = {
+    "Regular Play": "in open play",
+    "From Counter": "from a counter attack",
+    "From Corner": "from a corner set piece",
+    "From Free Kick": "from a free kick set piece",
+    "From Throw In": "from a throw in",
+    "From Goal Kick": "from a goal kick",
+    "From Keeper": "from the keeper",
+    "From Kick Off": "from the kick off",
+    "Other": "",
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has how in is it its of on or the their them "
+    "they this to was were what when where which who why with".split()
+)
+
+_MINUTE_PATTERNS = (
+    re.compile(r"\b(\d{1,3})(?:st|nd|rd|th)?\s*(?:'|’|min\b|mins\b|minute)"),
+    re.compile(r"\bminute\s+(\d{1,3})\b"),
+)
+
+
+def _stem(word: str) -> str:
+    """Folds plain English plurals ("shots", "passes", "penalties") onto the singular."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(w) for w in re.findall(r"\w+", text.lower()) if w not in STOPWORDS]
+
+
+def _clock(minute: int, second: int) -> str:
+    return f"{minute:02d}:{second:02d}"
+
+
+def match_moments(cols) -> list[dict]:
+    """
+    Possession-chain moments for one match's EventColumns, in match order:
+
+        {"start_minute", "end_minute", "start", "end", "period", "team",
+         "pattern", "passes", "events", "players", "reached_box", "shots",
+         "xg", "goals", "substitutions", "text"}
+    """
+    n = len(cols)
+    if not n:
+        return []
+    types, player, team = cols["type"], cols["player"], cols["team"]
+    possession, possession_team = np.asarray(cols["possession"]), cols["possession_team"]
+    minute, second, period = cols["minute"], cols["second"], cols["period"]
+    x, y, end_x, end_y = cols["x"], cols["y"], cols["end_x"], cols["end_y"]
+
+    starts = np.flatnonzero(np.r_[True, possession[1:] != possession[:-1]])
+    ends = np.r_[starts[1:], n]
+
+    own = team == possession_team
+    is_pass = (types == cols.code("type", "Pass")) & own
+    is_shot = types == cols.code("type", "Shot")
+    is_goal = is_shot & (cols["outcome"] == cols.code("outcome", "Goal"))
+    is_sub = types == cols.code("type", "Substitution")
+    with np.errstate(invalid="ignore"):
+        in_box = own & (((x >= BOX_X) & (y >= BOX_Y_MIN) & (y <= BOX_Y_MAX))
+                        | ((end_x >= BOX_X) & (end_y >= BOX_Y_MIN) & (end_y <= BOX_Y_MAX)))
+        in_final_third = own & ((x >= FINAL_THIRD_X) | (end_x >= FINAL_THIRD_X))
+
+    passes = np.add.reduceat(is_pass.astype(np.int64), starts)
+    shots = np.add.reduceat(is_shot.astype(np.int64), starts)
+    subs = np.add.reduceat(is_sub.astype(np.int64), starts)
+    box = np.add.reduceat(in_box.astype(np.int64), starts) > 0
+    final_third = np.add.reduceat(in_final_third.astype(np.int64), starts) > 0
+    keep = np.flatnonzero((passes >= MIN_PASSES) | (shots > 0) | (subs > 0))
+
+    moments = []
+    for c in keep.tolist():
+        s, e = int(starts[c]), int(ends[c])
+        rows = slice(s, e)
+        team_name = cols.decode("team", int(possession_team[s]))
+        pattern = cols.decode("play_pattern", int(cols["play_pattern"][s])) or "Other"
+        chain_players = player[rows][own[rows] & (player[rows] >= 0)]
+        names = [cols.decode("player", int(p)) for p, _ in Counter(chain_players.tolist()).most_common(3)]
+
+        shot_list = [
+            {"player": cols.decode("player", int(player[i])), "team": cols.decode("team", int(team[i])),
+             "xg": round(float(np.nan_to_num(cols["xg"][i])), 2),
+             "outcome": cols.decode("outcome", int(cols["outcome"][i]))}
+            for i in (s + np.flatnonzero(is_shot[rows])).tolist()
+        ]
+        sub_list = [
+            {"team": cols.decode("team", int(team[i])), "out": cols.decode("player", int(player[i])),
+             "in": cols.decode("related_player", int(cols["related_player"][i]))}
+            for i in (s + np.flatnonzero(is_sub[rows])).tolist()
+        ]
+        half = {1: "1st half", 2: "2nd half"}.get(int(period[s]), "extra time")
+
+        parts = [f"{_clock(int(minute[s]), int(second[s]))}–{_clock(int(minute[e - 1]), int(second[e - 1]))} {half}",
+                 f"{team_name} possession {PATTERN_PHRASES.get(pattern, pattern.lower())}".rstrip(),
+                 f"{int(passes[c])} pass" + ("" if passes[c] == 1 else "es")]
+        if names:
+            parts.append(", ".join(names))
+        if box[c]:
+            parts.append("reached the box")
+        elif final_third[c]:
+            parts.append("reached the final third")
+        parts += [f"shot by {sh['player']} (xG {sh['xg']:.2f}) – {sh['outcome'] or 'no outcome'}"
+                  for sh in shot_list]
+        parts += [f"substitution {sb['team']}: {sb['out']} off, {sb['in']} on" for sb in sub_list]
+
+        moments.append({
+            "start_minute": int(minute[s]),
+            "end_minute": int(minute[e - 1]),
+            "start": _clock(int(minute[s]), int(second[s])),
+            "end": _clock(int(minute[e - 1]), int(second[e - 1])),
+            "period": int(period[s]),
+            "team": team_name,
+            "pattern": pattern,
+            "passes": int(passes[c]),
+            "events": e - s,
+            "players": names,
+            "reached_box": bool(box[c]),
+            "shots": len(shot_list),
+            "xg": round(sum(sh["xg"] for sh in shot_list), 2),
+            "goals": int(is_goal[rows].sum()),
+            "substitutions": sub_list,
+            "text": " · ".join(parts),
+        })
+    return moments
+
+
+def question_minutes(question: str) -> list[int]:
+    """Match minutes named in a question ("in the 75th minute", "75'", "minute 75")."""
+    return sorted({int(m) for pattern in _MINUTE_PATTERNS for m in pattern.findall(question.lower())
+                   if int(m) <= 130})
+
+
+class MomentIndex:
+    """BM25 inverted index over a match's moments (plus a boost for minutes named in the question)."""
+
+    def __init__(self, moments: list[dict]):
+        self.moments = moments
+        docs = [tokenize(m["text"]) for m in moments]
+        self._lengths = np.array([len(d) for d in docs], dtype=np.float64)
+        self._avg_length = float(self._lengths.mean()) if len(docs) else 0.0
+        self._postings: dict = {}     # token -> ([doc ids], [term frequencies])
+        for doc_id, tokens in enumerate(docs):
+            for token, tf in Counter(tokens).items():
+                ids, tfs = self._postings.setdefault(token, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+        self._postings = {t: (np.array(ids), np.array(tfs, dtype=np.float64))
+                          for t, (ids, tfs) in self._postings.items()}
+        self._start = np.array([m["start_minute"] for m in moments])
+        self._end = np.array([m["end_minute"] for m in moments])
+
+    def __len__(self) -> int:
+        return len(self.moments)
+
+    def scores(self, question: str) -> np.ndarray:
+        """BM25 score of every moment for the question, plus the boost near named minutes."""
+        n = len(self.moments)
+        scores = np.zeros(n)
+        if not n:
+            return scores
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths / self._avg_length)
+        for token in set(tokenize(question)):
+            if token not in self._postings:
+                continue
+            ids, tfs = self._postings[token]
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[ids])
+        for minute in question_minutes(question):
+            distance = np.maximum(np.maximum(self._start - minute, minute - self._end), 0)
+            scores += MINUTE_BOOST * np.clip(1 - distance / (MINUTE_WINDOW + 1), 0, None)
+        return scores
+
+    def search(self, question: str, k: int = MAX_MOMENTS) -> list[dict]:
+        """The k best-matching moments (score > 0), returned in match order."""
+        scores = self.scores(question)
+        top = [i for i in np.argsort(-scores, kind="stable")[:k].tolist() if scores[i] > 0]
+        return [self.moments[i] for i in sorted(top)]
+
+
+def get_moment_index(match_id, cache=None) -> MomentIndex:
+    """MomentIndex for a cached match, built once per process (read-only)."""
+    if cache is None:
+        from match_cache import get_match_cache
+        cache = get_match_cache()
+    return cache.derived(
+        match_id, ("moments",),
+        lambda m: MomentIndex(match_moments(cache.columns(match_id))),
+    )
+
+
+def stats_alongside_moments(prompt_stats: dict) -> dict:
+    """
+    A copy of the prompt stats (tactical_metrics.with_tactical_metrics /
+    expected_threat.with_expected_threat) without MOMENT_REDUNDANT_STATS and
+    each team's MOMENT_REDUNDANT_TEAM_STATS, for prompts that carry moments.
+    """
+    return {
+        key: ({k: v for k, v in value.items() if k not in MOMENT_REDUNDANT_TEAM_STATS}
+              if isinstance(value, dict) and key != "metric_notes" else value)
+        for key, value in prompt_stats.items()
+        if key not in MOMENT_REDUNDANT_STATS
+    }
@@ -0,0 +1,175 @@
+"""
+momentum.py
+-----------
+Per-second momentum signal and automatic turning-point detection.
+
+Each team's threat is a per-second impulse series built from weighted
+events — shot xG, entries into the opponent's box and pressures in the
+opponent's half (MOMENTUM_WEIGHTS). The series is smoothed with an
+exponential kernel (np.convolve), and the net signal (home − away) drives
+the event-timeline overlay.
+
+Turning points are the moments where the balance shifted most. For every
+second, the mean net impulse over the CHANGE_WINDOW_MINUTES after it is
+compared with the mean over the same span before it (two cumulative-sum
+lookups). The largest swings, at least MIN_GAP_MINUTES apart, are ranked and
+returned as windows. Each window lists its goals, substitutions, shots and xG,
+so the LLM gets facts rather than having to guess when the match turned.
+
+StatsBomb minutes run on across periods, so first-half stoppage time
+overlaps the first minutes of the second half. That is harmless at this
+resolution.
+"""
+
+import numpy as np
+
+MOMENTUM_WEIGHTS = {
+    "xg": 1.0,              # per unit of shot xG
+    "box_entry": 0.04,      # completed pass / carry into the opponent's box
+    "pressure": 0.01,       # pressure in the opponent's half
+}
+
+HALF_LIFE_SECONDS = 180
+CHANGE_WINDOW_MINUTES = 8
+MIN_GAP_MINUTES = 10
+MAX_TURNING_POINTS = 3
+
+# Opponent's penalty area in StatsBomb coordinates (attacking towards x = 120)
+BOX_X, BOX_Y_MIN, BOX_Y_MAX = 102.0, 18.0, 62.0
+HALFWAY_X = 60.0
+
+
+def _in_box(x, y):
+    with np.errstate(invalid="ignore"):
+        return (x >= BOX_X) & (y >= BOX_Y_MIN) & (y <= BOX_Y_MAX)
+
+
+def _impulses(cols, team_code: int, n_seconds: int, clock) -> np.ndarray:
+    """One team's weighted event impulses per second of the match clock (zero for a team not in the match)."""
+    impulses = np.zeros(n_seconds)
+    if team_code < 0:
+        # -1 is also the code of events without a team
+        return impulses
+    types, team, x, y = cols["type"], cols["team"], cols["x"], cols["y"]
+    own = team == team_code
+
+    shots = own & (types == cols.code("type", "Shot"))
+    is_pass = types == cols.code("type", "Pass")
+    is_carry = types == cols.code("type", "Carry")
+    completed = (is_pass & (cols["outcome"] == -1)) | is_carry
+    box_entries = own & completed & _in_box(cols["end_x"], cols["end_y"]) & ~_in_box(x, y)
+    with np.errstate(invalid="ignore"):
+        pressures = own & (types == cols.code("type", "Pressure")) & (x >= HALFWAY_X)
+
+    np.add.at(impulses, clock[shots], np.nan_to_num(cols["xg"][shots]) * MOMENTUM_WEIGHTS["xg"])
+    np.add.at(impulses, clock[box_entries], MOMENTUM_WEIGHTS["box_entry"])
+    np.add.at(impulses, clock[pressures], MOMENTUM_WEIGHTS["pressure"])
+    return impulses
+
+
+def _smooth(impulses: np.ndarray) -> np.ndarray:
+    """Causal exponential smoothing, scaled to threat per minute."""
+    tau = HALF_LIFE_SECONDS / np.log(2)
+    kernel = np.exp(-np.arange(int(5 * tau)) / tau)
+    kernel *= 60 / kernel.sum()
+    return np.convolve(impulses, kernel)[:len(impulses)]
+
+
+def _window_facts(cols, clock, start_s: int, end_s: int, home_team: str, away_team: str) -> dict:
+    """Goals, substitutions, shots and xG per team between two clock seconds."""
+    types, team = cols["type"], cols["team"]
+    inside = (clock >= start_s) & (clock < end_s)
+    shots = inside & (types == cols.code("type", "Shot"))
+    goals = shots & (cols["outcome"] == cols.code("outcome", "Goal"))
+    subs = inside & (types == cols.code("type", "Substitution"))
+
+    facts = {"shots": {}, "xg": {}}
+    for t in (home_team, away_team):
+        code = cols.code("team", t)
+        own = team == code if code >= 0 else np.zeros(len(team), dtype=bool)
+        facts["shots"][t] = int((shots & own).sum())
+        facts["xg"][t] = round(float(np.nansum(cols["xg"][shots & own])), 2)
+    facts["goals"] = [
+        {"minute": int(cols["minute"][i]), "team": cols.decode("team", int(team[i])),
+         "player": cols.decode("player", int(cols["player"][i]))}
+        for i in np.flatnonzero(goals)
+    ]
+    facts["substitutions"] = [
+        {"minute": int(cols["minute"][i]), "team": cols.decode("team", int(team[i])),
+         "out": cols.decode("player", int(cols["player"][i])),
+         "in": cols.decode("related_player", int(cols["related_player"][i]))}
+        for i in np.flatnonzero(subs)
+    ]
+    return facts
+
+
+def match_momentum(cols, home_team: str, away_team: str) -> dict:
+    """
+    Momentum model for one match's EventColumns:
+
+        {"minutes": [0, 1, ...], "home": [...], "away": [...], "net": [...],
+         "turning_points": [{rank, minute, start_minute, end_minute, team,
+                             swing, shots, xg, goals, substitutions}, ...]}
+
+    home / away / net are the smoothed threat per minute sampled at the end
+    of each minute. Turning points are ranked by swing, largest first; team is
+    the side the momentum swung towards.
+    """
+    clock = np.asarray(cols.clock())
+    valid = clock >= 0
+    if not valid.any():
+        return {"minutes": [], "home": [], "away": [], "net": [], "turning_points": []}
+    n_minutes = int(clock[valid].max()) // 60 + 1
+    n_seconds = n_minutes * 60
+    clock = np.where(valid, clock, 0)
+
+    home = _impulses(cols, cols.code("team", home_team), n_seconds, clock)
+    away = _impulses(cols, cols.code("team", away_team), n_seconds, clock)
+    home_smooth, away_smooth = _smooth(home), _smooth(away)
+    sample = np.arange(n_minutes) * 60 + 59
+
+    # Mean net impulse in the window after each minute boundary minus the
+    # window before it, from one cumulative sum
+    window = CHANGE_WINDOW_MINUTES * 60
+    cumulative = np.concatenate(([0.0], np.cumsum(home - away)))
+    boundaries = np.arange(CHANGE_WINDOW_MINUTES, n_minutes - CHANGE_WINDOW_MINUTES + 1) * 60
+    after = cumulative[boundaries + window] - cumulative[boundaries]
+    before = cumulative[boundaries] - cumulative[boundaries - window]
+    swing = (after - before) * (60 / window)          # change in net threat per minute
+
+    # Largest swings first, skipping any within MIN_GAP_MINUTES of one already taken
+    turning_points = []
+    for i in np.argsort(-np.abs(swing), kind="stable"):
+        if len(turning_points) == MAX_TURNING_POINTS or swing[i] == 0:
+            break
+        minute = int(boundaries[i] // 60)
+        if any(abs(minute - tp["minute"]) < MIN_GAP_MINUTES for tp in turning_points):
+            continue
+        turning_points.append({
+            "rank": len(turning_points) + 1,
+            "minute": minute,
+            "start_minute": minute,
+            "end_minute": minute + CHANGE_WINDOW_MINUTES,
+            "team": home_team if swing[i] > 0 else away_team,
+            "swing": round(float(abs(swing[i])), 3),
+            **_window_facts(cols, clock, int(boundaries[i]), int(boundaries[i]) + window, home_team, away_team),
+        })
+
+    return {
+        "minutes": list(range(n_minutes)),
+        "home": np.round(home_smooth[sample], 4).tolist(),
+        "away": np.round(away_smooth[sample], 4).tolist(),
+        "net": np.round(home_smooth[sample] - away_smooth[sample], 4).tolist(),
+        "turning_points": turning_points,
+    }
+
+
+def get_momentum(match_id, home_team: str, away_team: str, cache=None) -> dict:
+    """match_momentum for a cached match, computed once per process (read-only)."""
+    if cache is None:
+        from match_cache import get_match_cache
+        cache = get_match_cache()
+    return cache.derived(
+        match_id, ("momentum", home_team, away_team),
+        lambda m: match_momentum(cache.columns(match_id), home_team, away_team),
+    )
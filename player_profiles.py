@@ -0,0 +1,275 @@
+"""
+player_profiles.py
+------------------
+Season per-90 player profiles and a "who plays like X" index.
+
+compute_match_stats keeps only each team's top names, so nothing in a match
+answer says whether 60 passes is a lot for that player. Here every player's
+season is aggregated from the season archive (season_archive.SeasonArchive)
+into one dense matrix, one row per player, with PROFILE_FEATURES per 90
+minutes:
+
+    passes, shots, xg, pressures, tackles   event counts (xg summed)
+    touches_*_third                         located events, by pitch third
+
+Minutes come from the substitutions: a player is on from kick-off (or the
+minute they came on) until the final whistle (or the minute they went off).
+Red cards are not modelled. Counts and minutes are season-wide bincounts over
+player codes; there are no per-match loops, so the store builds at startup in
+well under a second and needs no disk cache.
+
+Only players with at least MIN_MINUTES are profiled, so per-90 rates are not
+dominated by cameo appearances. Each profile carries season percentiles
+among those players. The z-scored rows go into a flat L2 FAISS index
+(retriever.build_index) for instant similar-player queries. For player_impact
+questions the profiles of the players named in the question are added to the
+LLM prompt (profiles_for_prompt).
+
+    python player_profiles.py "Messi"        # profile + most similar players
+"""
+
+import re
+
+import numpy as np
+
+PROFILE_FEATURES = (
+    "passes", "shots", "xg", "pressures", "tackles",
+    "touches_defensive_third", "touches_middle_third", "touches_final_third",
+)
+
+MIN_MINUTES = 450
+SIMILAR_PLAYERS = 3
+MAX_PROMPT_PLAYERS = 4
+
+PITCH_LENGTH = 120.0
+
+
+def _minutes_played(archive, n_players: int) -> tuple[np.ndarray, np.ndarray]:
+    """(minutes, appearances) per player code, from substitutions and each match's last minute."""
+    match_index = archive.match_index()
+    player, minute = archive["player"], np.asarray(archive["minute"], dtype=np.int64)
+    non_empty = np.diff(archive.offsets) > 0
+    match_end = np.zeros(len(archive.match_ids), dtype=np.int64)
+    match_end[non_empty] = np.maximum.reduceat(minute, archive.offsets[:-1][non_empty])
+
+    # Everyone with an event plays; substitutes with none still played
+    subs = np.flatnonzero(archive["type"] == archive.code("type", "Substitution"))
+    on = archive["related_player"][subs]
+    sub_on, sub_off = subs[on >= 0], subs[player[subs] >= 0]
+    appeared = match_index[player >= 0] * n_players + player[player >= 0]
+    pairs = np.unique(np.concatenate([appeared, match_index[sub_on] * n_players + on[on >= 0]]))
+
+    start = np.zeros(len(pairs), dtype=np.int64)
+    end = match_end[pairs // n_players]
+    start[np.searchsorted(pairs, match_index[sub_on] * n_players + on[on >= 0])] = minute[sub_on]
+    end[np.searchsorted(pairs, match_index[sub_off] * n_players + player[sub_off])] = minute[sub_off]
+    played = np.clip(end - start, 0, None)
+
+    codes = pairs % n_players
+    return (np.bincount(codes, weights=played, minlength=n_players),
+            np.bincount(codes, minlength=n_players))
+
+
+def season_player_profiles(archive) -> dict:
+    """
+    Per-90 profile matrix for every player with at least MIN_MINUTES:
+
+        {"players": [...], "teams": [...], "minutes": (n,), "matches": (n,),
+         "per90": (n, len(PROFILE_FEATURES))}
+
+    teams is the team each player made most events for.
+    """
+    n_players = len(archive.dictionaries["player"])
+    n_teams = len(archive.dictionaries["team"])
+    types, player, team, x = archive["type"], archive["player"], archive["team"], archive["x"]
+    has_player = player >= 0
+
+    def per_player(mask, weights=None):
+        mask = mask & has_player
+        return np.bincount(player[mask], weights=None if weights is None else weights[mask],
+                           minlength=n_players).astype(np.float64)
+
+    shots = types == archive.code("type", "Shot")
+    tackles = (types == archive.code("type", "Duel")) & (archive["subtype"] == archive.code("subtype", "Tackle"))
+    with np.errstate(invalid="ignore"):
+        thirds = np.floor(x * (3 / PITCH_LENGTH))
+    counts = {
+        "passes": per_player(types == archive.code("type", "Pass")),
+        "shots": per_player(shots),
+        "xg": per_player(shots, np.nan_to_num(archive["xg"]).astype(np.float64)),
+        "pressures": per_player(types == archive.code("type", "Pressure")),
+        "tackles": per_player(tackles),
+        "touches_defensive_third": per_player(thirds == 0),
+        "touches_middle_third": per_player(thirds == 1),
+        "touches_final_third": per_player(thirds >= 2),
+    }
+
+    minutes, matches = _minutes_played(archive, n_players)
+    rows = np.flatnonzero(minutes >= MIN_MINUTES)
+
+    by_team = np.bincount(player[has_player & (team >= 0)] * n_teams + team[has_player & (team >= 0)],
+                          minlength=n_players * n_teams).reshape(n_players, n_teams)
+    per90 = np.column_stack([counts[f][rows] for f in PROFILE_FEATURES]) * (90 / minutes[rows, None])
+    return {
+        "players": archive.decode("player", rows),
+        "teams": archive.decode("team", by_team[rows].argmax(axis=1)) if n_teams else [None] * len(rows),
+        "minutes": minutes[rows].astype(np.int64),
+        "matches": matches[rows].astype(np.int64),
+        "per90": per90.reshape(len(rows), len(PROFILE_FEATURES)),
+    }
+
+
+def _average_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    0-based rank of each value within its column, ties sharing their average
+    rank (scipy.stats.rankdata's "average", minus one). A plain argsort rank
+    would spread a block of tied values — every defender with 0 shots — over
+    the whole percentile range.
+    """
+    ranks = np.empty(values.shape, dtype=np.float64)
+    n = len(values)
+    for j in range(values.shape[1]):
+        order = values[:, j].argsort(kind="stable")
+        ordered = values[order, j]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        ranks[order, j] = np.repeat((starts + ends) / 2, ends - starts + 1)
+    return ranks
+
+
+class PlayerProfileIndex:
+    """Per-90 profiles with season percentiles and a FAISS index over the z-scored rows."""
+
+    def __init__(self, players, teams, minutes, matches, per90):
+        from retriever import build_index
+
+        self.players = list(players)
+        self.teams = list(teams)
+        self.minutes = np.asarray(minutes)
+        self.matches = np.asarray(matches)
+        self.per90 = np.asarray(per90, dtype=np.float64)
+        self._rows = {name: i for i, name in enumerate(self.players)}
+
+        n = len(self.players)
+        # Percentile of each value within its column (0 = lowest, 100 = highest)
+        self.percentiles = 100 * _average_ranks(self.per90) / max(n - 1, 1)
+        std = self.per90.std(axis=0) if n else np.ones(len(PROFILE_FEATURES))
+        std = np.where(std > 0, std, 1.0)
+        self.vectors = ((self.per90 - self.per90.mean(axis=0)) / std).astype(np.float32) if n else None
+        self.index = build_index(self.vectors) if n else None
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, player) -> bool:
+        return player in self._rows
+
+    def profile(self, player: str) -> dict | None:
+        """{player, team, minutes, matches, per90: {feature: value}, percentile: {feature: 0–100}}, or None."""
+        i = self._rows.get(player)
+        if i is None:
+            return None
+        return {
+            "player": player,
+            "team": self.teams[i],
+            "minutes": int(self.minutes[i]),
+            "matches": int(self.matches[i]),
+            "per90": {f: round(float(v), 2) for f, v in zip(PROFILE_FEATURES, self.per90[i])},
+            "percentile": {f: int(round(float(p))) for f, p in zip(PROFILE_FEATURES, self.percentiles[i])},
+        }
+
+    def similar(self, player: str, k: int = SIMILAR_PLAYERS) -> list[dict]:
+        """The k players with the closest per-90 profile: [{"player", "team", "distance"}, ...]."""
+        from retriever import search_index
+
+        i = self._rows.get(player)
+        if i is None:
+            return []
+        distances, indices = search_index(self.index, self.vectors[i], k + 1)
+        return [
+            {"player": self.players[j], "team": self.teams[j], "distance": round(float(d), 3)}
+            for d, j in zip(distances[0].tolist(), indices[0].tolist())
+            if j >= 0 and j != i
+        ][:k]
+
+    def compare(self, player_a: str, player_b: str) -> dict | None:
+        """Both profiles plus the per-90 difference (a − b), or None if either is unknown."""
+        a, b = self.profile(player_a), self.profile(player_b)
+        if a is None or b is None:
+            return None
+        return {"a": a, "b": b,
+                "difference": {f: round(a["per90"][f] - b["per90"][f], 2) for f in PROFILE_FEATURES}}
+
+
+def players_in_question(question: str, candidates) -> list[str]:
+    """
+    The candidate names mentioned in a question, in candidate order. A name
+    matches on any word of four letters or more ("Messi" finds "Lionel
+    Andrés Messi Cuccittini"), so short particles like "de" never match.
+    A name whose matched words are only part of another's is dropped:
+    "Sergio Busquets" finds Sergio Busquets, not Sergio Ramos as well.
+    """
+    words = set(re.findall(r"\w+", question.lower()))
+    hits = {}
+    for name in dict.fromkeys(candidates):
+        if name:
+            matched = frozenset(w for w in re.findall(r"\w+", name.lower()) if len(w) >= 4 and w in words)
+            if matched:
+                hits[name] = matched
+    return [name for name, matched in hits.items()
+            if not any(matched < other for other in hits.values())]
+
+
+def profiles_for_prompt(profiles: PlayerProfileIndex, players, k: int = SIMILAR_PLAYERS) -> list[dict]:
+    """Season profiles (with their k most similar players) for up to MAX_PROMPT_PLAYERS known players."""
+    grounded = []
+    for player in players:
+        profile = profiles.profile(player)
+        if profile is None:
+            continue
+        profile["similar_players"] = [s["player"] for s in profiles.similar(player, k)]
+        grounded.append(profile)
+        if len(grounded) == MAX_PROMPT_PLAYERS:
+            break
+    return grounded
+
+
+def question_profiles(profiles: PlayerProfileIndex, question: str, squad, match_stats: dict,
+                      home_team: str, away_team: str) -> list[dict]:
+    """
+    Prompt profiles for a player_impact question: the squad players it names,
+    or each team's top two involved players if it names none.
+    """
+    named = players_in_question(question, squad) or [
+        p for t in (home_team, away_team) for p in match_stats[t]["top_players"][:2]
+    ]
+    return profiles_for_prompt(profiles, named)
+
+
+def _build_player_profiles(archive, comp_id, season_id):
+    return PlayerProfileIndex(**season_player_profiles(archive))
+
+
+def get_player_profiles(comp_id, season_id):
+    """The season's PlayerProfileIndex, or None until its season archive is built (data_processing.season_model)."""
+    from data_processing import season_model
+    return season_model(comp_id, season_id, _build_player_profiles)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from data_processing import get_laliga_1819_info
+    from season_archive import open_season_archive
+
+    comp, season = get_laliga_1819_info()
+    season_archive = open_season_archive(comp, season)
+    if season_archive is None:
+        raise SystemExit("No season archive — build it first with `python season_archive.py`.")
+    index = PlayerProfileIndex(**season_player_profiles(season_archive))
+    query = " ".join(sys.argv[1:]) or "Messi"
+    names = players_in_question(query, index.players)
+    if not names:
+        raise SystemExit(f"No profiled player matches {query!r} ({len(index)} players with {MIN_MINUTES}+ minutes).")
+    print(json.dumps(profiles_for_prompt(index, names[:1]), indent=2, ensure_ascii=False))
@@ -0,0 +1,129 @@
+"""
+prefetch.py
+-----------
+Predictive prefetch of the matches a user is likely to open next.
+
+While the user is on the match list or a match page, the most likely next
+matches — the top rows of the visible list, or the fixtures either side of
+the open match by date — are warmed in a small background thread pool:
+events and lineups (match_cache), match stats (match_cache.derived) and the
+rendered charts (render_scheduler). Opening one of them then skips the
+fetch / parse / compute / draw latency.
+
+Prefetching is strictly opportunistic: it is capped at a few concurrent
+matches, never evicts to make room (it stops when the match cache is close to
+its memory budget), and only queues charts when the render pool is idle, so
+it never delays what the user is actually looking at.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+PREFETCH_WORKERS = 2
+PREFETCH_CANDIDATES = 3
+
+# Don't prefetch once the match cache has less free budget than this
+PREFETCH_MIN_HEADROOM = 64 * 1024 * 1024
+
+
+def prefetch_candidates(fixtures, current_match_id=None, limit: int = PREFETCH_CANDIDATES) -> list[tuple]:
+    """
+    Likely-next matches as (match_id, home_team, away_team) tuples.
+
+    fixtures is the team's date-sorted fixture list (data_processing.team_fixtures,
+    or the visible page of it). On a match page the neighbours by date come
+    first, nearest first; on the list it is simply the top rows.
+    """
+    if fixtures is None or fixtures.empty:
+        return []
+    rows = list(fixtures[["match_id", "home_team_name", "away_team_name"]].itertuples(index=False, name=None))
+
+    if current_match_id is None:
+        return rows[:limit]
+
+    ids = [r[0] for r in rows]
+    if current_match_id not in ids:
+        return rows[:limit]
+    pos = ids.index(current_match_id)
+    ordered = []
+    for offset in range(1, len(rows)):
+        for i in (pos - offset, pos + offset):
+            if 0 <= i < len(rows):
+                ordered.append(rows[i])
+        if len(ordered) >= limit:
+            break
+    return ordered[:limit]
+
+
+class Prefetcher:
+    """Warms matches, stats and charts for likely-next matches in the background."""
+
+    def __init__(self, match_cache, render_scheduler, max_workers: int = PREFETCH_WORKERS,
+                 min_headroom: int = PREFETCH_MIN_HEADROOM):
+        self.match_cache = match_cache
+        self.render_scheduler = render_scheduler
+        self.min_headroom = min_headroom
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self.warmed = 0
+        self.skipped = 0
+
+    def prefetch(self, candidates: list[tuple], render_charts: bool = True, xt_grid=None):
+        """
+        Queues every candidate that is not already cached or being warmed.
+        xt_grid (expected_threat.get_xt_grid) is needed for the involvement
+        chart to match the one rendered on the match page.
+        """
+        for match_id, home_team, away_team in candidates:
+            with self._lock:
+                if match_id in self._inflight or match_id in self.match_cache:
+                    continue
+                if self.match_cache.headroom() < self.min_headroom:
+                    self.skipped += 1
+                    return
+                self._inflight.add(match_id)
+            self._executor.submit(self._warm, match_id, home_team, away_team, render_charts, xt_grid)
+
+    def _warm(self, match_id, home_team, away_team, render_charts: bool, xt_grid=None):
+        from expected_threat import get_player_xt
+        from momentum import get_momentum
+        from chart_cache import chart_grounding
+        from render_scheduler import match_chart_models, chart_jobs
+
+        try:
+            match = self.match_cache.get(match_id)
+            if not match.events:
+                return
+            match_stats = self.match_cache.match_stats(match_id, home_team, away_team)
+            # Charts are the most expensive part — only queue them while the
+            # render pool has nothing in flight for a real page view
+            if render_charts and self.render_scheduler.pending() == 0:
+                player_xt = (get_player_xt(match_id, xt_grid, home_team, away_team, self.match_cache)
+                             if xt_grid is not None else None)
+                momentum = get_momentum(match_id, home_team, away_team, self.match_cache)
+                models = match_chart_models(match.events, match.lineups, home_team, away_team,
+                                            match_stats, player_xt, momentum)
+                self.render_scheduler.schedule(match_id, chart_jobs(models),
+                                               grounding=chart_grounding(player_xt, momentum))
+            with self._lock:
+                self.warmed += 1
+        except Exception:
+            pass  # speculative work — a failure here must never surface to the user
+        finally:
+            with self._lock:
+                self._inflight.discard(match_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"inflight": len(self._inflight), "warmed": self.warmed, "skipped": self.skipped}
+
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    """One prefetch pool per server process, sharing the match cache and render scheduler."""
+    from match_cache import get_match_cache
+    from render_scheduler import get_render_scheduler
+    return Prefetcher(get_match_cache(), get_render_scheduler())
@@ -0,0 +1,205 @@
+"""
+profiling.py
+------------
+On-demand cProfile + tracemalloc capture for a single rerun or question.
+
+Profiling is off by default. On a replica started with APP_PROFILE_URL=1 it
+can be switched on per request, without a redeploy:
+
+    ?profile=rerun      profile this whole app rerun (``?profile=1`` also works)
+    ?profile=question   profile the next question pipeline on this page
+
+The parameter is dropped from the URL once its capture is taken, so it costs
+one capture, not every later rerun. The APP_PROFILE environment variable (same
+values) profiles every request on a replica. Each capture writes to
+PROFILE_DIR (default ./profiles):
+
+    <timestamp>-<label>.txt   top-N hot functions (repo code first, then
+                              everything) and top-N allocation sites
+    <timestamp>-<label>.prof  raw pstats, for snakeviz / pstats
+
+Only the newest MAX_PROFILES captures are kept. tracemalloc (and cProfile,
+from Python 3.12) is process-wide, so one capture runs at a time: a request
+made while another session is capturing is skipped rather than queued. cProfile only sees the thread
+it was enabled on (the script thread); charts drawn in render_service worker
+processes are not included, which is why app.py re-runs the chart data
+extraction inline while a rerun is being profiled.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", Path(__file__).parent / "profiles"))
+MAX_PROFILES = 20
+TOP_N = 25
+
+# Stack depth kept per allocation — enough to see which repo function allocated
+TRACEMALLOC_FRAMES = 10
+
+_REPO_DIR = str(Path(__file__).parent.resolve())
+
+# Held from start() to stop() of the capture in progress
+_CAPTURE_LOCK = threading.Lock()
+
+PROFILE_MODES = ("rerun", "question")
+
+# Anyone who can reach the app can set a query parameter, so ?profile= is
+# only honoured where it has been switched on
+URL_PROFILING = os.environ.get("APP_PROFILE_URL", "").strip().lower() in ("1", "true", "yes")
+
+
+def requested_mode(query_params=None) -> str | None:
+    """
+    The profiling mode asked for by ?profile=... (with $APP_PROFILE_URL set) or
+    $APP_PROFILE, or None. "1" / "true" mean "rerun".
+    """
+    value = None
+    if query_params is not None and URL_PROFILING:
+        value = query_params.get("profile")
+    value = (value or os.environ.get("APP_PROFILE") or "").strip().lower()
+    if value in ("1", "true", "yes"):
+        return "rerun"
+    return value if value in PROFILE_MODES else None
+
+
+def clear_request(query_params):
+    """Drops ?profile= once its capture is taken, so later reruns run unprofiled."""
+    if "profile" in query_params:
+        del query_params["profile"]
+
+
+class ProfileSession:
+    """
+    One cProfile + tracemalloc capture. Use as a context manager, or
+    start()/stop(). skipped is True when another capture was already running.
+    """
+
+    def __init__(self, label: str, top_n: int = TOP_N):
+        self.label = label
+        self.top_n = top_n
+        self.report_path = None
+        self.skipped = False
+        self._profiler = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self._t0 = None
+
+    def start(self) -> "ProfileSession":
+        if not _CAPTURE_LOCK.acquire(blocking=False):
+            self.skipped = True
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._t0 = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def stop(self) -> Path:
+        """
+        Stops the capture, writes the report and returns its path (once; later
+        calls just return it). None if the capture was skipped.
+        """
+        if self._t0 is None or self.report_path is not None:
+            return self.report_path
+        try:
+            self._profiler.disable()
+            wall = time.perf_counter() - self._t0
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+            self.report_path = _write_report(self.label, self._profiler, snapshot, wall, peak, self.top_n)
+        finally:
+            self._t0 = None
+            _CAPTURE_LOCK.release()
+        return self.report_path
+
+    def summary(self) -> str:
+        """One line for the page: where the report went, or why there is none."""
+        if self.skipped:
+            return "Profile skipped — another capture is running"
+        return f"Profile saved to `{self.report_path}`"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def _hot_functions(profiler, top_n: int, repo_only: bool) -> str:
+    buf = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buf).sort_stats("cumulative")
+    if repo_only:
+        # pstats restrictions are regexes over "file:line(function)"
+        stats.print_stats(_REPO_DIR.replace("\\", "\\\\"), top_n)
+    else:
+        stats.print_stats(top_n)
+    return buf.getvalue()
+
+
+def _allocation_sites(snapshot, top_n: int) -> str:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    lines = []
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+
+    # The same allocations attributed to the innermost repo frame, so library
+    # internals (pandas, json) are charged to the repo code that called them
+    by_repo_line = {}
+    for stat in snapshot.statistics("traceback"):
+        frame = next((f for f in stat.traceback if f.filename.startswith(_REPO_DIR)), None)
+        if frame is None:
+            continue
+        key = (frame.filename, frame.lineno)
+        size, count = by_repo_line.get(key, (0, 0))
+        by_repo_line[key] = (size + stat.size, count + stat.count)
+    repo_lines = [
+        f"{size / 1024:10.1f} KiB {count:8d} blocks  {os.path.relpath(name, _REPO_DIR)}:{lineno}"
+        for (name, lineno), (size, count) in sorted(by_repo_line.items(), key=lambda kv: -kv[1][0])[:top_n]
+    ]
+    return "\n".join(["Repo code (including allocations made by libraries it called):", *repo_lines,
+                      "", "All sites:", *lines])
+
+
+def _write_report(label, profiler, snapshot, wall, peak, top_n) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{label}"
+    profiler.dump_stats(PROFILE_DIR / f"{stem}.prof")
+
+    report = "\n".join([
+        f"Profile: {label}",
+        f"Wall time: {wall * 1000:.1f} ms",
+        f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+        "",
+        f"=== Top {top_n} functions by cumulative time — repo code ===",
+        _hot_functions(profiler, top_n, repo_only=True),
+        f"=== Top {top_n} functions by cumulative time — all ===",
+        _hot_functions(profiler, top_n, repo_only=False),
+        f"=== Top {top_n} allocation sites ===",
+        _allocation_sites(snapshot, top_n),
+    ])
+    path = PROFILE_DIR / f"{stem}.txt"
+    path.write_text(report, encoding="utf-8")
+    _rotate()
+    return path
+
+
+def _rotate():
+    """Keeps only the newest MAX_PROFILES captures (.txt + .prof pairs)."""
+    reports = sorted(PROFILE_DIR.glob("*.txt"))
+    for old in reports[:-MAX_PROFILES]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
@@ -0,0 +1,134 @@
+"""
+render_scheduler.py
+-------------------
+Background pre-rendering of every per-match chart.
+
+As soon as a match's events are loaded, app.py hands the scheduler a job for
+each chart (average-position pitches, shot map, xG timeline, event timeline,
+player involvement). A job is (drawer kind, model builder): a small thread
+pool builds each compact model off the script thread and ships it to the
+render_service process pool, then publishes the PNG into the shared chart
+cache as it completes. Clicking a chart button — or an intent-triggered
+inline chart — is then served straight from the cache.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import streamlit as st
+
+import tracing
+
+from chart_cache import chart_key, get_chart_cache
+from render_service import RENDER_PROCESSES, get_render_service
+
+
+def match_chart_models(events_data, lineups, home_team, away_team, match_stats, player_xt=None,
+                       momentum=None) -> dict:
+    """
+    Compact, backend-neutral model builders for every per-match chart, keyed
+    by the VISUAL_MAP names plus the two pitches. Each value is a zero-arg
+    callable, so nothing is computed until the chart is actually needed.
+    player_xt (expected_threat.player_xt) adds xT to the involvement chart,
+    momentum (momentum.match_momentum) the momentum overlay to the timeline.
+    """
+    from chart_data import COLOURS, shot_map_data, xg_timeline_data, event_timeline_data, player_involvement_data
+    from data_processing import average_positions_data
+
+    return {
+        "avg_positions_home": lambda: average_positions_data(events_data, lineups, home_team, color=COLOURS["home"]),
+        "avg_positions_away": lambda: average_positions_data(events_data, lineups, away_team, color=COLOURS["away"]),
+        "shot_map":       lambda: shot_map_data(events_data, home_team, away_team),
+        "xg_chart":       lambda: xg_timeline_data(events_data, home_team, away_team, match_stats),
+        "event_timeline": lambda: event_timeline_data(match_stats, home_team, away_team, momentum),
+        "player_chart":   lambda: player_involvement_data(events_data, home_team, away_team, player_xt),
+    }
+
+
+def chart_jobs(models: dict) -> dict:
+    """Turns match_chart_models output into render jobs {chart: (drawer kind, model_fn)}."""
+    return {
+        chart: ("avg_positions" if chart.startswith("avg_positions") else chart, model_fn)
+        for chart, model_fn in models.items()
+    }
+
+
+class RenderScheduler:
+    """Builds chart models in threads, renders them via a RenderService, publishes to a ChartCache."""
+
+    def __init__(self, cache, service, max_workers: int = RENDER_PROCESSES):
+        self.cache = cache
+        self.service = service
+        # Threads only build models and wait on the process pool, so one per
+        # rendering process keeps the pool busy
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="chart-render")
+        self._pending: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, match_id, jobs: dict, grounding: str = "match"):
+        """
+        Queues every chart in jobs ({chart_name: (kind, model_fn)}) that is
+        neither cached nor already in flight. Charts are submitted in dict
+        order, so list the ones shown first on the page first. grounding is
+        chart_cache.chart_grounding() of the data the models are built from.
+        """
+        for chart, job in jobs.items():
+            key = chart_key(match_id, chart, grounding=grounding)
+            with self._lock:
+                if key in self._pending or key in self.cache:
+                    continue
+                future = self._executor.submit(self._render, key, job)
+                self._pending[key] = future
+            future.add_done_callback(lambda _f, k=key: self._forget(k))
+
+    def _render(self, key: tuple, job):
+        kind, model_fn = job
+        model = model_fn()
+        if model is None:
+            return None
+        data, draw_seconds = self.service.render_timed(kind, model)
+        # Drawn in a worker process: record its timing here, in the caller's trace
+        tracing.record_span(f"draw.{kind}", draw_seconds, chart=key[1])
+        self.cache.put(key, data)
+        return data
+
+    def _forget(self, key: tuple):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def pending(self, match_id=None) -> int:
+        """Number of charts still queued or rendering (optionally for one match)."""
+        with self._lock:
+            if match_id is None:
+                return len(self._pending)
+            return sum(1 for k in self._pending if k[0] == match_id)
+
+    def result(self, match_id, chart: str, job, grounding: str = "match"):
+        """
+        Returns the chart's PNG bytes: from the cache if published, by waiting
+        on the background render if it is in flight, or by rendering in the
+        foreground otherwise. Returns None if the job has nothing to draw.
+        """
+        key = chart_key(match_id, chart, grounding=grounding)
+        with tracing.span("chart.result", chart=chart) as span:
+            data = self.cache.get(key)
+            tracing.record_cache("chart", data is not None)
+            if data is not None:
+                return data
+            with self._lock:
+                future = self._pending.get(key)
+            if future is not None:
+                span.set(source="background")
+                try:
+                    return future.result()
+                except Exception:
+                    pass  # background render failed — retry in the foreground
+            span.set(source="foreground")
+            return self._render(key, job)
+
+
+@st.cache_resource
+def get_render_scheduler() -> RenderScheduler:
+    """One scheduler per server process, rendering via the shared process pool."""
+    return RenderScheduler(get_chart_cache(), get_render_service())
@@ -0,0 +1,170 @@
+"""
+render_service.py
+-----------------
+Process-isolated matplotlib rendering.
+
+pyplot's global state is not thread-safe and drawing holds the GIL, so with
+many Streamlit sessions on one server every chart serialises behind every
+other. This service runs the visualizations.DRAWERS in a pool of worker
+processes on the Agg backend. Callers send a chart kind plus its compact model
+(chart_data.py / data_processing.average_positions_data) — never the full
+event list — and get PNG bytes back. Rendering scales across cores, and a slow
+chart for one user no longer stalls anyone else.
+
+If the pool cannot be used (e.g. a worker crashed), rendering falls back to
+the calling process under chart_cache.PYPLOT_LOCK.
+"""
+
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+# Leave one core for the Streamlit server itself
+RENDER_PROCESSES = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Rounds of pings warm_up() sends before giving up on seeing every worker
+WARM_UP_ROUNDS = 20
+
+
+def _init_worker():
+    """Runs once per worker: headless backend, drawing imports and pitch templates."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import visualizations  # pays the matplotlib/mplsoccer import once per worker
+    visualizations.warm_pitch_templates()
+
+
+def _ping(hold: float = 0.0) -> int:
+    # Holding the worker briefly makes a round of pings spread over all of them
+    time.sleep(hold)
+    return os.getpid()
+
+
+def _draw_to_bytes(kind: str, model: dict, fmt: str = "png") -> tuple[bytes, float]:
+    """
+    Draws one chart from its model; returns the encoded image and the seconds
+    spent drawing. The worker's spans never reach the caller's trace, so the
+    timing travels back with the image.
+    """
+    import matplotlib.pyplot as plt
+    from visualizations import DRAWERS
+
+    start = time.perf_counter()
+    fig = DRAWERS[kind](model)
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=fmt, bbox_inches="tight", facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    return buf.getvalue(), time.perf_counter() - start
+
+
+_MAIN_SWAP_LOCK = threading.Lock()
+
+
+@contextmanager
+def _bare_main_module():
+    """
+    Streamlit installs the running script as sys.modules["__main__"], and a
+    spawned worker re-executes __main__ on start-up — which would re-run the
+    whole app inside every rendering process. Hide the script behind an
+    empty module while workers start — only then, since the swap is visible
+    to every other session's running script.
+    """
+    with _MAIN_SWAP_LOCK:
+        original = sys.modules.get("__main__")
+        placeholder = types.ModuleType("__main__")
+        sys.modules["__main__"] = placeholder
+        try:
+            yield
+        finally:
+            # Only restore if nothing (e.g. a new script run) replaced it meanwhile
+            if sys.modules.get("__main__") is placeholder and original is not None:
+                sys.modules["__main__"] = original
+
+
+class RenderService:
+    """Pool of rendering processes that turns (kind, model) into image bytes."""
+
+    def __init__(self, processes: int = RENDER_PROCESSES):
+        self.processes = processes
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: forking a threaded server process is unsafe
+        pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # Start every worker now, so later submits never spawn one
+        launch = getattr(pool, "_launch_processes", None)
+        if launch is not None:
+            with _bare_main_module():
+                launch()
+        return pool
+
+    def _fully_spawned(self) -> bool:
+        """True once every worker exists; a full pool never spawns again (a dead worker breaks it)."""
+        processes = getattr(self._pool, "_processes", None)
+        return processes is not None and len(processes) >= self.processes
+
+    def submit(self, kind: str, model: dict, fmt: str = "png") -> Future:
+        """Queues a render; the future resolves to (image bytes, draw seconds)."""
+        return self.submit_task(_draw_to_bytes, kind, model, fmt)
+
+    def render_timed(self, kind: str, model: dict, fmt: str = "png") -> tuple[bytes, float]:
+        """Renders in a worker process, or in-process if the pool is unusable; returns (bytes, draw seconds)."""
+        try:
+            return self.submit(kind, model, fmt).result()
+        except BrokenProcessPool:
+            from chart_cache import PYPLOT_LOCK
+            with PYPLOT_LOCK:
+                return _draw_to_bytes(kind, model, fmt)
+
+    def render(self, kind: str, model: dict, fmt: str = "png") -> bytes:
+        """Image bytes only — see render_timed."""
+        return self.render_timed(kind, model, fmt)[0]
+
+    def warm_up(self):
+        """Waits until every worker process has run _init_worker; returns their pids."""
+        pids = set()
+        for _ in range(WARM_UP_ROUNDS):
+            futures = [self.submit_task(_ping, 0.05) for _ in range(self.processes)]
+            pids |= {f.result() for f in futures}
+            if len(pids) >= self.processes:
+                break
+        return sorted(pids)
+
+    def submit_task(self, fn, *args) -> Future:
+        """Queues fn(*args) on the pool (fn must be importable by the workers)."""
+        try:
+            return self._submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._pool = self._new_pool()
+            return self._submit(fn, *args)
+
+    def _submit(self, fn, *args) -> Future:
+        if self._fully_spawned():
+            return self._pool.submit(fn, *args)
+        # This submit may spawn a worker
+        with _bare_main_module():
+            return self._pool.submit(fn, *args)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@st.cache_resource
+def get_render_service() -> RenderService:
+    """One process pool per server, shared by every session."""
+    return RenderService()
@@ -1,16 +1,83 @@
+import hashlib
 import os
 import numpy as np
 from pathlib import Path
-from openai import OpenAI
 import streamlit as st
 
+import tracing
+
 # ---------------------------------------------------------------------------
-# Client setup — mirrors how llm.py handles the API key
+# Client setup — mirrors how llm.py handles the API key. Created on first use
+# rather than at import, so importing this module stays cheap.
 # ---------------------------------------------------------------------------
-client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY")))
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY")))
+    return _client
+
 
 KNOWLEDGE_BASE_DIR = Path(__file__).parent / "knowledge_base"
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Knowledge-base embeddings are saved here, keyed by model + document text, so
+# a fresh replica (or `python warmup.py`) never re-embeds an unchanged corpus
+EMBEDDING_CACHE_DIR = Path(os.environ.get("EMBEDDING_CACHE_DIR", Path(__file__).parent / ".cache"))
+
+
+def _embed_corpus(texts: list[str]) -> np.ndarray:
+    """Embeds the knowledge base documents, reusing the on-disk copy if the corpus is unchanged."""
+    digest = hashlib.sha1("\0".join([EMBEDDING_MODEL, *texts]).encode("utf-8")).hexdigest()[:16]
+    cache_path = EMBEDDING_CACHE_DIR / f"kb-embeddings-{digest}.npy"
+    if cache_path.exists():
+        tracing.record_cache("embeddings", True)
+        return np.load(cache_path)
+    tracing.record_cache("embeddings", False)
+
+    # Embed all knowledge base documents in a single batched call
+    with tracing.span("retriever.embed_corpus", docs=len(texts)):
+        response = _get_client().embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts
+        )
+        tracing.record_usage(response)
+    embeddings = np.array(
+        [e.embedding for e in response.data],
+        dtype=np.float32
+    )
+
+    try:
+        EMBEDDING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        np.save(cache_path, embeddings)
+    except OSError:
+        pass  # read-only filesystem — just embed again next time
+    return embeddings
+
+# ---------------------------------------------------------------------------
+# FAISS helpers — shared by the knowledge base below and by other vector
+# indexes in the app (e.g. match_similarity.py)
+# ---------------------------------------------------------------------------
+def build_index(vectors: np.ndarray):
+    """Exact (flat L2) FAISS index over the rows of vectors."""
+    import faiss  # imported here so the rest of the module works even if faiss isn't installed yet
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+def search_index(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """(distances, row indices) of the k nearest rows for each query row."""
+    queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+    return index.search(queries, min(k, index.ntotal))
+
+
 # ---------------------------------------------------------------------------
 # Build the FAISS vector store once and cache it for the session.
 # Using st.cache_resource so the index is built only on the first call
@@ -27,8 +94,6 @@ def build_vector_store():
         index   – the FAISS flat L2 index
         docs    – list of {"name": str, "content": str} dicts
     """
-    import faiss  # imported here so the rest of the module works even if faiss isn't installed yet
-
     docs = []
     for txt_file in sorted(KNOWLEDGE_BASE_DIR.glob("*.txt")):
         content = txt_file.read_text(encoding="utf-8").strip()
@@ -38,24 +103,10 @@ def build_vector_store():
     if not docs:
         return None, []
 
-    texts = [d["content"] for d in docs]
+    embeddings = _embed_corpus([d["content"] for d in docs])
 
-    # Embed all knowledge base documents in a single batched call
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=texts
-    )
-    embeddings = np.array(
-        [e.embedding for e in response.data],
-        dtype=np.float32
-    )
-
-    # Build a simple flat L2 FAISS index (exact search — fine for 8 docs)
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
-
-    return index, docs
+    # A simple flat L2 FAISS index (exact search — fine for 8 docs)
+    return build_index(embeddings), docs
 
 
 def retrieve(query: str, top_k: int = 2) -> list[str]:
@@ -70,18 +121,19 @@ def retrieve(query: str, top_k: int = 2) -> list[str]:
     Returns:
         A list of document content strings, ordered by relevance.
     """
-    index, docs = build_vector_store()
+    with tracing.span("retriever.index"):
+        index, docs = build_vector_store()
 
     if index is None or not docs:
         return []
 
-    import faiss  # noqa
-
     # Embed the query using the same model as the knowledge base
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=[query]
-    )
+    with tracing.span("retriever.embed_query"):
+        response = _get_client().embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[query]
+        )
+        tracing.record_usage(response)
     query_embedding = np.array(
         [response.data[0].embedding],
         dtype=np.float32
@@ -89,6 +141,7 @@ def retrieve(query: str, top_k: int = 2) -> list[str]:
 
     # Search — returns distances and the indices of the closest docs
     k = min(top_k, len(docs))
-    _, indices = index.search(query_embedding, k)
+    with tracing.span("retriever.search", k=k):
+        _, indices = search_index(index, query_embedding, k)
 
     return [docs[i]["content"] for i in indices[0]]
@@ -0,0 +1,319 @@
+"""
+season_archive.py
+-----------------
+Whole-season event archive as memory-mapped columnar arrays.
+
+Season-level features (team and player profiles, match similarity, xT fitting)
+need every match's events. As Python dicts that is hundreds of multi-thousand
+event lists held in RAM per process. Here the season is packed once into one
+flat binary column per field, with all matches concatenated:
+
+    <dir>/manifest.json      format version, column dtypes, row count, build metadata
+    <dir>/dictionaries.json  shared string tables (types, teams, players, ...)
+    <dir>/match_ids.npy      (n_matches,)      match ids, ascending
+    <dir>/offsets.npy        (n_matches + 1,)  match i is rows offsets[i]:offsets[i+1]
+    <dir>/<column>.bin       (n_events,)       one raw array per column
+
+String fields (type, team, player, outcome, subtype, play pattern) are
+stored as integer codes into dictionaries.json; missing values are -1 (codes)
+or NaN (floats). SeasonArchive maps the columns read-only, so one match or the
+whole season is a zero-copy slice, and worker processes on the same node share
+the pages through the OS page cache.
+
+The same columnar layout is used for a single match that is not (yet) in an
+archive: encode_match(events) returns an in-memory EventColumns, so per-match
+metrics are written once against columns whichever source they come from.
+
+    python season_archive.py                 # build La Liga 2018/19 from open data
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+ARCHIVE_ROOT = Path(os.environ.get("SEASON_ARCHIVE_DIR", Path(__file__).parent / ".cache" / "season-archive"))
+
+# Written to manifest.json. Bump whenever the encoding of any column changes:
+# archives of another version (manifests without one count as version 1) are
+# not opened, and have to be rebuilt with `python season_archive.py`.
+#   1  outcome / subtype left empty for Ball Receipt* and Foul Committed events
+#   2  event details looked up under their snake_case keys
+FORMAT_VERSION = 2
+
+# column -> dtype. Codes index into the matching dictionaries.json table.
+COLUMNS = {
+    "type":            np.int16,    # dictionaries["type"]
+    "team":            np.int16,    # dictionaries["team"]
+    "possession_team": np.int16,    # dictionaries["team"]
+    "player":          np.int32,    # dictionaries["player"]
+    "related_player":  np.int32,    # pass recipient / substitution replacement
+    "outcome":         np.int16,    # shot / pass / duel outcome, dictionaries["outcome"]
+    "subtype":         np.int16,    # duel type, pass height, ..., dictionaries["subtype"]
+    "play_pattern":    np.int16,    # dictionaries["play_pattern"]
+    "period":          np.int8,
+    "minute":          np.int16,
+    "second":          np.int8,
+    "possession":      np.int32,
+    "x":               np.float32,
+    "y":               np.float32,
+    "end_x":           np.float32,
+    "end_y":           np.float32,
+    "xg":              np.float32,
+}
+
+# Which dictionary each code column uses
+CODE_COLUMNS = {
+    "type": "type", "team": "team", "possession_team": "team", "player": "player",
+    "related_player": "player", "outcome": "outcome", "subtype": "subtype",
+    "play_pattern": "play_pattern",
+}
+
+
+class SeasonArchiveUnavailable(LookupError):
+    """No usable archive for a season (not built yet, empty, or another FORMAT_VERSION)."""
+
+
+class _StringTable:
+    """Grows a value -> code mapping while a season is encoded."""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self._codes = {v: i for i, v in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+# Plain parsed JSON or match_cache's frozen events (a concrete-type check is
+# several times cheaper than isinstance(obj, collections.abc.Mapping))
+_MAPPINGS = (dict, MappingProxyType)
+
+
+def _name(obj) -> str | None:
+    return obj.get("name") if isinstance(obj, _MAPPINGS) else None
+
+
+def encode_events(events, tables: dict) -> dict:
+    """One match's events as {column: np.ndarray}, growing the string tables as needed."""
+    # Filled as Python lists and converted once — element-wise writes into
+    # NumPy arrays cost several times more per event
+    rows = {name: [] for name in COLUMNS}
+    nan = float("nan")
+    for ev in events:
+        ev_type = _name(ev.get("type"))
+        rows["type"].append(tables["type"].code(ev_type))
+        rows["team"].append(tables["team"].code(_name(ev.get("team"))))
+        rows["possession_team"].append(tables["team"].code(_name(ev.get("possession_team"))))
+        rows["player"].append(tables["player"].code(_name(ev.get("player"))))
+        rows["play_pattern"].append(tables["play_pattern"].code(_name(ev.get("play_pattern"))))
+        rows["period"].append(ev.get("period", -1))
+        rows["minute"].append(ev.get("minute", -1))
+        rows["second"].append(ev.get("second", -1))
+        rows["possession"].append(ev.get("possession", -1))
+
+        loc = ev.get("location") or (nan, nan)
+        rows["x"].append(loc[0])
+        rows["y"].append(loc[1])
+
+        # "Foul Committed" → ev["foul_committed"], "Ball Receipt*" → ev["ball_receipt"]
+        detail = ev.get((ev_type or "").lower().replace(" ", "_").rstrip("*"))
+        if not isinstance(detail, _MAPPINGS):
+            detail = {}
+        end = detail.get("end_location") or (nan, nan)
+        rows["end_x"].append(end[0])
+        rows["end_y"].append(end[1])
+        rows["xg"].append(detail.get("statsbomb_xg", nan) if ev_type == "Shot" else nan)
+        rows["outcome"].append(tables["outcome"].code(_name(detail.get("outcome"))))
+        rows["subtype"].append(tables["subtype"].code(_name(detail.get("type") or detail.get("height"))))
+        rows["related_player"].append(tables["player"].code(
+            _name(detail.get("recipient") or detail.get("replacement"))
+        ))
+    return {name: np.array(values, dtype=COLUMNS[name]) for name, values in rows.items()}
+
+
+class EventColumns:
+    """
+    Coded event columns plus the string tables to read them: one match
+    (encode_match, SeasonArchive.match) or a whole season (SeasonArchive).
+    cols["x"] is a column array; code() / decode() translate string values.
+    """
+
+    def __init__(self, columns: dict, dictionaries: dict):
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self._code_index = {}
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(self.columns["type"])
+
+    def clock(self) -> np.ndarray:
+        """Match clock in seconds (StatsBomb minutes run on across periods)."""
+        return self.columns["minute"].astype(np.int32) * 60 + self.columns["second"]
+
+    def code(self, column: str, value) -> int:
+        """Integer code of a string value in a code column (-1 if never seen)."""
+        table = CODE_COLUMNS[column]
+        if table not in self._code_index:
+            self._code_index[table] = {v: i for i, v in enumerate(self.dictionaries[table])}
+        return self._code_index[table].get(value, -1)
+
+    def codes(self, column: str, values) -> np.ndarray:
+        """Codes of several values, for np.isin masks (unseen values are dropped)."""
+        codes = [self.code(column, v) for v in values]
+        return np.array([c for c in codes if c >= 0], dtype=np.int64)
+
+    def decode(self, column: str, codes):
+        """String values for codes of a code column (None for -1)."""
+        values = self.dictionaries[CODE_COLUMNS[column]]
+        if np.ndim(codes) == 0:
+            return values[codes] if codes >= 0 else None
+        return [values[c] if c >= 0 else None for c in codes]
+
+
+def encode_match(events) -> EventColumns:
+    """One match's events as in-memory EventColumns with their own string tables."""
+    tables = {name: _StringTable() for name in set(CODE_COLUMNS.values())}
+    columns = encode_events(events, tables)
+    return EventColumns(columns, {name: t.values for name, t in tables.items()})
+
+
+def build_season_archive(match_ids, out_dir: Path, loader=None, log=print) -> Path:
+    """
+    Encodes every match into an archive at out_dir. loader(match_id) returns
+    the match's event list (default: a fresh open-data fetch). Columns are
+    appended to disk match by match, so memory stays at one match's events.
+    The archive is written to a temporary directory and renamed into place.
+    """
+    if loader is None:
+        from data_processing import fetch_json
+
+        def loader(match_id):
+            events, _ = fetch_json(f"events/{match_id}.json")
+            return events or []
+
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    tables = {name: _StringTable() for name in set(CODE_COLUMNS.values())}
+    files = {name: open(tmp_dir / f"{name}.bin", "wb") for name in COLUMNS}
+    kept_ids, offsets = [], [0]
+    try:
+        for match_id in sorted(match_ids):
+            events = loader(match_id)
+            if not events:
+                log(f"  skipped {match_id}: no events")
+                continue
+            for name, array in encode_events(events, tables).items():
+                array.tofile(files[name])
+            kept_ids.append(match_id)
+            offsets.append(offsets[-1] + len(events))
+    finally:
+        for f in files.values():
+            f.close()
+
+    np.save(tmp_dir / "match_ids.npy", np.array(kept_ids, dtype=np.int64))
+    np.save(tmp_dir / "offsets.npy", np.array(offsets, dtype=np.int64))
+    (tmp_dir / "dictionaries.json").write_text(
+        json.dumps({name: t.values for name, t in tables.items()}, ensure_ascii=False), encoding="utf-8")
+    (tmp_dir / "manifest.json").write_text(json.dumps({
+        "format_version": FORMAT_VERSION,
+        "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+        "n_events": offsets[-1],
+        "n_matches": len(kept_ids),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }, indent=2), encoding="utf-8")
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    log(f"  {len(kept_ids)} matches, {offsets[-1]:,} events → {out_dir}")
+    return out_dir
+
+
+class SeasonArchive(EventColumns):
+    """Read-only, memory-mapped view of a built season archive (columns span every match)."""
+
+    def __init__(self, archive_dir: Path):
+        archive_dir = Path(archive_dir)
+        self.dir = archive_dir
+        self.manifest = json.loads((archive_dir / "manifest.json").read_text(encoding="utf-8"))
+        self.match_ids = np.load(archive_dir / "match_ids.npy")
+        self.offsets = np.load(archive_dir / "offsets.npy")
+        n_events = self.manifest["n_events"]
+        columns = {
+            name: (np.memmap(archive_dir / f"{name}.bin", dtype=np.dtype(dtype), mode="r", shape=(n_events,))
+                   if n_events else np.empty(0, dtype=np.dtype(dtype)))
+            for name, dtype in self.manifest["columns"].items()
+        }
+        dictionaries = json.loads((archive_dir / "dictionaries.json").read_text(encoding="utf-8"))
+        super().__init__(columns, dictionaries)
+
+    @staticmethod
+    def exists(archive_dir: Path) -> bool:
+        return (Path(archive_dir) / "manifest.json").exists()
+
+    @staticmethod
+    def format_version(archive_dir: Path) -> int:
+        manifest = json.loads((Path(archive_dir) / "manifest.json").read_text(encoding="utf-8"))
+        return manifest.get("format_version", 1)
+
+    def __contains__(self, match_id) -> bool:
+        return self.match_range(match_id) is not None
+
+    def match_range(self, match_id):
+        """(start, end) rows of a match, or None if it is not in the archive."""
+        i = int(np.searchsorted(self.match_ids, match_id))
+        if i == len(self.match_ids) or self.match_ids[i] != match_id:
+            return None
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def match(self, match_id) -> EventColumns | None:
+        """One match's columns as zero-copy views (sharing the season dictionaries), or None."""
+        rows = self.match_range(match_id)
+        if rows is None:
+            return None
+        start, end = rows
+        return EventColumns({name: col[start:end] for name, col in self.columns.items()}, self.dictionaries)
+
+    def match_index(self) -> np.ndarray:
+        """Match position (into match_ids) of every row, for season-wide grouped reductions."""
+        return np.repeat(np.arange(len(self.match_ids)), np.diff(self.offsets))
+
+
+def archive_dir(comp_id, season_id) -> Path:
+    return ARCHIVE_ROOT / f"{comp_id}-{season_id}"
+
+
+def open_season_archive(comp_id, season_id) -> SeasonArchive | None:
+    """
+    The built archive for a season, or None if it has not been built yet or
+    was built in another FORMAT_VERSION (its columns would be misread).
+    """
+    path = archive_dir(comp_id, season_id)
+    if not SeasonArchive.exists(path) or SeasonArchive.format_version(path) != FORMAT_VERSION:
+        return None
+    return SeasonArchive(path)
+
+
+if __name__ == "__main__":
+    from data_processing import get_laliga_1819_info, load_match_list
+
+    comp, season = get_laliga_1819_info()
+    matches = load_match_list(comp, season)
+    print(f"Building season archive for competition {comp}, season {season}...")
+    build_season_archive(matches["match_id"].tolist(), archive_dir(comp, season))
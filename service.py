@@ -0,0 +1,710 @@
+"""
+service.py
+----------
+The analytics compute tier, usable in-process or as a headless HTTP service.
+
+Streamlit re-executes app.py top to bottom on every interaction, and until
+now every match load, stats computation, retrieval and LLM call ran inside
+that script, so the UI could only be scaled together with the compute.
+MatchService collects the match list, the match page data (stats, tactical
+metrics, xT, turning points, 360 shape, similar matches), the charts and the
+question pipeline behind a handful of methods. They return JSON-ready dicts
+built from the shared process-wide caches (match_cache, chart_cache,
+answer_cache, ...), and they are the only way app.py reaches the data.
+
+`python service.py` serves the same methods as JSON over HTTP, using only the
+standard library (asyncio streams, HTTP/1.1 with keep-alive):
+
+    GET  /health                            liveness
+    GET  /season                            {"comp_id", "season_id"}
+    GET  /matches[?team=]                   match list, or one team's fixtures
+    GET  /matches/{id}[?team=&render_charts=0]
+                                            everything on the match page
+    GET  /matches/{id}/charts/{chart}[?format=vega-lite]
+                                            PNG (or Vega-Lite JSON) for one chart;
+                                            JSON null if it has nothing to draw
+    POST /matches/{id}/questions            {"question", "history", "tool_calling"}
+    POST /prefetch                          {"match_ids", "render_charts"}
+    GET  /stats                             cache and pool counters
+    GET  /metrics                           Prometheus text (tracing.prometheus_text)
+
+Unknown matches and charts are 404s (NotFound) and malformed requests 400s
+(BadRequest); any other exception is a bug in the service and a 500.
+
+The event loop only parses requests. Each handler runs on one of three thread
+pools (data, charts, questions), so a burst of slow LLM questions or chart
+renders never queues behind match loads. With ANALYTICS_SERVICE_URL set,
+app.py talks to this service through service_client.ServiceClient instead of
+computing anything itself. The UI and compute tiers then scale independently,
+and every UI replica shares the service's warm caches.
+
+    python service.py --port 8600           # warm up, then serve
+"""
+
+import asyncio
+import functools
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+import streamlit as st
+
+import tracing
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+
+# Handler threads per pool. Data handlers are short and CPU-bound, chart
+# handlers mostly wait on render_service's process pool, and question
+# handlers mostly wait on the LLM API.
+DATA_WORKERS = 8
+CHART_WORKERS = 4
+QUESTION_WORKERS = 16
+
+MAX_BODY_BYTES = 64 * 1024
+RETRIEVED_DOCS = 2
+
+# Columns of the match list the UI uses (and match_status_360, so matches
+# without 360 data skip that fetch); team fixtures add the result badge
+MATCH_FIELDS = ("match_id", "match_date", "home_team_name", "away_team_name", "home_score", "away_score",
+                "match_status_360")
+FIXTURE_FIELDS = MATCH_FIELDS + ("result", "result_colour", "scoreline")
+
+CHARTS = ("avg_positions_home", "avg_positions_away", "shot_map", "xg_chart", "event_timeline", "player_chart")
+
+
+def _records(df, fields) -> list[dict]:
+    """DataFrame rows as plain dicts, with NaN as None."""
+    if df.empty:
+        return []
+    df = df[[f for f in fields if f in df.columns]]
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def to_jsonable(obj):
+    """json.dumps default= for the shared caches' values: frozen mappings and NumPy types."""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+class NotFound(Exception):
+    """An unknown match or chart (HTTP 404)."""
+
+
+class BadRequest(Exception):
+    """A request that cannot be answered as asked (HTTP 400)."""
+
+
+class MatchService:
+    """Match list, match pages, charts and answers, computed from the shared caches."""
+
+    def __init__(self):
+        self._fixtures = None        # match_id -> match list row
+        self._started: set = set()   # match pages whose background work is queued
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Season and match list
+    # ------------------------------------------------------------------
+    def season(self) -> dict:
+        from data_processing import get_laliga_1819_info
+        comp_id, season_id = get_laliga_1819_info()
+        return {"comp_id": comp_id, "season_id": season_id}
+
+    def matches(self, team: str | None = None) -> list[dict]:
+        """The season's matches (or team's fixtures with result badges), newest first."""
+        from data_processing import load_match_list, team_fixtures
+
+        season = self.season()
+        if team:
+            return _records(team_fixtures(season["comp_id"], season["season_id"], team), FIXTURE_FIELDS)
+        return _records(load_match_list(season["comp_id"], season["season_id"]), MATCH_FIELDS)
+
+    def _fixture(self, match_id) -> dict:
+        with self._lock:
+            if self._fixtures is None:
+                self._fixtures = {int(m["match_id"]): m for m in self.matches()}
+            fixture = self._fixtures.get(int(match_id))
+        if fixture is None:
+            raise NotFound(f"Unknown match {match_id}")
+        return fixture
+
+    # ------------------------------------------------------------------
+    # Match page
+    # ------------------------------------------------------------------
+    def _analysis(self, match_id) -> dict:
+        """The per-match values every endpoint builds on, all memoised in the match cache."""
+        from expected_threat import get_player_xt, get_xt_grid
+        from match_cache import get_match_cache
+        from momentum import get_momentum
+        from tactical_metrics import get_tactical_metrics
+
+        fixture = self._fixture(match_id)
+        home, away = fixture["home_team_name"], fixture["away_team_name"]
+        season = self.season()
+        cache = get_match_cache()
+        with tracing.span("match.load", match_id=int(match_id)):
+            match = cache.get(match_id)
+        analysis = {"fixture": fixture, "home": home, "away": away, "match": match, "cache": cache,
+                    "xt_grid": get_xt_grid(season["comp_id"], season["season_id"])}
+        if not match.events:
+            return analysis
+        with tracing.span("match.stats"):
+            analysis["match_stats"] = cache.match_stats(match_id, home, away)
+        with tracing.span("match.tactical_metrics"):
+            analysis["tactical"] = get_tactical_metrics(match_id, home, away)
+        # Expected threat needs the season model (season archive) — left out
+        # until one has been built
+        with tracing.span("match.player_xt"):
+            analysis["player_xt"] = (get_player_xt(match_id, analysis["xt_grid"], home, away)
+                                     if analysis["xt_grid"] is not None else None)
+        with tracing.span("match.momentum"):
+            analysis["momentum"] = get_momentum(match_id, home, away)
+        return analysis
+
+    def _chart_jobs(self, match_id, analysis: dict) -> tuple[dict, dict, str]:
+        """
+        (models, render jobs, grounding) for the match's charts
+        (render_scheduler.match_chart_models, chart_cache.chart_grounding).
+        """
+        from chart_cache import chart_grounding
+        from render_scheduler import chart_jobs, match_chart_models
+
+        match = analysis["match"]
+        models = match_chart_models(match.events, match.lineups, analysis["home"], analysis["away"],
+                                    analysis["match_stats"], analysis["player_xt"], analysis["momentum"])
+        return models, chart_jobs(models), chart_grounding(analysis["player_xt"], analysis["momentum"])
+
+    def match(self, match_id, team: str | None = None, render_charts: bool = True) -> dict:
+        """
+        Everything on the match page:
+
+            {"match_id", "match_date", "home_team", "away_team", "home_score",
+             "away_score", "events", "lineups", "match_stats", "tactical",
+             "player_xt", "turning_points", "defensive_shape", "perspective",
+             "similar"}
+
+        events is the event count; the analysis keys are missing when the
+        match has no events. team is the user's selected team, the
+        perspective of the similar matches. Opening a match also starts its
+        background work: chart pre-rendering (only the pitches unless
+        render_charts), the fixtures either side of it and its example answers.
+        That work is queued once per process for each perspective and grounding,
+        not on every rerun of the page.
+        """
+        from answer_cache import get_answer_warmer, grounding
+        from moments import get_moment_index
+        from player_profiles import get_player_profiles
+        from render_scheduler import get_render_scheduler
+
+        analysis = self._analysis(match_id)
+        fixture, home, away, match = analysis["fixture"], analysis["home"], analysis["away"], analysis["match"]
+        page = {
+            "match_id": int(match_id),
+            "match_date": fixture.get("match_date"),
+            "home_team": home,
+            "away_team": away,
+            "home_score": fixture.get("home_score"),
+            "away_score": fixture.get("away_score"),
+            "events": len(match.events),
+            "lineups": match.lineups,
+        }
+        if not match.events:
+            return page
+
+        # Possession-chain summaries, indexed for retrieval by the chat
+        with tracing.span("match.moments"):
+            get_moment_index(match_id)
+
+        season = self.season()
+        perspective = team if team in (home, away) else home
+        season_profiles = get_player_profiles(season["comp_id"], season["season_id"])
+        _, jobs, chart_grounding = self._chart_jobs(match_id, analysis)
+        started = (int(match_id), perspective, chart_grounding, grounding(analysis["xt_grid"], season_profiles))
+        with self._lock:
+            # A view that rendered every chart covers one that only wants the pitches
+            first_view = not {(*started, True), (*started, render_charts)} & self._started
+            self._started.add((*started, render_charts))
+        if first_view:
+            # Pitches first, since they appear first on the page
+            get_render_scheduler().schedule(match_id, jobs if render_charts else
+                                            {k: v for k, v in jobs.items() if k.startswith("avg_positions")},
+                                            grounding=chart_grounding)
+            self._prefetch_neighbours(match_id, perspective, render_charts, analysis["xt_grid"])
+            get_answer_warmer().warm(match_id, home, away, page["home_score"], page["away_score"],
+                                     xt_grid=analysis["xt_grid"], season_profiles=season_profiles)
+
+        page.update(
+            match_stats=analysis["match_stats"],
+            tactical=analysis["tactical"],
+            player_xt=analysis["player_xt"],
+            turning_points=analysis["momentum"]["turning_points"],
+            defensive_shape=self._defensive_shape(match_id, fixture, home, away),
+            perspective=perspective,
+            similar=self._similar(match_id, perspective),
+        )
+        return page
+
+    def _defensive_shape(self, match_id, fixture: dict, home: str, away: str) -> dict | None:
+        """StatsBomb 360 out-of-possession shape, or None for matches without 360 data."""
+        from data_processing import load_freeze_frames
+        from freeze_frames import team_defensive_shape
+        from match_cache import get_match_cache
+
+        # The match list says which matches have 360 data — don't pay a 404
+        # round trip to find out
+        if fixture.get("match_status_360") not in (None, "available"):
+            return None
+
+        def build(match):
+            freeze_frames = load_freeze_frames(match_id)
+            if freeze_frames is None or not len(freeze_frames):
+                return None
+            return team_defensive_shape(freeze_frames, match.events, home, away)
+
+        # Memoised either way, so a match without frames is only asked for once
+        return get_match_cache().derived(match_id, ("defensive_shape", home, away), build)
+
+    def _similar(self, match_id, perspective: str) -> list[dict]:
+        """match_similarity results with their fixture rows, once a season archive exists."""
+        from match_similarity import get_similarity_index
+
+        season = self.season()
+        index = get_similarity_index(season["comp_id"], season["season_id"])
+        if index is None:
+            return []
+        similar = []
+        for sim in index.similar(match_id, perspective):
+            try:
+                similar.append({**sim, "fixture": self._fixture(sim["match_id"])})
+            except NotFound:
+                continue
+        return similar
+
+    def _prefetch_neighbours(self, match_id, team: str, render_charts: bool, xt_grid):
+        from data_processing import team_fixtures
+        from prefetch import get_prefetcher, prefetch_candidates
+
+        season = self.season()
+        fixtures = team_fixtures(season["comp_id"], season["season_id"], team)
+        get_prefetcher().prefetch(prefetch_candidates(fixtures, current_match_id=match_id),
+                                  render_charts=render_charts, xt_grid=xt_grid)
+
+    def prefetch(self, match_ids, render_charts: bool = True) -> dict:
+        """Warms the given matches in the background (prefetch.Prefetcher), e.g. the visible list page."""
+        from expected_threat import get_xt_grid
+        from prefetch import get_prefetcher
+
+        season = self.season()
+        candidates = []
+        for match_id in match_ids:
+            try:
+                fixture = self._fixture(match_id)
+            except NotFound:
+                continue
+            candidates.append((int(match_id), fixture["home_team_name"], fixture["away_team_name"]))
+        get_prefetcher().prefetch(candidates, render_charts=render_charts,
+                                  xt_grid=get_xt_grid(season["comp_id"], season["season_id"]))
+        return {"queued": len(candidates)}
+
+    # ------------------------------------------------------------------
+    # Charts
+    # ------------------------------------------------------------------
+    def chart(self, match_id, chart: str, fmt: str = "png"):
+        """
+        One chart as PNG bytes (served from the chart cache or the background
+        render when possible) or, with fmt="vega-lite", as a Vega-Lite spec.
+        None if the chart has nothing to draw.
+        """
+        if chart not in CHARTS:
+            raise NotFound(f"Unknown chart {chart!r}")
+        if fmt not in ("png", "vega-lite"):
+            raise BadRequest(f"Unknown chart format {fmt!r}")
+        if fmt == "vega-lite" and chart.startswith("avg_positions"):
+            raise BadRequest("The pitch maps are only available as images")
+        analysis = self._analysis(match_id)
+        if not analysis["match"].events:
+            return None
+        models, jobs, chart_grounding = self._chart_jobs(match_id, analysis)
+        if fmt == "vega-lite":
+            from chart_specs import to_vega_lite
+            model = models[chart]()
+            return None if model is None else to_vega_lite(chart, model)
+
+        from render_scheduler import get_render_scheduler
+        return get_render_scheduler().result(match_id, chart, jobs[chart], grounding=chart_grounding)
+
+    # ------------------------------------------------------------------
+    # Questions
+    # ------------------------------------------------------------------
+    def _answer_context(self, match_id, analysis: dict, season_profiles) -> dict:
+        """answer_cache.match_context for the match, built once per process and grounding."""
+        from answer_cache import grounding, match_context
+
+        fixture, home, away, cache = analysis["fixture"], analysis["home"], analysis["away"], analysis["cache"]
+        return cache.derived(
+            match_id, ("answer_context", home, away, grounding(analysis["xt_grid"], season_profiles)),
+            lambda m: match_context(match_id, home, away, fixture.get("home_score"), fixture.get("away_score"),
+                                    xt_grid=analysis["xt_grid"], season_profiles=season_profiles, cache=cache),
+        )
+
+    def ask(self, match_id, question: str, history: dict | None = None, tool_calling: bool = False) -> dict:
+        """
+        Runs the question pipeline for one match and returns
+
+            {"question", "in_scope", "intent", "visual", "answer",
+             "retrieved_docs", "moments", "tool_calls", "cached", "history"}
+
+        visual is the llm.VISUAL_MAP chart for the intent (or None) and
+        tool_calls the analyst's [name, args, result chars] log in
+        tool-calling mode. Example questions come from the answer cache when
+        already answered (cached=True), except in tool-calling mode.
+
+        history is the conversation so far, as returned with the previous
+        answer (ConversationMemory.to_dict(); None to start one). The returned
+        history adds this turn unless it was refused or the answer call
+        failed. Callers only hand it back: older turns are summarised here,
+        in the background (conversation_memory.py).
+        """
+        from conversation_memory import ConversationMemory
+        from llm import is_error_answer
+
+        memory = ConversationMemory.from_dict(history)
+        result = self._answer(match_id, question, memory.render(), tool_calling)
+        if result["in_scope"] and not is_error_answer(result["answer"]):
+            memory.add_turn(result["question"], result["answer"])
+        # Don't hold the answer for the fold: the next question resumes it
+        result["history"] = memory.to_dict(wait=0)
+        return result
+
+    def _answer(self, match_id, question: str, conversation_context: str, tool_calling: bool) -> dict:
+        from answer_cache import answer_question, get_answer_cache, grounding
+        from llm import VISUAL_MAP
+        from player_profiles import get_player_profiles
+
+        question = (question or "").strip()
+        if not question:
+            raise BadRequest("Empty question")
+        analysis = self._analysis(match_id)
+        if not analysis["match"].events:
+            raise NotFound(f"No event data for match {match_id}")
+        result = {"question": question, "intent": None, "visual": None, "retrieved_docs": [],
+                  "moments": [], "tool_calls": [], "cached": False}
+        season = self.season()
+        season_profiles = get_player_profiles(season["comp_id"], season["season_id"])
+
+        if tool_calling:
+            return self._answer_with_tools(match_id, analysis, result, conversation_context, season_profiles)
+
+        # Cached answers are first-turn answers — a follow-up is answered live
+        # so it can use the conversation
+        entry = None
+        if not conversation_context:
+            entry = get_answer_cache().get(match_id, question, grounding(analysis["xt_grid"], season_profiles))
+            result["cached"] = entry is not None
+        if entry is None:
+            # The same pipeline that fills the answer cache
+            entry = answer_question(question, self._answer_context(match_id, analysis, season_profiles),
+                                    conversation_context=conversation_context)
+        result.update(in_scope=entry["in_scope"], intent=entry["intent"], retrieved_docs=entry["retrieved_docs"],
+                      moments=entry["moments"], answer=entry["answer"])
+        result["visual"] = VISUAL_MAP.get(result["intent"] or "")
+        return result
+
+    def _answer_with_tools(self, match_id, analysis: dict, result: dict, conversation_context: str,
+                           season_profiles) -> dict:
+        """The tool-calling analyst: the model fetches only the figures it needs from the match's tables."""
+        from analyst_tools import get_analyst_tools
+        from llm import VISUAL_MAP, answer_with_tools, classify_question_intent, classify_question_scope
+        from retriever import retrieve
+
+        question, fixture, home, away = result["question"], analysis["fixture"], analysis["home"], analysis["away"]
+        in_scope, refusal = classify_question_scope(question)
+        result["in_scope"] = in_scope
+        if not in_scope:
+            result["answer"] = refusal
+            return result
+
+        result["intent"] = classify_question_intent(question)
+        result["visual"] = VISUAL_MAP.get(result["intent"])
+        result["retrieved_docs"] = retrieve(question, top_k=RETRIEVED_DOCS)
+        analyst = get_analyst_tools(match_id, home, away, player_xt=analysis["player_xt"],
+                                    season_profiles=season_profiles)
+        result["answer"] = answer_with_tools(
+            question=question,
+            tools=analyst,
+            home_team=home,
+            away_team=away,
+            home_score=fixture.get("home_score"),
+            away_score=fixture.get("away_score"),
+            retrieved_docs=result["retrieved_docs"],
+            conversation_context=conversation_context,
+        )
+        result["tool_calls"] = [list(call) for call in analyst.calls]
+        return result
+
+    # ------------------------------------------------------------------
+    # Diagnostics
+    # ------------------------------------------------------------------
+    def profile_match(self, match_id):
+        """
+        Runs stats, metrics and chart data extraction once inline, bypassing
+        the caches and render workers that would hide the hot paths from a
+        profiler (profiling.ProfileSession).
+        """
+        from data_processing import compute_match_stats
+        from moments import match_moments
+        from momentum import match_momentum
+        from season_archive import encode_match
+        from tactical_metrics import tactical_metrics
+
+        analysis = self._analysis(match_id)
+        events, home, away = analysis["match"].events, analysis["home"], analysis["away"]
+        if not events:
+            return
+        compute_match_stats(events, home, away)
+        match_columns = encode_match(events)
+        tactical_metrics(match_columns, home, away)
+        match_momentum(match_columns, home, away)
+        match_moments(match_columns)
+        models, _, _ = self._chart_jobs(match_id, analysis)
+        for build_model in models.values():
+            build_model()
+
+    def stats(self) -> dict:
+        from answer_cache import get_answer_cache, get_answer_warmer
+        from chart_cache import get_chart_cache
+        from match_cache import get_match_cache
+        from prefetch import get_prefetcher
+        from render_scheduler import get_render_scheduler
+
+        return {
+            "match_cache": get_match_cache().stats(),
+            "chart_cache": get_chart_cache().stats(),
+            "charts_pending": get_render_scheduler().pending(),
+            "prefetch": get_prefetcher().stats(),
+            "answer_cache": get_answer_cache().stats(),
+            "answer_warmer": get_answer_warmer().stats(),
+        }
+
+    def metrics(self) -> str:
+        return tracing.prometheus_text()
+
+
+@st.cache_resource
+def get_match_service() -> MatchService:
+    """One in-process MatchService per server process (app.py without ANALYTICS_SERVICE_URL)."""
+    return MatchService()
+
+
+# ---------------------------------------------------------------------------
+# HTTP front end
+# ---------------------------------------------------------------------------
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _flag(value, default: bool) -> bool:
+    if value is None:
+        return default
+    return str(value).lower() not in ("0", "false", "no", "off", "")
+
+
+def _json_body(body: bytes) -> dict:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return payload
+
+
+def _history(value) -> dict | None:
+    """A question's "history" field: a ConversationMemory.to_dict() state, or null."""
+    if value is None:
+        return None
+    turns_ok = all(isinstance(value.get(k, []), list) and
+                   all(isinstance(t, list) and len(t) == 2 for t in value.get(k, []))
+                   for k in ("turns", "pending")) if isinstance(value, dict) else False
+    if not turns_ok:
+        raise HTTPError(400, "history must be the object returned with the previous answer")
+    return value
+
+
+def _match_ids(value) -> list[int]:
+    """A prefetch request's "match_ids" field: a list of integer ids."""
+    if not isinstance(value, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in value):
+        raise HTTPError(400, "match_ids must be a list of integers")
+    return value
+
+
+class AnalyticsServer:
+    """Routes HTTP/1.1 requests on an asyncio server to MatchService methods on the worker pools."""
+
+    def __init__(self, service: MatchService):
+        self.service = service
+        self.pools = {
+            "data": ThreadPoolExecutor(DATA_WORKERS, thread_name_prefix="service-data"),
+            "charts": ThreadPoolExecutor(CHART_WORKERS, thread_name_prefix="service-charts"),
+            "questions": ThreadPoolExecutor(QUESTION_WORKERS, thread_name_prefix="service-questions"),
+        }
+        s = service
+        # (method, path pattern, route name, pool, handler(path match, query, body))
+        self.routes = [
+            ("GET", r"/health", "health", None, lambda m, q, b: {"status": "ok"}),
+            ("GET", r"/season", "season", "data", lambda m, q, b: s.season()),
+            ("GET", r"/matches", "matches", "data", lambda m, q, b: s.matches(q.get("team"))),
+            ("GET", r"/matches/(\d+)", "match", "data",
+             lambda m, q, b: s.match(int(m[1]), q.get("team"), _flag(q.get("render_charts"), True))),
+            ("GET", r"/matches/(\d+)/charts/(\w+)", "chart", "charts",
+             lambda m, q, b: s.chart(int(m[1]), m[2], q.get("format", "png"))),
+            ("POST", r"/matches/(\d+)/questions", "question", "questions",
+             lambda m, q, b: s.ask(int(m[1]), str(b.get("question", "")), history=_history(b.get("history")),
+                                   tool_calling=bool(b.get("tool_calling", False)))),
+            ("POST", r"/prefetch", "prefetch", "data",
+             lambda m, q, b: s.prefetch(_match_ids(b.get("match_ids", [])),
+                                        render_charts=bool(b.get("render_charts", True)))),
+            ("GET", r"/stats", "stats", None, lambda m, q, b: s.stats()),
+            ("GET", r"/metrics", "metrics", None, lambda m, q, b: s.metrics()),
+        ]
+        self.routes = [(method, re.compile(pattern), *rest) for method, pattern, *rest in self.routes]
+
+    def _route(self, method: str, path: str):
+        allowed = False
+        for route_method, pattern, name, pool, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            if route_method == method:
+                return match, name, pool, handler
+            allowed = True
+        if allowed:
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        raise HTTPError(404, f"No route for {path}")
+
+    @staticmethod
+    def _call(name: str, handler, *args):
+        with tracing.trace("service", route=name), tracing.span(f"service.{name}"):
+            return handler(*args)
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, str, bytes]:
+        """(status, content type, payload) for one request."""
+        url = urlsplit(target)
+        try:
+            match, name, pool, handler = self._route(method, unquote(url.path).rstrip("/") or "/")
+            query = dict(parse_qsl(url.query))
+            payload = _json_body(body) if method == "POST" else {}
+            if pool is None:
+                result = self._call(name, handler, match, query, payload)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.pools[pool], functools.partial(self._call, name, handler, match, query, payload))
+        except HTTPError as e:
+            return e.status, "application/json", json.dumps({"error": str(e)}).encode()
+        except NotFound as e:
+            return 404, "application/json", json.dumps({"error": str(e)}).encode()
+        except BadRequest as e:
+            return 400, "application/json", json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            return 500, "application/json", json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+
+        if result is None:
+            # A chart with nothing to draw
+            return 200, "application/json", b"null"
+        if isinstance(result, bytes):
+            return 200, "image/png", result
+        if isinstance(result, str):
+            return 200, "text/plain; version=0.0.4", result.encode()
+        return 200, "application/json", json.dumps(result, default=to_jsonable, ensure_ascii=False).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One client connection: requests are answered in order until either side closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(maxsplit=2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    status, content_type, payload = 413, "application/json", b'{"error": "Request body too large"}'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload = await self.dispatch(method.upper(), target, body)
+                    keep_alive = (version.strip() == "HTTP/1.1"
+                                  and headers.get("connection", "").lower() != "close")
+
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # malformed request or the client went away — just drop the connection
+        finally:
+            writer.close()
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, service: MatchService | None = None):
+    """Serves MatchService over HTTP until cancelled."""
+    server = AnalyticsServer(service or MatchService())
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Analytics service on http://{host}:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warmup", action="store_true", help="skip warmup.warm_up() before serving")
+    args = parser.parse_args()
+
+    if not args.no_warmup:
+        from warmup import _print_timings, warm_up
+        print("Warming up...")
+        _print_timings(warm_up())
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
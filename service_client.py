@@ -0,0 +1,126 @@
+"""
+service_client.py
+-----------------
+HTTP client for the analytics service (service.py).
+
+ServiceClient has the same methods and return shapes as service.MatchService,
+so app.py renders identically whether the compute runs in its own process or
+behind ANALYTICS_SERVICE_URL. Only the standard library is used (http.client).
+Each thread keeps one persistent keep-alive connection, so a page rerun's
+handful of calls pays no TCP handshakes. A connection the service has already
+closed is reopened once, transparently.
+"""
+
+import http.client
+import json
+import os
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+import streamlit as st
+
+# Answers can take several LLM round trips
+DEFAULT_TIMEOUT = float(os.environ.get("ANALYTICS_SERVICE_TIMEOUT", "120"))
+
+
+class ServiceError(RuntimeError):
+    """A request the analytics service answered with an error (or could not be reached for)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"analytics service: {message} (HTTP {status})" if status else f"analytics service: {message}")
+        self.status = status
+
+
+class ServiceClient:
+    """MatchService over HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = DEFAULT_TIMEOUT):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Not an http(s) URL: {base_url!r}")
+        self.base_url = base_url.rstrip("/")
+        self._scheme, self._host, self._port = url.scheme, url.hostname, url.port
+        self._prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, fresh: bool = False) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            conn = self._local.conn = cls(self._host, self._port, timeout=self.timeout)
+        return conn
+
+    def _request(self, method: str, path: str, query: dict | None = None, body: dict | None = None):
+        target = self._prefix + path + (f"?{urlencode(query)}" if query else "")
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        for attempt in (0, 1):
+            conn = self._connection(fresh=attempt > 0)
+            try:
+                conn.request(method, target, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The service closed an idle keep-alive connection — retry once on
+                # a new one. Only GETs: a POST may already be running (a question
+                # costs LLM calls), so it must not be sent twice
+                if attempt or method != "GET":
+                    conn.close()
+                    raise ServiceError(0, f"connection to {self.base_url} lost")
+            except OSError as e:
+                conn.close()
+                raise ServiceError(0, f"cannot reach {self.base_url}: {e}")
+
+        content_type = response.getheader("Content-Type", "")
+        if response.status != 200:
+            try:
+                message = json.loads(data)["error"]
+            except (ValueError, KeyError, TypeError):
+                message = data[:200].decode("utf-8", "replace")
+            raise ServiceError(response.status, message)
+        if content_type.startswith("application/json"):
+            return json.loads(data)
+        if content_type.startswith("text/"):
+            return data.decode("utf-8")
+        return data
+
+    def season(self) -> dict:
+        return self._request("GET", "/season")
+
+    def matches(self, team: str | None = None) -> list[dict]:
+        return self._request("GET", "/matches", {"team": team} if team else None)
+
+    def match(self, match_id, team: str | None = None, render_charts: bool = True) -> dict:
+        query = {"render_charts": int(render_charts)}
+        if team:
+            query["team"] = team
+        return self._request("GET", f"/matches/{int(match_id)}", query)
+
+    def prefetch(self, match_ids, render_charts: bool = True) -> dict:
+        return self._request("POST", "/prefetch",
+                             body={"match_ids": [int(i) for i in match_ids], "render_charts": render_charts})
+
+    def chart(self, match_id, chart: str, fmt: str = "png"):
+        return self._request("GET", f"/matches/{int(match_id)}/charts/{quote(chart)}",
+                             {"format": fmt} if fmt != "png" else None)
+
+    def ask(self, match_id, question: str, history: dict | None = None, tool_calling: bool = False) -> dict:
+        return self._request("POST", f"/matches/{int(match_id)}/questions",
+                             body={"question": question, "history": history, "tool_calling": tool_calling})
+
+    def stats(self) -> dict:
+        return self._request("GET", "/stats")
+
+    def metrics(self) -> str:
+        return self._request("GET", "/metrics")
+
+
+@st.cache_resource
+def get_service_client() -> ServiceClient | None:
+    """A client for $ANALYTICS_SERVICE_URL, or None to compute in-process."""
+    url = os.environ.get("ANALYTICS_SERVICE_URL")
+    return ServiceClient(url) if url else None
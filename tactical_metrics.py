@@ -0,0 +1,174 @@
+"""
+tactical_metrics.py
+-------------------
+Pressing and territory metrics per team, for the whole match and per
+15-minute window.
+
+compute_match_stats only counts raw pressures and tackles, which the LLM has
+nothing to compare against. These are the standard scaled metrics the
+knowledge base (pressing.txt) talks about:
+
+    ppda                     opponent passes in their own 60% of the pitch per
+                             defensive action (tackle, interception, foul,
+                             challenge) there — lower = more aggressive press
+    defensive_action_height  mean distance from own goal (pitch units, 0–120)
+                             of all defensive actions, pressures included
+    field_tilt_pct           share of the two teams' final-third passes
+    high_turnovers           open-play possessions won within 40 m of the
+                             opponent's goal
+    pressure_regains         pressures followed by winning the ball within
+                             REGAIN_SECONDS
+
+Everything is computed with NumPy masks and per-window bincounts over the
+match's season_archive.EventColumns (encoded once per process by
+MatchCache.columns), so a match takes a few milliseconds.
+
+StatsBomb coordinates are from the acting team's perspective: every team
+attacks towards x = 120 in its own events.
+"""
+
+import numpy as np
+
+PITCH_LENGTH = 120.0
+# A team's own 60% of the pitch, in its own coordinates (x <= 72) — the same
+# zone is x >= 48 from the pressing side
+PPDA_ZONE_X = PITCH_LENGTH * 0.6
+FINAL_THIRD_X = PITCH_LENGTH * 2 / 3
+# 40 m from goal (StatsBomb pitch units are yards)
+HIGH_TURNOVER_X = PITCH_LENGTH - 40 / 0.9144
+REGAIN_SECONDS = 5
+
+WINDOW_MINUTES = 15
+N_WINDOWS = 6          # 0–15' … 75–90'+; stoppage and extra time fall in the last
+
+PPDA_ACTIONS = ("Interception", "Foul Committed", "Dribbled Past")
+OTHER_DEFENSIVE_ACTIONS = ("Pressure", "Ball Recovery", "Block", "Clearance")
+SET_PIECE_PATTERNS = ("From Corner", "From Free Kick", "From Throw In", "From Goal Kick", "From Kick Off")
+
+# Sent to the LLM with the numbers, so it reads them on the right scale
+METRIC_NOTES = {
+    "ppda": "opponent passes in their own 60% per defensive action there; below 7 = very high press, above 12 = passive/mid-block",
+    "defensive_action_height": "mean distance of defensive actions from own goal, pitch length 120",
+    "field_tilt_pct": "share of both teams' final-third passes",
+    "high_turnovers": "open-play possessions won within 40 m of the opponent's goal",
+    "pressure_regains": f"pressures followed by winning the ball within {REGAIN_SECONDS} seconds",
+}
+
+
+def _window_labels() -> list[str]:
+    labels = [f"{i * WINDOW_MINUTES}-{(i + 1) * WINDOW_MINUTES}'" for i in range(N_WINDOWS)]
+    labels[-1] += "+"
+    return labels
+
+
+def _ratio(num, den, digits=1):
+    return round(float(num) / float(den), digits) if den else None
+
+
+def tactical_metrics(cols, home_team: str, away_team: str) -> dict:
+    """
+    {"teams": {team: metrics}, "windows": [{"window": "0-15'", team: metrics, ...}]}
+    for one match's EventColumns. Ratios are None where their denominator is 0.
+    """
+    types, team, x = cols["type"], cols["team"], cols["x"]
+    minute = np.asarray(cols["minute"])
+    clock = cols.clock()
+    window = np.clip(minute // WINDOW_MINUTES, 0, N_WINDOWS - 1)
+
+    def by_window(mask, weights=None):
+        return np.bincount(window[mask], weights=None if weights is None else weights[mask],
+                           minlength=N_WINDOWS)
+
+    is_pass = types == cols.code("type", "Pass")
+    is_pressure = types == cols.code("type", "Pressure")
+    tackle = (types == cols.code("type", "Duel")) & (cols["subtype"] == cols.code("subtype", "Tackle"))
+    ppda_action = tackle | np.isin(types, cols.codes("type", PPDA_ACTIONS))
+    defensive_action = (ppda_action | np.isin(types, cols.codes("type", OTHER_DEFENSIVE_ACTIONS))) & ~np.isnan(x)
+
+    # Possession table: each possession's owner and where / when the owner
+    # first touched the ball. Possession numbers ascend through the match.
+    possession, possession_team = cols["possession"], cols["possession_team"]
+    owner_rows = np.flatnonzero((team == possession_team) & (team >= 0))
+    p_ids, first = np.unique(possession[owner_rows], return_index=True)
+    p_rows = owner_rows[first]
+    p_owner, p_start, p_x = possession_team[p_rows], clock[p_rows], x[p_rows]
+    p_window = window[p_rows]
+    changed_hands = np.ones(len(p_ids), dtype=bool)
+    changed_hands[1:] = p_owner[1:] != p_owner[:-1]
+    open_play = ~np.isin(cols["play_pattern"][p_rows], cols.codes("play_pattern", SET_PIECE_PATTERNS))
+    high_turnover = changed_hands & open_play & (p_x >= HIGH_TURNOVER_X)
+
+    # For every pressure, the possession that follows the one it was made in
+    next_p = np.searchsorted(p_ids, possession, side="right")
+    has_next = next_p < len(p_ids)
+    next_p = np.minimum(next_p, max(len(p_ids) - 1, 0))
+
+    codes = {t: cols.code("team", t) for t in (home_team, away_team)}
+    final_third_passes = {t: by_window(is_pass & (team == c) & (x >= FINAL_THIRD_X)) for t, c in codes.items()}
+
+    per_window = {}
+    for t, opponent in ((home_team, away_team), (away_team, home_team)):
+        own, opp = team == codes[t], team == codes[opponent]
+        pressures = is_pressure & own
+        if len(p_ids):
+            regained = (pressures & has_next
+                        & (p_owner[next_p] == codes[t])
+                        & (p_start[next_p] - clock <= REGAIN_SECONDS))
+            high_turnovers = np.bincount(p_window[high_turnover & (p_owner == codes[t])], minlength=N_WINDOWS)
+        else:
+            regained = np.zeros(len(types), dtype=bool)
+            high_turnovers = np.zeros(N_WINDOWS, dtype=np.int64)
+        height_mask = defensive_action & own
+        per_window[t] = {
+            "opp_passes": by_window(is_pass & opp & (x <= PPDA_ZONE_X)),
+            "ppda_actions": by_window(ppda_action & own & (x >= PITCH_LENGTH - PPDA_ZONE_X)),
+            "height_sum": by_window(height_mask, x.astype(np.float64)),
+            "height_n": by_window(height_mask),
+            "final_third": final_third_passes[t],
+            "final_third_opp": final_third_passes[opponent],
+            "high_turnovers": high_turnovers,
+            "pressures": by_window(pressures),
+            "pressure_regains": by_window(regained),
+        }
+
+    def summarise(counts, w=slice(None)):
+        c = {k: v[w].sum() for k, v in counts.items()}
+        return {
+            "ppda": _ratio(c["opp_passes"], c["ppda_actions"]),
+            "defensive_action_height": _ratio(c["height_sum"], c["height_n"]),
+            "field_tilt_pct": _ratio(100 * c["final_third"], c["final_third"] + c["final_third_opp"]),
+            "high_turnovers": int(c["high_turnovers"]),
+            "pressure_regains": int(c["pressure_regains"]),
+            "pressure_regain_pct": _ratio(100 * c["pressure_regains"], c["pressures"]),
+        }
+
+    return {
+        "teams": {t: summarise(per_window[t]) for t in (home_team, away_team)},
+        "windows": [
+            {"window": label, **{t: summarise(per_window[t], i) for t in (home_team, away_team)}}
+            for i, label in enumerate(_window_labels())
+        ],
+    }
+
+
+def get_tactical_metrics(match_id, home_team: str, away_team: str) -> dict:
+    """tactical_metrics for a cached match, computed once per process (read-only)."""
+    from match_cache import get_match_cache
+    cache = get_match_cache()
+    return cache.derived(
+        match_id, ("tactical_metrics", home_team, away_team),
+        lambda m: tactical_metrics(cache.columns(match_id), home_team, away_team),
+    )
+
+
+def with_tactical_metrics(match_stats: dict, metrics: dict) -> dict:
+    """
+    A new stats dict for the LLM prompt: each team's compute_match_stats entry
+    plus its tactical metrics, the per-window breakdown and METRIC_NOTES.
+    match_stats is shared across sessions and is not modified.
+    """
+    combined = {team: {**team_stats, **metrics["teams"].get(team, {})}
+                for team, team_stats in match_stats.items()}
+    combined["by_15_minutes"] = metrics["windows"]
+    combined["metric_notes"] = METRIC_NOTES
+    return combined
@@ -0,0 +1,103 @@
+"""
+test_analyst_tools.py
+---------------------
+The tool-calling answer loop (llm.answer_with_tools) driven offline by
+analyst_tools.ScriptedClient on synthetic events.
+
+    python -m pytest tests
+"""
+
+import json
+
+import pytest
+
+from analyst_tools import AnalystTools, ScriptedClient
+from benchmarks.synthetic_events import AWAY_TEAM, HOME_TEAM, generate_events
+from llm import MAX_TOOL_ROUNDS, answer_with_tools, is_error_answer
+from moments import MomentIndex, match_moments
+from season_archive import encode_match
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return encode_match(generate_events(3500, seed=7))
+
+
+@pytest.fixture
+def analyst(columns):
+    return AnalystTools(columns, HOME_TEAM, AWAY_TEAM, moment_index=MomentIndex(match_moments(columns)))
+
+
+def ask(analyst, script):
+    client = ScriptedClient(script)
+    answer = answer_with_tools("Who was better after the hour?", analyst, HOME_TEAM, AWAY_TEAM, 1, 1,
+                               retrieved_docs=[], client=client)
+    return answer, client
+
+
+def tool_messages(request) -> list[dict]:
+    return [m for m in request["messages"] if m["role"] == "tool"]
+
+
+def test_dispatches_tool_calls_with_their_arguments(analyst):
+    window = {"start_minute": 60, "end_minute": 75}
+    shots = {"team": "home", "min_xg": 0.1}
+    answer, client = ask(analyst, [[("window_stats", window), ("shot_list", shots)], "Scripted answer."])
+
+    assert answer == "Scripted answer."
+    assert [(name, args) for name, args, _ in analyst.calls] == [("window_stats", window), ("shot_list", shots)]
+
+    # The second request carries the assistant's calls and one result per call
+    request = client.requests[1]
+    assistant = request["messages"][-3]
+    assert [c["function"]["name"] for c in assistant["tool_calls"]] == ["window_stats", "shot_list"]
+    assert json.loads(assistant["tool_calls"][0]["function"]["arguments"]) == window
+    results = tool_messages(request)
+    assert [m["tool_call_id"] for m in results] == [c["id"] for c in assistant["tool_calls"]]
+    assert results[0]["content"] == analyst.execute("window_stats", window)
+    assert "error" not in json.loads(results[0]["content"])
+
+
+def test_bad_arguments_are_reported_to_the_model(analyst):
+    answer, client = ask(analyst, [[("window_stats", {"first_minute": 60})], "Scripted answer."])
+
+    assert answer == "Scripted answer."
+    result = json.loads(tool_messages(client.requests[1])[0]["content"])
+    assert result["error"].startswith("bad arguments for window_stats")
+
+
+def test_unknown_tools_are_reported_to_the_model(analyst):
+    answer, client = ask(analyst, [[("drop_tables", {})], "Scripted answer."])
+
+    assert answer == "Scripted answer."
+    result = json.loads(tool_messages(client.requests[1])[0]["content"])
+    assert result == {"error": "unknown tool 'drop_tables'"}
+    assert analyst.calls[0][0] == "drop_tables"
+
+
+def test_unknown_team_is_an_error_not_both_teams(analyst):
+    for tool in ("shot_list", "possession_chains"):
+        result = json.loads(analyst.execute(tool, {"team": "Real Madrid"}))
+        assert result == {"error": "no team matching 'Real Madrid' in this match"}
+
+    both = json.loads(analyst.execute("shot_list", {}))
+    home = json.loads(analyst.execute("shot_list", {"team": "home"}))
+    assert 0 < home["count"] < both["count"]
+
+
+def test_last_round_disables_tools(analyst):
+    script = [[("window_stats", {})]] * MAX_TOOL_ROUNDS + ["Scripted answer."]
+    answer, client = ask(analyst, script)
+
+    assert answer == "Scripted answer."
+    assert [r["tool_choice"] for r in client.requests] == ["auto"] * MAX_TOOL_ROUNDS + ["none"]
+    assert len(analyst.calls) == MAX_TOOL_ROUNDS
+
+
+def test_rounds_are_capped(analyst):
+    # A client that keeps calling tools even when told not to
+    answer, client = ask(analyst, [[("window_stats", {})]] * (MAX_TOOL_ROUNDS + 3))
+
+    assert is_error_answer(answer)
+    assert len(client.requests) == MAX_TOOL_ROUNDS + 1
+    assert len(analyst.calls) == MAX_TOOL_ROUNDS
@@ -0,0 +1,59 @@
+"""
+test_answer_cache.py
+--------------------
+How answer_cache keys cached answers: question normalisation, grounding()
+and the answer_version() digest.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+import answer_cache
+from answer_cache import EXAMPLE_QUESTIONS, AnswerCache, answer_version, grounding, question_key
+
+QUESTION = EXAMPLE_QUESTIONS[0]
+
+
+def entry(grounding_name, answer="Cached answer"):
+    return {"question": QUESTION, "answer": answer, "version": answer_version(), "grounding": grounding_name}
+
+
+def test_grounding_names_the_season_models_in_use():
+    assert grounding() == "match"
+    assert grounding(xt_grid=object()) == "xt"
+    assert grounding(season_profiles=object()) == "profiles"
+    assert grounding(object(), object()) == "xt+profiles"
+
+
+def test_question_key_normalises_case_spacing_and_punctuation():
+    assert question_key("  Was the result  FAIR based on xG?? ") == question_key("was the result fair based on xg")
+
+
+def test_entries_are_keyed_by_grounding(tmp_path):
+    cache = AnswerCache(tmp_path)
+    cache.put(1000, entry("xt"))
+    assert cache.get(1000, QUESTION, "match") is None
+    assert cache.get(1000, QUESTION.upper(), "xt")["answer"] == "Cached answer"
+    assert cache.get(1000, "Who was the referee?", "xt") is None    # only example questions are cached
+    assert QUESTION in cache.missing(1000, "match") and QUESTION not in cache.missing(1000, "xt")
+
+
+def test_files_are_versioned_and_survive_a_restart(tmp_path):
+    AnswerCache(tmp_path).put(1000, entry("xt+profiles"))
+    assert (tmp_path / answer_version() / "xt+profiles" / "1000.json").exists()
+    assert AnswerCache(tmp_path).get(1000, QUESTION, "xt+profiles")["answer"] == "Cached answer"
+
+
+def test_bumping_the_pipeline_version_retires_cached_answers(tmp_path, monkeypatch):
+    AnswerCache(tmp_path).put(1000, entry("match"))
+    before = answer_version()
+    monkeypatch.setattr(answer_cache, "PIPELINE_VERSION", answer_cache.PIPELINE_VERSION + 1)
+    answer_version.cache_clear()
+    try:
+        assert answer_version() != before
+        assert AnswerCache(tmp_path).get(1000, QUESTION, "match") is None
+    finally:
+        monkeypatch.undo()
+        answer_version.cache_clear()
+    assert answer_version() == before
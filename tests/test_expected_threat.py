@@ -0,0 +1,64 @@
+"""
+test_expected_threat.py
+-----------------------
+The expected-threat grid (expected_threat.fit_xt) and the xT credited to
+players, on hand-placed events and on a synthetic match.
+
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_events import AWAY_TEAM, HOME_TEAM, generate_events
+from expected_threat import XT_COLUMNS, XT_ROWS, fit_xt, player_xt, zones
+from season_archive import encode_match
+
+HOME, AWAY = "Home FC", "Away FC"
+BOX, MIDFIELD = [110, 40], [50, 40]
+
+
+def shot(outcome):
+    return {"type": {"name": "Shot"}, "team": {"name": HOME}, "player": {"name": "Striker"},
+            "location": BOX, "shot": {"outcome": {"name": outcome}, "statsbomb_xg": 0.3}}
+
+
+def box_pass(player, outcome=None):
+    detail = {"end_location": BOX}
+    if outcome:
+        detail["outcome"] = {"name": outcome}
+    return {"type": {"name": "Pass"}, "team": {"name": HOME}, "player": {"name": player},
+            "location": MIDFIELD, "pass": detail}
+
+
+@pytest.fixture
+def hand_placed():
+    # Half the box shots score; of two passes from midfield into the box, one arrives
+    return encode_match([shot("Goal"), shot("Saved"), box_pass("Playmaker"), box_pass("Wasteful", "Incomplete")])
+
+
+def value(grid, location):
+    return grid.ravel()[zones([location[0]], [location[1]])[0]]
+
+
+def test_grid_values_follow_the_model(hand_placed):
+    grid = fit_xt(hand_placed)
+    assert grid.shape == (XT_COLUMNS, XT_ROWS)
+    assert value(grid, BOX) == pytest.approx(0.5)          # always shoots, scores half the time
+    assert value(grid, MIDFIELD) == pytest.approx(0.25)    # always moves, reaches the box half the time
+    assert grid.sum() == pytest.approx(0.75)                # every other zone has no actions
+
+
+def test_players_are_credited_with_the_threat_they_add(hand_placed):
+    credited = player_xt(fit_xt(hand_placed), hand_placed, HOME, AWAY)
+    assert credited[HOME]["Playmaker"] == pytest.approx(0.25)
+    assert credited[HOME]["Wasteful"] == 0                  # failed moves earn nothing
+    assert credited[AWAY] == {}
+
+
+def test_synthetic_match_gives_probabilities_and_ranked_players():
+    cols = encode_match(generate_events(20000, seed=3))
+    grid = fit_xt(cols)
+    assert np.all((grid >= 0) & (grid <= 1))
+    credited = player_xt(grid, cols, HOME_TEAM, AWAY_TEAM)
+    assert list(credited[HOME_TEAM].values()) == sorted(credited[HOME_TEAM].values(), reverse=True)
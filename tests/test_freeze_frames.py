@@ -0,0 +1,49 @@
+"""
+test_freeze_frames.py
+---------------------
+Defensive shape from 360 frames: which team each frame measures.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+from freeze_frames import FreezeFrames, convert_three_sixty, team_defensive_shape
+
+HOME, AWAY = "Home FC", "Away FC"
+
+# Four opponents of the actor, deepest two at x = 100 and x = 104
+BACK_FOUR = [{"location": [x, y], "teammate": False} for x, y in ((100, 20), (104, 35), (96, 45), (92, 60))]
+ACTOR = [{"location": [60, 40], "teammate": True, "actor": True}]
+
+
+def event(event_id, team, possession_team, type_name="Pass"):
+    return {"id": event_id, "type": {"name": type_name}, "team": {"name": team},
+            "possession_team": {"name": possession_team}}
+
+
+@pytest.fixture
+def frames(tmp_path):
+    raw = [
+        {"event_uuid": "pass-home", "freeze_frame": ACTOR + BACK_FOUR},
+        # Away presses while Home has the ball: its "opponents" are the attackers
+        {"event_uuid": "pressure-away", "freeze_frame": ACTOR + BACK_FOUR},
+    ]
+    return FreezeFrames.open(convert_three_sixty(raw, tmp_path / "match"))
+
+
+def test_frames_are_attributed_to_the_team_without_the_ball(frames):
+    events = [event("pass-home", HOME, HOME), event("pressure-away", AWAY, HOME, "Pressure")]
+    shape = team_defensive_shape(frames, events, HOME, AWAY)
+
+    assert shape[AWAY]["frames"] == 1
+    assert shape[AWAY]["line_height"] == pytest.approx(120 - (104 + 100 + 96 + 92) / 4, abs=0.05)
+    # The pressure frame must not count as Home defending
+    assert shape[HOME] == {"line_height": None, "compactness": None, "frames": 0}
+
+
+def test_frames_without_enough_defenders_are_skipped(tmp_path):
+    raw = [{"event_uuid": "pass-home", "freeze_frame": ACTOR + BACK_FOUR[:3]}]
+    frames = FreezeFrames.open(convert_three_sixty(raw, tmp_path / "match"))
+    shape = team_defensive_shape(frames, [event("pass-home", HOME, HOME)], HOME, AWAY)
+    assert shape[AWAY]["frames"] == 0
@@ -0,0 +1,48 @@
+"""
+test_momentum.py
+----------------
+The momentum model (momentum.match_momentum) on synthetic events.
+
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_events import AWAY_TEAM, HOME_TEAM, generate_events
+from momentum import match_momentum
+from season_archive import encode_match
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return encode_match(generate_events(3500, seed=11))
+
+
+def test_series_cover_every_minute(columns):
+    model = match_momentum(columns, HOME_TEAM, AWAY_TEAM)
+    n = len(model["minutes"])
+    assert n > 0
+    assert len(model["home"]) == len(model["away"]) == len(model["net"]) == n
+    assert np.allclose(np.subtract(model["home"], model["away"]), model["net"], atol=1e-3)
+
+
+def test_turning_points_are_ranked_and_apart(columns):
+    points = match_momentum(columns, HOME_TEAM, AWAY_TEAM)["turning_points"]
+    assert points
+    assert [p["rank"] for p in points] == list(range(1, len(points) + 1))
+    assert [p["swing"] for p in points] == sorted((p["swing"] for p in points), reverse=True)
+    minutes = sorted(p["minute"] for p in points)
+    assert all(b - a >= 10 for a, b in zip(minutes, minutes[1:]))
+    assert all(p["team"] in (HOME_TEAM, AWAY_TEAM) for p in points)
+
+
+def test_team_not_in_the_match_has_no_threat():
+    # Its code is -1, like events without a team — they must not be counted for it
+    events = generate_events(3500, seed=11)
+    events += [{**ev, "team": None} for ev in events if ev["type"]["name"] == "Shot"]
+    model = match_momentum(encode_match(events), HOME_TEAM, "Not Playing FC")
+    assert not any(model["away"])
+    for point in model["turning_points"]:
+        assert point["shots"]["Not Playing FC"] == 0
+        assert point["xg"]["Not Playing FC"] == 0
@@ -0,0 +1,48 @@
+"""
+test_player_profiles.py
+-----------------------
+Season percentiles, similar players and name matching in player_profiles.
+
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from player_profiles import PROFILE_FEATURES, PlayerProfileIndex, _average_ranks, players_in_question
+
+
+@pytest.fixture
+def profiles():
+    # Four players; three share 0 shots, the fourth has the only shots
+    per90 = np.tile(np.arange(4, dtype=np.float64)[:, None], (1, len(PROFILE_FEATURES)))
+    per90[:, PROFILE_FEATURES.index("shots")] = [0, 0, 0, 2.5]
+    return PlayerProfileIndex(["Keeper", "Back", "Holder", "Striker"], ["Home FC"] * 4,
+                              [900, 900, 900, 900], [10, 10, 10, 10], per90)
+
+
+def test_tied_values_share_their_average_rank():
+    ranks = _average_ranks(np.array([[0.0], [5.0], [0.0], [0.0]]))
+    assert ranks[:, 0].tolist() == [1.0, 3.0, 1.0, 1.0]
+
+
+def test_percentiles_do_not_spread_a_block_of_ties(profiles):
+    shots = [profiles.profile(name)["percentile"]["shots"] for name in ("Keeper", "Back", "Holder", "Striker")]
+    assert shots == [33, 33, 33, 100]
+    assert profiles.profile("Keeper")["percentile"]["passes"] == 0
+    assert profiles.profile("Nobody") is None
+
+
+def test_similar_players_exclude_the_player_and_rank_by_distance(profiles):
+    similar = profiles.similar("Back", k=2)
+    assert {s["player"] for s in similar} == {"Keeper", "Holder"}    # the striker's shots set him apart
+    assert [s["distance"] for s in similar] == sorted(s["distance"] for s in similar)
+    assert profiles.similar("Nobody") == []
+
+
+def test_names_match_on_long_words_and_the_most_specific_name_wins():
+    squad = ["Sergio Busquets Burgos", "Sergio Ramos García", "Frenkie de Jong", "Lionel Andrés Messi Cuccittini"]
+    assert players_in_question("How did Sergio Busquets play?", squad) == ["Sergio Busquets Burgos"]
+    assert players_in_question("Compare Messi and Ramos", squad) == ["Sergio Ramos García",
+                                                                     "Lionel Andrés Messi Cuccittini"]
+    assert players_in_question("What did de Bruyne do?", squad) == []
@@ -0,0 +1,81 @@
+"""
+test_season_archive.py
+----------------------
+Season archive encode / decode: per-match slices of a built archive read back
+the same events as encoding the match on its own, and archives of another
+FORMAT_VERSION are not opened.
+
+    python -m pytest tests
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import season_archive
+from benchmarks.synthetic_events import generate_events
+from season_archive import COLUMNS, CODE_COLUMNS, FORMAT_VERSION, SeasonArchive, build_season_archive, encode_match
+
+MATCHES = {101: 7, 102: 8, 103: 9}       # match_id -> seed
+
+
+@pytest.fixture(scope="module")
+def events():
+    return {match_id: generate_events(1500, seed=seed) for match_id, seed in MATCHES.items()}
+
+
+@pytest.fixture(scope="module")
+def archive(events, tmp_path_factory):
+    out = tmp_path_factory.mktemp("archive") / "season"
+    build_season_archive(list(events), out, loader=events.get, log=lambda *a: None)
+    return SeasonArchive(out)
+
+
+def decoded(cols, name):
+    if name in CODE_COLUMNS:
+        return cols.decode(name, np.asarray(cols[name]))
+    return np.asarray(cols[name])
+
+
+def test_match_slices_read_back_the_encoded_events(archive, events):
+    assert len(archive) == sum(len(e) for e in events.values())
+    for match_id, match_events in events.items():
+        sliced, alone = archive.match(match_id), encode_match(match_events)
+        assert len(sliced) == len(match_events)
+        for name in COLUMNS:
+            # Codes differ between the season and per-match tables; the values must not
+            if name in CODE_COLUMNS:
+                assert decoded(sliced, name) == decoded(alone, name), name
+            else:
+                np.testing.assert_array_equal(decoded(sliced, name), decoded(alone, name), err_msg=name)
+    assert archive.match(999) is None
+
+
+def test_event_details_are_read_under_their_snake_case_keys():
+    events = [
+        {"type": {"name": "Ball Receipt*"}, "ball_receipt": {"outcome": {"name": "Incomplete"}}},
+        {"type": {"name": "Foul Committed"}, "foul_committed": {"type": {"name": "Handball"}}},
+        {"type": {"name": "Duel"}, "duel": {"type": {"name": "Tackle"}, "outcome": {"name": "Won"}}},
+    ]
+    cols = encode_match(events)
+    assert cols.decode("outcome", cols["outcome"]) == ["Incomplete", None, "Won"]
+    assert cols.decode("subtype", cols["subtype"]) == [None, "Handball", "Tackle"]
+
+
+def test_archives_of_another_format_are_not_opened(archive, monkeypatch):
+    root = archive.dir.parent
+    monkeypatch.setattr(season_archive, "ARCHIVE_ROOT", root)
+    (root / "11-1").symlink_to(archive.dir)
+    assert SeasonArchive.format_version(archive.dir) == FORMAT_VERSION
+    assert season_archive.open_season_archive(11, 1) is not None
+
+    manifest_path = archive.dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest["format_version"] = FORMAT_VERSION - 1
+    manifest_path.write_text(json.dumps(manifest))
+    try:
+        assert season_archive.open_season_archive(11, 1) is None
+    finally:
+        manifest["format_version"] = FORMAT_VERSION
+        manifest_path.write_text(json.dumps(manifest))
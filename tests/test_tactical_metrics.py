@@ -0,0 +1,59 @@
+"""
+test_tactical_metrics.py
+------------------------
+PPDA and field tilt (tactical_metrics.tactical_metrics) on a handful of
+hand-placed events, where the expected values can be counted by hand.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+from season_archive import encode_match
+from tactical_metrics import tactical_metrics
+
+HOME, AWAY = "Home FC", "Away FC"
+
+
+def event(type_name, team, x, minute=10, possession=1, possession_team=None, **detail):
+    ev = {"type": {"name": type_name}, "team": {"name": team},
+          "possession_team": {"name": possession_team or team}, "possession": possession,
+          "minute": minute, "second": 0, "location": [x, 40], "play_pattern": {"name": "Regular Play"}}
+    ev.update(detail)
+    return ev
+
+
+@pytest.fixture
+def metrics():
+    events = (
+        # Home builds up in its own 60% (x <= 72): six passes for Away's PPDA
+        [event("Pass", HOME, x) for x in (20, 30, 40, 50, 60, 70)]
+        # ... and three into the final third, against one for Away
+        + [event("Pass", HOME, x) for x in (85, 90, 95)]
+        + [event("Pass", AWAY, 100, minute=20, possession=2)]
+        # Away's defensive actions in Home's 60% (x >= 48 from Away's side)
+        + [event("Interception", AWAY, 60, possession_team=HOME),
+           event("Duel", AWAY, 70, possession_team=HOME, duel={"type": {"name": "Tackle"}}),
+           event("Foul Committed", AWAY, 55, possession_team=HOME),
+           # Neither a tackle nor in the zone: not PPDA actions
+           event("Duel", AWAY, 70, possession_team=HOME, duel={"type": {"name": "Aerial Lost"}}),
+           event("Interception", AWAY, 30, possession_team=HOME)]
+    )
+    return tactical_metrics(encode_match(events), HOME, AWAY)
+
+
+def test_ppda_counts_tackles_interceptions_and_fouls_in_the_zone(metrics):
+    assert metrics["teams"][AWAY]["ppda"] == 2.0       # 6 passes / 3 actions
+    assert metrics["teams"][HOME]["ppda"] is None      # Home made no defensive actions
+
+
+def test_field_tilt_shares_final_third_passes(metrics):
+    assert metrics["teams"][HOME]["field_tilt_pct"] == 75.0
+    assert metrics["teams"][AWAY]["field_tilt_pct"] == 25.0
+
+
+def test_windows_add_up_to_the_match(metrics):
+    assert [w["window"] for w in metrics["windows"]][:2] == ["0-15'", "15-30'"]
+    assert metrics["windows"][0][AWAY]["ppda"] == 2.0
+    assert metrics["windows"][1][HOME]["field_tilt_pct"] == 0.0
+    assert metrics["windows"][1][AWAY]["field_tilt_pct"] == 100.0
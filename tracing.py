@@ -0,0 +1,308 @@
+"""
+tracing.py
+----------
+Lightweight stage-level tracing for match loads and question pipelines.
+
+A trace covers one request — a page rerun or one question — and collects the
+spans opened inside it: HTTP fetches, compute_match_stats, the classifier and
+answer calls, embedding / index.search in retrieve, chart rendering. Each span
+records its start offset, duration, nesting depth and attributes such as LLM
+token counts or cache hits.
+
+    with tracing.trace("question") as t:
+        with tracing.span("retrieve.embed"):
+            ...
+        tracing.record(prompt_tokens=812)
+
+    @tracing.traced("compute_match_stats")
+    def compute_match_stats(...): ...
+
+The active trace lives in a contextvar, so spans opened on background threads
+(prefetch, chart pre-render) never leak into a user's request — they only feed
+the process-wide metrics. Finished traces are kept in a small ring buffer,
+optionally appended as JSON lines to $TRACE_LOG, and the aggregates are
+exported in Prometheus text format (prometheus_text(), or $TRACE_PROM_FILE for
+a node_exporter textfile collector).
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Traces kept in memory for the in-app panel / debugging
+MAX_RECENT_TRACES = 50
+
+# Prometheus histogram buckets for stage durations, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage inside a trace."""
+
+    __slots__ = ("name", "start", "duration", "depth", "attrs")
+
+    def __init__(self, name: str, start: float, depth: int, attrs: dict):
+        self.name = name
+        self.start = start          # seconds since the trace started
+        self.duration = None        # seconds, set when the span closes
+        self.depth = depth
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 3),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "depth": self.depth,
+            "attrs": self.attrs,
+        }
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+        self.spans: list[Span] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable form, spans in start order (the waterfall rows)."""
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round((self.duration if self.duration is not None else self.elapsed()) * 1000, 3),
+            "attrs": self.attrs,
+            "spans": [s.to_dict() for s in sorted(self.spans, key=lambda s: s.start)],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide aggregates (Prometheus)
+# ---------------------------------------------------------------------------
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_count = defaultdict(int)
+        self.stage_sum = defaultdict(float)
+        self.stage_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.tokens = defaultdict(int)        # (stage, kind) -> tokens
+        self.cache = defaultdict(int)         # (cache, "hit"|"miss") -> count
+        self.recent = deque(maxlen=MAX_RECENT_TRACES)
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self.stage_count[stage] += 1
+            self.stage_sum[stage] += seconds
+            buckets = self.stage_buckets[stage]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+
+    def add_tokens(self, stage: str, kind: str, n: int):
+        with self._lock:
+            self.tokens[(stage, kind)] += n
+
+    def add_cache(self, cache: str, hit: bool):
+        with self._lock:
+            self.cache[(cache, "hit" if hit else "miss")] += 1
+
+
+METRICS = _Metrics()
+
+
+# ---------------------------------------------------------------------------
+# Recording API
+# ---------------------------------------------------------------------------
+def current_trace():
+    """The trace active in this context, or None."""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """Starts a request-level trace; spans opened inside it are attached to it."""
+    t = Trace(name, **attrs)
+    trace_token = _current_trace.set(t)
+    span_token = _current_span.set(None)
+    try:
+        yield t
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        finish(t)
+
+
+def begin(name: str, **attrs) -> Trace:
+    """
+    Non-context-manager form of trace() for a Streamlit script run, which can
+    end early via st.stop() / st.rerun(). The trace stays active until the next
+    begin() in this context; call finish() once the page has rendered.
+    """
+    t = Trace(name, **attrs)
+    _current_trace.set(t)
+    _current_span.set(None)
+    return t
+
+
+def finish(t: Trace):
+    """Closes a trace and publishes it (ring buffer, $TRACE_LOG, $TRACE_PROM_FILE)."""
+    if t.duration is not None:
+        return
+    t.duration = t.elapsed()
+    METRICS.recent.append(t)
+
+    log_path = os.environ.get("TRACE_LOG")
+    if log_path:
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(t.to_dict(), default=str) + "\n")
+        except OSError:
+            pass  # tracing must never break a request
+
+    prom_path = os.environ.get("TRACE_PROM_FILE")
+    if prom_path:
+        try:
+            tmp = f"{prom_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(prometheus_text())
+            os.replace(tmp, prom_path)   # atomic, as the textfile collector expects
+        except OSError:
+            pass
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Times one stage. Always feeds the process-wide duration metrics; also
+    attached to the current trace when there is one.
+    """
+    t = _current_trace.get()
+    parent = _current_span.get()
+    depth = parent.depth + 1 if parent is not None else 0
+    s = Span(name, t.elapsed() if t is not None else 0.0, depth, attrs)
+    token = _current_span.set(s)
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        METRICS.observe(name, s.duration)
+        if t is not None:
+            t.spans.append(s)
+
+
+def traced(name: str | None = None):
+    """Decorator form of span(); defaults to the function's name."""
+    def decorator(fn):
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, seconds: float, **attrs):
+    """
+    Records a stage that was timed elsewhere — e.g. a chart drawn in a
+    render_service worker process — as a finished span ending now, nested
+    under the current span, and in the process-wide metrics.
+    """
+    METRICS.observe(name, seconds)
+    t = _current_trace.get()
+    if t is None:
+        return
+    parent = _current_span.get()
+    s = Span(name, max(0.0, t.elapsed() - seconds), parent.depth + 1 if parent is not None else 0, attrs)
+    s.duration = seconds
+    t.spans.append(s)
+
+
+def record(**attrs):
+    """Attaches attributes to the innermost open span (no-op outside a span)."""
+    s = _current_span.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+def record_usage(response):
+    """Records an OpenAI response's token usage on the current span and in the metrics."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    s = _current_span.get()
+    stage = s.name if s is not None else "unknown"
+    counts = {
+        "prompt": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion": getattr(usage, "completion_tokens", 0) or 0,
+    }
+    for kind, n in counts.items():
+        METRICS.add_tokens(stage, kind, n)
+    record(prompt_tokens=counts["prompt"], completion_tokens=counts["completion"])
+
+
+def record_cache(cache: str, hit: bool):
+    """Counts a cache lookup and notes it on the current span."""
+    METRICS.add_cache(cache, hit)
+    record(**{f"{cache}_hit": hit})
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+def recent_traces(name: str | None = None) -> list[dict]:
+    """Recently finished traces (optionally of one kind), newest first."""
+    return [t.to_dict() for t in reversed(METRICS.recent) if name is None or t.name == name]
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text() -> str:
+    """Process-wide stage durations, token counts and cache hits in Prometheus text format."""
+    m = METRICS
+    lines = [
+        "# HELP app_stage_duration_seconds Time spent per traced stage.",
+        "# TYPE app_stage_duration_seconds histogram",
+    ]
+    with m._lock:
+        for stage in sorted(m.stage_count):
+            label = f'stage="{_label(stage)}"'
+            for bound, n in zip(DURATION_BUCKETS, m.stage_buckets[stage]):
+                lines.append(f'app_stage_duration_seconds_bucket{{{label},le="{bound}"}} {n}')
+            lines.append(f'app_stage_duration_seconds_bucket{{{label},le="+Inf"}} {m.stage_count[stage]}')
+            lines.append(f"app_stage_duration_seconds_sum{{{label}}} {m.stage_sum[stage]:.6f}")
+            lines.append(f"app_stage_duration_seconds_count{{{label}}} {m.stage_count[stage]}")
+
+        lines += ["# HELP app_llm_tokens_total LLM tokens used per stage.",
+                  "# TYPE app_llm_tokens_total counter"]
+        for (stage, kind), n in sorted(m.tokens.items()):
+            lines.append(f'app_llm_tokens_total{{stage="{_label(stage)}",kind="{kind}"}} {n}')
+
+        lines += ["# HELP app_cache_requests_total Cache lookups by result.",
+                  "# TYPE app_cache_requests_total counter"]
+        for (cache, result), n in sorted(m.cache.items()):
+            lines.append(f'app_cache_requests_total{{cache="{_label(cache)}",result="{result}"}} {n}')
+    return "\n".join(lines) + "\n"
@@ -6,34 +6,20 @@ Four chart types for the Visual Insights tab and inline chat rendering:
   2. plot_xg_timeline       – cumulative xG curves over match minutes
   3. plot_event_timeline    – goal / substitution markers on a horizontal timeline
   4. plot_player_involvement – stacked bar chart of top player involvement counts
+
+It also draws the average-position pitch for data_processing.plot_average_positions.
+
+Each plot_* builds its backend-neutral model (chart_data.py) and hands it to
+the matching draw_* function. The same models can be emitted as Vega-Lite
+specs for the browser instead — see chart_specs.py.
 """
 
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+from chart_data import COLOURS, event_timeline_data, player_involvement_data, shot_map_data, xg_timeline_data
 
-# ---------------------------------------------------------------------------
-# Shared colour palette — SofaScore-inspired dark-navy / green / indigo
-# All chart functions reference this dict; import it from other modules too.
-# ---------------------------------------------------------------------------
-COLOURS = {
-    "bg":          "#1a1c2e",   # deep navy (figures, axes, pitch fill)
-    "bg_card":     "#222438",   # slightly lighter navy (legends, cards)
-    "bg_band":     "#1e2035",   # subtle alternate band for timelines
-    "spine":       "#3a3f62",   # axis spines and grid lines
-    "pitch_line":  "#3d5065",   # pitch markings
-    "home":        "#00b04a",   # SofaScore signature green
-    "away":        "#5263ff",   # SofaScore indigo blue
-    "goal":        "#FFD700",   # gold goal markers
-    "text":        "#ffffff",   # primary labels and titles
-    "text_muted":  "#8a9bb5",   # secondary / placeholder text
-    "passes":      "#5263ff",   # player chart: passes segment
-    "shots":       "#ffa040",   # player chart: shots segment (warm amber)
-    "pressures":   "#ff4e8c",   # player chart: pressures segment (coral pink)
-    "tackles":     "#00b04a",   # player chart: tackles segment
-    "halftime":    "#4a5080",   # half-time divider line
-}
 
 # ---------------------------------------------------------------------------
 # Global style defaults applied to every figure
@@ -101,6 +87,102 @@ def _legend(ax, **kwargs):
     return ax.legend(**defaults)
 
 
+# ---------------------------------------------------------------------------
+# Pitch templates — mplsoccer pitch drawing dominates the cost of the pitch
+# charts, so each pitch configuration is drawn once, rasterised, and reused as
+# an axes background. Per-match markers are then drawn on top.
+# ---------------------------------------------------------------------------
+_PITCH_TEMPLATES: dict[tuple, dict] = {}
+
+
+def _pitch_template(figsize: tuple, ncols: int = 1, adjust: dict | None = None,
+                    tight: bool = False, **pitch_kwargs) -> dict:
+    """
+    Draws a StatsBomb pitch once for this figure layout and caches the pixels
+    of its axes, plus the axes limits and positions needed to line markers up.
+    tight=True lays the template out like pitch.draw(figsize=...) does.
+    The key includes the palette and dpi, so a theme change redraws it.
+    """
+    key = (
+        tuple(figsize), ncols, tuple(sorted((adjust or {}).items())), tight,
+        tuple(sorted(pitch_kwargs.items())),
+        COLOURS["bg"], COLOURS["pitch_line"], plt.rcParams["figure.dpi"],
+    )
+    template = _PITCH_TEMPLATES.get(key)
+    if template is not None:
+        return template
+
+    from mplsoccer import Pitch
+
+    pitch = Pitch(pitch_type="statsbomb", pitch_color=COLOURS["bg"],
+                  line_color=COLOURS["pitch_line"], **pitch_kwargs)
+    fig, axes = plt.subplots(1, ncols, figsize=figsize, squeeze=False)
+    axes = axes[0]
+    if adjust:
+        fig.subplots_adjust(**adjust)
+    if tight:
+        fig.set_layout_engine("tight")
+    for ax in axes:
+        pitch.draw(ax=ax)
+    fig.canvas.draw()
+
+    # Every panel holds the same pitch, so one crop serves all of them
+    bbox = axes[0].get_window_extent()
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    height = rgba.shape[0]
+    image = rgba[
+        int(round(height - bbox.y1)):int(round(height - bbox.y0)),
+        int(round(bbox.x0)):int(round(bbox.x1)),
+    ].copy()
+
+    template = {
+        "image": image,
+        "xlim": axes[0].get_xlim(),
+        "ylim": axes[0].get_ylim(),
+        "positions": [ax.get_position().bounds for ax in axes],
+    }
+    plt.close(fig)
+    _PITCH_TEMPLATES[key] = template
+    return template
+
+
+# Every pitch layout the charts use, so warm_pitch_templates() can pre-draw them
+SHOT_MAP_PITCH = dict(
+    figsize=(15, 6.5), ncols=2,
+    adjust=dict(left=0.04, right=0.96, top=0.88, bottom=0.06, wspace=0.08),
+    line_zorder=2, linewidth=1.2,
+)
+AVERAGE_POSITIONS_PITCH = dict(figsize=(6, 4), tight=True)
+
+
+def warm_pitch_templates():
+    """Draws every pitch template up front (startup warm-up / render workers)."""
+    for layout in (SHOT_MAP_PITCH, AVERAGE_POSITIONS_PITCH):
+        _pitch_template(**layout)
+
+
+def _pitch_figure(figsize: tuple, ncols: int = 1, adjust: dict | None = None,
+                  tight: bool = False, **pitch_kwargs):
+    """
+    Returns (fig, axes) with the cached pitch already painted into each axes.
+    Axes use the pitch's data coordinates, so ax.scatter(x, y) lines up
+    exactly as pitch.scatter would.
+    """
+    template = _pitch_template(figsize, ncols, adjust, tight, **pitch_kwargs)
+    fig, axes = plt.subplots(1, ncols, figsize=figsize, squeeze=False)
+    axes = list(axes[0])
+    fig.patch.set_facecolor(COLOURS["bg"])
+    (x0, x1), (y0, y1) = template["xlim"], template["ylim"]
+    for ax, position in zip(axes, template["positions"]):
+        ax.set_position(position)
+        ax.imshow(template["image"], extent=(x0, x1, y0, y1),
+                  aspect="auto", interpolation="none", zorder=0)
+        ax.set_xlim(x0, x1)
+        ax.set_ylim(y0, y1)
+        ax.set_axis_off()
+    return fig, axes
+
+
 # ---------------------------------------------------------------------------
 # 1. Shot Map
 # ---------------------------------------------------------------------------
@@ -111,69 +193,48 @@ def plot_shot_map(events_data: list, home_team: str, away_team: str):
 
     Returns a matplotlib Figure.
     """
-    all_shots = [e for e in events_data if e.get("type", {}).get("name") == "Shot"]
-    if not all_shots:
-        return _empty_figure("No shot data available for this match.")
+    return draw_shot_map(shot_map_data(events_data, home_team, away_team))
 
-    from mplsoccer import Pitch
 
-    fig, axes = plt.subplots(1, 2, figsize=(15, 6.5))
-    fig.patch.set_facecolor(COLOURS["bg"])
-    fig.subplots_adjust(left=0.04, right=0.96, top=0.88, bottom=0.06, wspace=0.08)
-
-    team_cfg = [
-        (axes[0], home_team, COLOURS["home"]),
-        (axes[1], away_team, COLOURS["away"]),
-    ]
-
-    for ax, team, base_color in team_cfg:
-        pitch = Pitch(
-            pitch_type="statsbomb",
-            pitch_color=COLOURS["bg"],
-            line_color=COLOURS["pitch_line"],
-            line_zorder=2,
-            linewidth=1.2,
-        )
-        pitch.draw(ax=ax)
+def draw_shot_map(data: dict) -> plt.Figure:
+    """Draws a chart_data.shot_map_data model with matplotlib."""
+    if not any(t["shots"] for t in data["teams"]):
+        return _empty_figure("No shot data available for this match.")
 
-        shots = [
-            e for e in events_data
-            if e.get("type", {}).get("name") == "Shot"
-            and e.get("team", {}).get("name") == team
-        ]
-        goals = [s for s in shots if s.get("shot", {}).get("outcome", {}).get("name") == "Goal"]
+    from matplotlib.lines import Line2D
+
+    fig, axes = _pitch_figure(**SHOT_MAP_PITCH)
 
-        for shot in shots:
-            loc = shot.get("location", [0, 0])
-            xg = shot.get("shot", {}).get("statsbomb_xg", 0.05)
-            is_goal = shot.get("shot", {}).get("outcome", {}).get("name") == "Goal"
+    for ax, team_data in zip(axes, data["teams"]):
+        team = team_data["team"]
+        base_color = COLOURS[team_data["side"]]
+        shots = team_data["shots"]
 
-            pitch.scatter(
-                loc[0], loc[1],
-                ax=ax,
+        # One batched scatter for misses and one for goals, instead of one per shot
+        for is_goal in (False, True):
+            group = [s for s in shots if s["goal"] == is_goal]
+            if not group:
+                continue
+            ax.scatter(
+                [s["x"] for s in group], [s["y"] for s in group],
                 color=COLOURS["goal"] if is_goal else base_color,
                 edgecolors="#ffffff" if is_goal else COLOURS["bg_card"],
-                s=xg * 1400 + 55,
+                s=np.array([s["xg"] for s in group]) * 1400 + 55,
                 marker="*" if is_goal else "o",
                 alpha=0.9 if is_goal else 0.75,
                 zorder=4 if is_goal else 3,
                 linewidths=1.0 if is_goal else 0.6,
             )
 
-        from matplotlib.lines import Line2D
-        shot_count = len(shots)
-        goal_count = len(goals)
-        total_xg = sum(s.get("shot", {}).get("statsbomb_xg", 0) for s in shots)
-
         legend_elements = [
             Line2D([0], [0], marker="o", color="w", markerfacecolor=base_color,
-                   markersize=9, label=f"Shot  ({shot_count})", linestyle="None",
+                   markersize=9, label=f"Shot  ({team_data['shot_count']})", linestyle="None",
                    markeredgecolor=COLOURS["bg_card"], markeredgewidth=0.5),
             Line2D([0], [0], marker="*", color="w", markerfacecolor=COLOURS["goal"],
-                   markersize=13, label=f"Goal  ({goal_count})", linestyle="None",
+                   markersize=13, label=f"Goal  ({team_data['goal_count']})", linestyle="None",
                    markeredgecolor="white", markeredgewidth=0.5),
         ]
-        leg = ax.legend(
+        ax.legend(
             handles=legend_elements,
             loc="upper left",
             facecolor=COLOURS["bg_card"],
@@ -190,7 +251,7 @@ def plot_shot_map(events_data: list, home_team: str, away_team: str):
         )
         # xG badge beneath title
         ax.text(
-            0.5, 1.02, f"xG: {total_xg:.2f}",
+            0.5, 1.02, f"xG: {team_data['xg_total']:.2f}",
             transform=ax.transAxes,
             color=base_color, fontsize=10, fontweight="semibold",
             ha="center", va="bottom",
@@ -214,8 +275,12 @@ def plot_xg_timeline(events_data: list, home_team: str, away_team: str,
 
     Returns a matplotlib Figure.
     """
-    shot_events = [e for e in events_data if e.get("type", {}).get("name") == "Shot"]
-    if not shot_events:
+    return draw_xg_timeline(xg_timeline_data(events_data, home_team, away_team, match_stats))
+
+
+def draw_xg_timeline(data: dict) -> plt.Figure:
+    """Draws a chart_data.xg_timeline_data model with matplotlib."""
+    if not data["has_shots"]:
         return _empty_figure("No shot data available — xG timeline cannot be rendered.")
 
     fig, ax = plt.subplots(figsize=(13, 5))
@@ -223,40 +288,15 @@ def plot_xg_timeline(events_data: list, home_team: str, away_team: str,
     fig.subplots_adjust(left=0.08, right=0.97, top=0.88, bottom=0.13)
     _style_axes(ax, grid=True, grid_axis="y")
 
-    home_xg_by_min: dict[int, float] = {}
-    away_xg_by_min: dict[int, float] = {}
-
-    for ev in events_data:
-        if ev.get("type", {}).get("name") != "Shot":
-            continue
-        team = ev.get("team", {}).get("name")
-        minute = ev.get("minute", 0)
-        xg = ev.get("shot", {}).get("statsbomb_xg", 0.0)
-
-        if team == home_team:
-            home_xg_by_min[minute] = home_xg_by_min.get(minute, 0.0) + xg
-        elif team == away_team:
-            away_xg_by_min[minute] = away_xg_by_min.get(minute, 0.0) + xg
-
-    all_minutes = list(range(0, 96))
-    home_cum, away_cum = [], []
-    hc, ac = 0.0, 0.0
-    for m in all_minutes:
-        hc += home_xg_by_min.get(m, 0.0)
-        ac += away_xg_by_min.get(m, 0.0)
-        home_cum.append(hc)
-        away_cum.append(ac)
+    all_minutes = data["minutes"]
 
     # Lines + area fills
-    ax.step(all_minutes, home_cum, color=COLOURS["home"], linewidth=2.5,
-            label=home_team, where="post", zorder=3)
-    ax.fill_between(all_minutes, home_cum, step="post",
-                    color=COLOURS["home"], alpha=0.12, zorder=2)
-
-    ax.step(all_minutes, away_cum, color=COLOURS["away"], linewidth=2.5,
-            label=away_team, where="post", zorder=3)
-    ax.fill_between(all_minutes, away_cum, step="post",
-                    color=COLOURS["away"], alpha=0.12, zorder=2)
+    for team_data in data["teams"]:
+        clr = COLOURS[team_data["side"]]
+        ax.step(all_minutes, team_data["cumulative"], color=clr, linewidth=2.5,
+                label=team_data["team"], where="post", zorder=3)
+        ax.fill_between(all_minutes, team_data["cumulative"], step="post",
+                        color=clr, alpha=0.12, zorder=2)
 
     y_max = max(ax.get_ylim()[1], 0.1)
 
@@ -266,14 +306,10 @@ def plot_xg_timeline(events_data: list, home_team: str, away_team: str,
     ax.text(45.6, y_max * 0.04, "HT",
             color=COLOURS["text_muted"], fontsize=8.5, fontstyle="italic")
 
-    # Goal annotations with bbox
-    _goal_annotation_y = {home_team: y_max * 0.88, away_team: y_max * 0.70}
-    for team, clr, ypos in [
-        (home_team, COLOURS["home"], _goal_annotation_y[home_team]),
-        (away_team, COLOURS["away"], _goal_annotation_y[away_team]),
-    ]:
-        for goal in match_stats.get(team, {}).get("goals", []):
-            m = goal.get("minute", 0)
+    # Goal annotations with bbox — home labels sit above away labels
+    for team_data, ypos in zip(data["teams"], (y_max * 0.88, y_max * 0.70)):
+        clr = COLOURS[team_data["side"]]
+        for m in team_data["goals"]:
             ax.axvline(x=m, color=clr, linewidth=1.0, linestyle="--", alpha=0.55, zorder=1)
             ax.text(
                 m + 0.6, ypos, f"⚽ {m}'",
@@ -305,6 +341,11 @@ def plot_event_timeline(match_stats: dict, home_team: str, away_team: str):
 
     Returns a matplotlib Figure.
     """
+    return draw_event_timeline(event_timeline_data(match_stats, home_team, away_team))
+
+
+def draw_event_timeline(data: dict) -> plt.Figure:
+    """Draws a chart_data.event_timeline_data model with matplotlib."""
     fig, ax = plt.subplots(figsize=(14, 4.5))
     fig.patch.set_facecolor(COLOURS["bg"])
     fig.subplots_adjust(left=0.13, right=0.97, top=0.84, bottom=0.16)
@@ -319,6 +360,25 @@ def plot_event_timeline(match_stats: dict, home_team: str, away_team: str):
         ax.axvline(x=m, color=COLOURS["spine"], linewidth=0.7,
                    linestyle="--", alpha=0.35, zorder=1)
 
+    # Momentum: net threat as a filled band (home above, away below), scaled to
+    # the lanes, with the ranked turning-point windows shaded behind it
+    momentum = data.get("momentum")
+    if momentum:
+        for tp in data.get("turning_points", []):
+            clr = COLOURS[tp["side"]]
+            ax.axvspan(tp["start_minute"], tp["end_minute"], color=clr, alpha=0.10, zorder=0)
+            ax.text((tp["start_minute"] + tp["end_minute"]) / 2, 1.55 if tp["side"] == "home" else -1.7,
+                    f"TP{tp['rank']}", color=clr, fontsize=8, fontweight="bold", ha="center")
+        net = np.asarray(momentum["net"], dtype=float)
+        peak = np.abs(net).max()
+        if peak > 0:
+            scaled = net / peak * 1.3
+            minutes = np.asarray(momentum["minutes"]) + 0.5
+            ax.fill_between(minutes, 0, scaled, where=scaled >= 0, color=COLOURS["home"],
+                            alpha=0.22, linewidth=0, interpolate=True, zorder=1)
+            ax.fill_between(minutes, 0, scaled, where=scaled <= 0, color=COLOURS["away"],
+                            alpha=0.22, linewidth=0, interpolate=True, zorder=1)
+
     # Central timeline bar
     ax.axhline(y=0, color=COLOURS["spine"], linewidth=1.8, zorder=2)
 
@@ -328,70 +388,39 @@ def plot_event_timeline(match_stats: dict, home_team: str, away_team: str):
     ax.text(45.6, 1.55, "HT",
             color=COLOURS["text_muted"], fontsize=8.5, fontstyle="italic")
 
-    home_color = COLOURS["home"]
-    away_color = COLOURS["away"]
-
-    def short_name(full_name):
-        parts = full_name.split() if full_name else ["?"]
-        return parts[-1]
-
-    # --- Goals ---
-    for goal in match_stats.get(home_team, {}).get("goals", []):
-        m = goal.get("minute", 0)
-        p = short_name(goal.get("player", ""))
-        ax.scatter(m, 0.7, color=home_color, s=300, marker="*",
-                   edgecolors="white", linewidths=0.6, zorder=5)
-        ax.annotate(
-            f"⚽  {p}  {m}'", xy=(m, 0.7),
-            xytext=(0, 11), textcoords="offset points",
-            color=home_color, fontsize=8.5, fontweight="semibold",
-            ha="center",
-            bbox=dict(boxstyle="round,pad=0.28", facecolor=COLOURS["bg_card"],
-                      edgecolor=home_color, linewidth=0.7, alpha=0.88),
-        )
-
-    for goal in match_stats.get(away_team, {}).get("goals", []):
-        m = goal.get("minute", 0)
-        p = short_name(goal.get("player", ""))
-        ax.scatter(m, -0.7, color=away_color, s=300, marker="*",
-                   edgecolors="white", linewidths=0.6, zorder=5)
-        ax.annotate(
-            f"⚽  {p}  {m}'", xy=(m, -0.7),
-            xytext=(0, -16), textcoords="offset points",
-            color=away_color, fontsize=8.5, fontweight="semibold",
-            ha="center",
-            bbox=dict(boxstyle="round,pad=0.28", facecolor=COLOURS["bg_card"],
-                      edgecolor=away_color, linewidth=0.7, alpha=0.88),
-        )
+    # Home rows sit above the axis, away rows mirror them below
+    for team_data in data["teams"]:
+        clr = COLOURS[team_data["side"]]
+        sign = 1 if team_data["side"] == "home" else -1
+
+        # --- Goals ---
+        for goal in team_data["goals"]:
+            m = goal["minute"]
+            ax.scatter(m, 0.7 * sign, color=clr, s=300, marker="*",
+                       edgecolors="white", linewidths=0.6, zorder=5)
+            ax.annotate(
+                f"⚽  {goal['player']}  {m}'", xy=(m, 0.7 * sign),
+                xytext=(0, 11 if sign > 0 else -16), textcoords="offset points",
+                color=clr, fontsize=8.5, fontweight="semibold",
+                ha="center",
+                bbox=dict(boxstyle="round,pad=0.28", facecolor=COLOURS["bg_card"],
+                          edgecolor=clr, linewidth=0.7, alpha=0.88),
+            )
 
-    # --- Substitutions ---
-    for sub in match_stats.get(home_team, {}).get("subs", []):
-        m = sub.get("minute", 0)
-        ax.scatter(m, 0.28, color=home_color, s=70, marker="^",
-                   alpha=0.72, zorder=4)
-        ax.annotate(f"↕ {m}'", xy=(m, 0.28),
-                    xytext=(0, 7), textcoords="offset points",
-                    color=home_color, fontsize=7.5, ha="center", alpha=0.85)
-
-    for sub in match_stats.get(away_team, {}).get("subs", []):
-        m = sub.get("minute", 0)
-        ax.scatter(m, -0.28, color=away_color, s=70, marker="v",
-                   alpha=0.72, zorder=4)
-        ax.annotate(f"↕ {m}'", xy=(m, -0.28),
-                    xytext=(0, -13), textcoords="offset points",
-                    color=away_color, fontsize=7.5, ha="center", alpha=0.85)
-
-    # Team labels
-    ax.text(-2.5, 0.85, home_team,
-            color=home_color, fontsize=10, fontweight="bold",
-            ha="right", va="center")
-    ax.text(-2.5, -0.85, away_team,
-            color=away_color, fontsize=10, fontweight="bold",
-            ha="right", va="center")
-
-    # Home / Away side indicators (small coloured dots on the far left)
-    ax.scatter(-4.5, 0.7, color=home_color, s=60, marker="o", zorder=5)
-    ax.scatter(-4.5, -0.7, color=away_color, s=60, marker="o", zorder=5)
+        # --- Substitutions ---
+        for sub in team_data["subs"]:
+            m = sub["minute"]
+            ax.scatter(m, 0.28 * sign, color=clr, s=70, marker="^" if sign > 0 else "v",
+                       alpha=0.72, zorder=4)
+            ax.annotate(f"↕ {m}'", xy=(m, 0.28 * sign),
+                        xytext=(0, 7 if sign > 0 else -13), textcoords="offset points",
+                        color=clr, fontsize=7.5, ha="center", alpha=0.85)
+
+        # Team label and side indicator (small coloured dot on the far left)
+        ax.text(-2.5, 0.85 * sign, team_data["team"],
+                color=clr, fontsize=10, fontweight="bold",
+                ha="right", va="center")
+        ax.scatter(-4.5, 0.7 * sign, color=clr, s=60, marker="o", zorder=5)
 
     ax.set_xlim(-6, 97)
     ax.set_ylim(-1.85, 1.85)
@@ -414,91 +443,58 @@ def plot_event_timeline(match_stats: dict, home_team: str, away_team: str):
 # ---------------------------------------------------------------------------
 # 4. Player Involvement Chart
 # ---------------------------------------------------------------------------
-def plot_player_involvement(events_data: list, home_team: str, away_team: str) -> plt.Figure:
+def plot_player_involvement(events_data: list, home_team: str, away_team: str,
+                            player_xt: dict | None = None) -> plt.Figure:
     """
     Stacked horizontal bar chart showing the top 7 players per team ranked
     by total involvement, broken down by passes, shots, pressures, and tackles.
     Computed fresh from events_data — no dependency on compute_match_stats.
+    With player_xt (expected_threat.player_xt) each bar is also labelled
+    with the player's xT from passes and carries.
 
     Returns a matplotlib Figure.
     """
-    from collections import defaultdict
-
-    if not events_data:
-        return _empty_figure("No event data available for player involvement chart.")
+    return draw_player_involvement(player_involvement_data(events_data, home_team, away_team, player_xt))
 
-    _TYPE_MAP = {"Pass": "passes", "Shot": "shots", "Pressure": "pressures"}
 
-    def _build_player_stats(team_name: str) -> dict:
-        stats = defaultdict(lambda: {"passes": 0, "shots": 0, "pressures": 0, "tackles": 0})
-        for ev in events_data:
-            if ev.get("team", {}).get("name") != team_name:
-                continue
-            player = ev.get("player", {}).get("name")
-            if not player:
-                continue
-            ev_type = ev.get("type", {}).get("name", "")
-            if ev_type in _TYPE_MAP:
-                stats[player][_TYPE_MAP[ev_type]] += 1
-            elif ev_type == "Duel":
-                if ev.get("duel", {}).get("type", {}).get("name") == "Tackle":
-                    stats[player]["tackles"] += 1
-        return stats
-
-    def _abbrev(name: str) -> str:
-        """'Lionel Messi' → 'L. Messi'"""
-        parts = name.split()
-        if len(parts) >= 2:
-            return f"{parts[0][0]}. {' '.join(parts[1:])}"
-        return name
+def draw_player_involvement(data: dict) -> plt.Figure:
+    """Draws a chart_data.player_involvement_data model with matplotlib."""
+    if not data["has_events"]:
+        return _empty_figure("No event data available for player involvement chart.")
 
     fig, axes = plt.subplots(1, 2, figsize=(15, 5.5))
     fig.patch.set_facecolor(COLOURS["bg"])
     fig.subplots_adjust(left=0.12, right=0.97, top=0.88, bottom=0.12, wspace=0.35)
 
-    _SEGMENT_COLORS = {
-        "passes":    COLOURS["passes"],
-        "shots":     COLOURS["shots"],
-        "pressures": COLOURS["pressures"],
-        "tackles":   COLOURS["tackles"],
-    }
-    team_cfg = [(axes[0], home_team), (axes[1], away_team)]
-
-    for ax, team in team_cfg:
+    for ax, team_data in zip(axes, data["teams"]):
         _style_axes(ax, grid=True, grid_axis="x")
-        stats = _build_player_stats(team)
+        rows = team_data["players"]
 
-        if not stats:
+        if not rows:
             ax.text(0.5, 0.5, "No player data", transform=ax.transAxes,
                     color=COLOURS["text_muted"], ha="center", va="center", style="italic")
             ax.set_axis_off()
             continue
 
-        # Top 7 players by total event count
-        sorted_players = sorted(
-            stats.items(),
-            key=lambda x: sum(x[1].values()),
-            reverse=True,
-        )[:7]
-        players = [_abbrev(p) for p, _ in sorted_players]
-        raw_players = [p for p, _ in sorted_players]
+        # xT from passes and carries under each name, when the season model is available
+        players = [r["label"] if r.get("xt") is None else f"{r['label']}\nxT {r['xt']:+.2f}" for r in rows]
 
         # Stacked horizontal bars
         lefts = [0] * len(players)
-        for key, color in _SEGMENT_COLORS.items():
-            values = [stats[rp][key] for rp in raw_players]
-            bars = ax.barh(players, values, left=lefts, color=color,
-                           label=key.capitalize(), height=0.58,
-                           edgecolor=COLOURS["bg"], linewidth=0.4)
+        for key in data["segments"]:
+            values = [r[key] for r in rows]
+            ax.barh(players, values, left=lefts, color=COLOURS[key],
+                    label=key.capitalize(), height=0.58,
+                    edgecolor=COLOURS["bg"], linewidth=0.4)
             lefts = [l + v for l, v in zip(lefts, values)]
 
         # Total count label at end of bar
-        for i, (rp, total_left) in enumerate(zip(raw_players, lefts)):
+        for i, total_left in enumerate(lefts):
             if total_left > 0:
                 ax.text(total_left + 1, i, str(total_left),
                         color=COLOURS["text_muted"], fontsize=8, va="center")
 
-        ax.set_title(f"{team}", color=COLOURS["text"],
+        ax.set_title(f"{team_data['team']}", color=COLOURS["text"],
                      fontsize=12, fontweight="bold", pad=8)
         ax.tick_params(colors=COLOURS["text_muted"], labelsize=9)
         ax.set_xlabel("Event count", color=COLOURS["text"], fontsize=10, labelpad=5)
@@ -507,3 +503,34 @@ def plot_player_involvement(events_data: list, home_team: str, away_team: str) -
     fig.suptitle("Player Involvement", color=COLOURS["text"],
                  fontsize=14, fontweight="bold", y=0.98)
     return fig
+
+
+# ---------------------------------------------------------------------------
+# 5. Average Positions (model built by data_processing.average_positions_data)
+# ---------------------------------------------------------------------------
+def draw_average_positions(model: dict) -> plt.Figure:
+    """Draws a team's average-position model on the cached pitch template."""
+    fig, (ax,) = _pitch_figure(**AVERAGE_POSITIONS_PITCH)
+    players = model["players"]
+
+    # One batched scatter for all player nodes, then the jersey numbers
+    if players:
+        ax.scatter([p["x"] for p in players], [p["y"] for p in players],
+                   color=model["color"], edgecolors=COLOURS["text"], s=500, zorder=2)
+    for p in players:
+        ax.text(p["x"], p["y"], p["jersey"], color=COLOURS["text"],
+                va="center", ha="center", fontsize=12, fontweight="bold", zorder=3)
+
+    ax.set_title(f"{model['team']}", color=COLOURS["text"], fontsize=14, loc="center")
+    return fig
+
+
+# Drawer lookup by chart kind — lets a rendering worker process (see
+# render_service.py) draw any chart from its model alone
+DRAWERS = {
+    "shot_map":       draw_shot_map,
+    "xg_chart":       draw_xg_timeline,
+    "event_timeline": draw_event_timeline,
+    "player_chart":   draw_player_involvement,
+    "avg_positions":  draw_average_positions,
+}
@@ -0,0 +1,169 @@
+"""
+warmup.py
+---------
+Cold-start tooling: an import-cost profile and a warm-up entry point.
+
+The first request on a fresh replica otherwise pays for importing matplotlib,
+mplsoccer, faiss and openai, fetching the season catalog, embedding the
+knowledge base, drawing the pitch templates and spawning the render workers.
+
+    python warmup.py                  run the warm-up here and print step timings
+                                      (also fills the on-disk embedding cache)
+    python warmup.py --import-profile per-module import cost, slowest first
+    python warmup.py serve [ARGS...]  warm up, THEN start `streamlit run app.py ARGS`
+                                      in this same process
+
+With `serve`, every in-memory cache (st.cache_data / st.cache_resource, pitch
+templates, the render pool) is already populated when the Streamlit server
+starts listening, so its /_stcore/health readiness check only passes once the
+replica is warm.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).parent / "app.py"
+
+# Third-party modules the app loads at some point, heaviest first in practice
+HEAVY_MODULES = (
+    "streamlit", "pandas", "numpy", "requests",
+    "matplotlib.pyplot", "mplsoccer", "faiss", "openai",
+)
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(modules=HEAVY_MODULES) -> list[dict]:
+    """
+    Cold import cost of each module, measured in a fresh interpreter with
+    `python -X importtime`. Returns [{module, self_ms, cumulative_ms}] for the
+    requested modules, slowest first. Cost already paid by an earlier module in
+    the list (shared dependencies) is attributed to that earlier module.
+    """
+    code = "\n".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=Path(__file__).parent)
+    costs = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            costs[name] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+
+    rows = [
+        {"module": m, "self_ms": costs[m][0], "cumulative_ms": costs[m][1]}
+        for m in modules if m in costs
+    ]
+    return sorted(rows, key=lambda r: -r["cumulative_ms"])
+
+
+def _step(timings: dict, name: str, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        timings[name] = round(time.perf_counter() - start, 3)
+    except Exception as e:  # one failing step (e.g. no API key) shouldn't stop the rest
+        timings[name] = f"failed: {e}"
+
+
+def _import_heavy_modules():
+    import importlib
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+
+
+def _season_catalog():
+    from data_processing import get_laliga_1819_info, load_match_list
+    comp_id, season_id = get_laliga_1819_info()
+    load_match_list(comp_id, season_id)
+
+
+def _knowledge_base_index():
+    from retriever import build_vector_store
+    index, _ = build_vector_store()
+    if index is None:
+        raise RuntimeError("knowledge base is empty")
+
+
+def _xt_model():
+    from data_processing import get_laliga_1819_info
+    from expected_threat import get_xt_grid
+    get_xt_grid(*get_laliga_1819_info())
+
+
+def _similarity_index():
+    from data_processing import get_laliga_1819_info
+    from match_similarity import get_similarity_index
+    get_similarity_index(*get_laliga_1819_info())
+
+
+def _player_profiles():
+    from data_processing import get_laliga_1819_info
+    from player_profiles import get_player_profiles
+    get_player_profiles(*get_laliga_1819_info())
+
+
+def _pitch_templates():
+    from visualizations import warm_pitch_templates
+    warm_pitch_templates()
+
+
+def _render_pool():
+    from render_service import get_render_service
+    get_render_service().warm_up()
+
+
+def warm_up() -> dict:
+    """
+    Preloads everything the first request would otherwise pay for and returns
+    {step: seconds} (or "failed: ..." for a step that could not run).
+    """
+    timings = {}
+    _step(timings, "imports", _import_heavy_modules)
+    _step(timings, "season_catalog", _season_catalog)
+    _step(timings, "knowledge_base_index", _knowledge_base_index)
+    _step(timings, "xt_model", _xt_model)
+    _step(timings, "similarity_index", _similarity_index)
+    _step(timings, "player_profiles", _player_profiles)
+    _step(timings, "pitch_templates", _pitch_templates)
+    _step(timings, "render_pool", _render_pool)
+    return timings
+
+
+def _print_timings(timings: dict):
+    for name, value in timings.items():
+        shown = f"{value * 1000:8.0f} ms" if isinstance(value, float) else value
+        print(f"  {name:<22} {shown}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--import-profile", action="store_true",
+                        help="print per-module import cost and exit")
+    parser.add_argument("command", nargs="?", choices=["serve"],
+                        help="warm up, then run the Streamlit app in this process")
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER,
+                        help="extra arguments for `streamlit run` (with serve)")
+    args = parser.parse_args(argv)
+
+    if args.import_profile:
+        print(f"  {'module':<20} {'cumulative':>12} {'self':>10}")
+        for row in import_profile():
+            print(f"  {row['module']:<20} {row['cumulative_ms']:>9.0f} ms {row['self_ms']:>7.0f} ms")
+        return
+
+    print("Warming up...")
+    _print_timings(warm_up())
+
+    if args.command == "serve":
+        from streamlit.web import cli as stcli
+        sys.argv = ["streamlit", "run", str(APP_PATH), *args.streamlit_args]
+        sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()